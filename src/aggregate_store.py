@@ -0,0 +1,467 @@
+"""
+RCRA Aggregate Store
+Incrementally maintained aggregates kept in RCRAAggregateTable
+
+The table is keyed by AggregateKey (what) and Bucket (which slice):
+- STATS / TOTAL          running counters behind GET /statistics
+- STATS / HOUR#<hour>    per-hour incident counts (TTL'd) for the 24h figure
+- ROLLUP / DAY#<date>    per-day rollup: counts by severity, log group
+                         and hour of day, plus resolution time sums/counts
+                         overall and per severity
+- ROLLUP / HOUR#<hour>   the same breakdown per hour (without hour of day)
+- ROLLUP#SIG / <rollup bucket>#<signature>
+                         per-signature Count for one DAY#/HOUR# bucket.
+                         Signatures are near-unique summaries, so they get
+                         an item each instead of an attribute on the
+                         rollup item (which would outgrow the 400 KB item
+                         limit on a busy day); get_rollups(signatures=True)
+                         folds them back in as Signature#<signature>
+- BURST / SIG#|LOG#<key> burst-detector state per signature / log group
+                         (see burst_detector; BURST_ACTIVE holds live bursts)
+
+Rollups feed predictive analysis and GET /trends, so trend and regression
+inputs are a handful of small items instead of raw incidents.
+
+Counters are updated with atomic ADD deltas by the incident stream
+processor, so reading statistics never touches incident rows.
+Streams deliver at-least-once and a failed batch is retried whole, so
+each record's deltas are written in one transaction together with a
+STREAM / <eventID> marker; a redelivered record finds its marker and is
+skipped. rebuild_statistics() recomputes the counters from scratch if
+they ever drift.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+dynamodb = boto3.resource("dynamodb")
+
+AGGREGATE_TABLE_NAME = os.environ.get("AGGREGATE_TABLE_NAME", "RCRAAggregateTable")
+aggregate_table = dynamodb.Table(AGGREGATE_TABLE_NAME)
+
+STATS_KEY = "STATS"
+TOTAL_BUCKET = "TOTAL"
+HOUR_PREFIX = "HOUR#"
+
+ROLLUP_KEY = "ROLLUP"
+DAY_PREFIX = "DAY#"
+SIGNATURE_ROLLUP_KEY = "ROLLUP#SIG"
+SIGNATURE_PREFIX = "Signature#"
+
+# Markers of stream records already applied; they only need to outlive
+# the stream's 24h retention
+STREAM_KEY = "STREAM"
+STREAM_MARKER_TTL_SECONDS = 2 * 24 * 3600
+
+# Attempts for a delta transaction that conflicts with a concurrent one
+TRANSACT_ATTEMPTS = 3
+
+# Hourly buckets only need to outlive the 24h window
+HOUR_BUCKET_TTL_SECONDS = 3 * 24 * 3600
+
+# Rollup granularity -> (bucket prefix, timestamp prefix length, TTL seconds).
+# Daily rollups are tiny and outlive the incidents they summarize.
+ROLLUP_GRANULARITIES = {
+    "day": (DAY_PREFIX, 10, 400 * 24 * 3600),
+    "hour": (HOUR_PREFIX, 13, 14 * 24 * 3600),
+}
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN")
+STATUSES = ("OPEN", "RESOLVED")
+
+
+def hour_bucket(timestamp):
+    """HOUR#YYYY-MM-DDTHH bucket for an ISO timestamp"""
+    return HOUR_PREFIX + (timestamp or "")[:13]
+
+
+def counter_contributions(header):
+    """Counter attribute -> value one incident header contributes to STATS/TOTAL"""
+    if not header:
+        return {}
+    contributions = {
+        "TotalIncidents": 1,
+        f"Severity#{header.get('Severity', 'UNKNOWN')}": 1,
+        f"Status#{header.get('Status', 'OPEN')}": 1,
+    }
+    if header.get("RemediationEligible"):
+        contributions["RemediationEligible"] = 1
+    for tag in set(header.get("Tags") or []):
+        contributions[f"Tag#{tag}"] = 1
+    return contributions
+
+
+def rollup_bucket(granularity, timestamp):
+    """DAY#YYYY-MM-DD or HOUR#YYYY-MM-DDTHH rollup bucket for an ISO timestamp"""
+    prefix, length, _ = ROLLUP_GRANULARITIES[granularity]
+    return prefix + (timestamp or "")[:length]
+
+
+def resolution_minutes(header):
+    """Minutes from creation to resolution, or None while unresolved"""
+    created_at = header.get("CreatedAt")
+    resolved_at = header.get("ResolvedAt")
+    if header.get("Status") != "RESOLVED" or not created_at or not resolved_at:
+        return None
+    try:
+        created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        resolved = datetime.fromisoformat(resolved_at.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, (resolved - created).total_seconds() / 60)
+
+
+def rollup_contributions(header, granularity="day"):
+    """Counter attribute -> value one incident header contributes to its rollup bucket"""
+    if not header or not header.get("CreatedAt"):
+        return {}
+    severity = header.get("Severity", "UNKNOWN")
+    contributions = {
+        "Count": 1,
+        f"Severity#{severity}": 1,
+        f"LogGroup#{header.get('LogGroup') or 'Unknown'}": 1,
+        f"{SIGNATURE_PREFIX}{header.get('ErrorSignature') or header.get('Summary') or 'Unknown'}": 1,
+    }
+    if granularity == "day":
+        contributions[f"Hour#{header['CreatedAt'][11:13]}"] = 1
+    minutes = resolution_minutes(header)
+    if minutes is not None:
+        minutes = Decimal(str(round(minutes, 2)))
+        contributions.update({
+            "ResolvedCount": 1,
+            "ResolutionMinutes": minutes,
+            f"ResolvedCount#{severity}": 1,
+            f"ResolutionMinutes#{severity}": minutes,
+        })
+    return contributions
+
+
+def _deltas(old, new):
+    deltas = {}
+    for attr in set(old) | set(new):
+        delta = new.get(attr, 0) - old.get(attr, 0)
+        if delta:
+            deltas[attr] = delta
+    return deltas
+
+
+def counter_deltas(old_header, new_header):
+    """Difference between the contributions of two versions of an incident"""
+    return _deltas(counter_contributions(old_header), counter_contributions(new_header))
+
+
+def rollup_deltas(old_header, new_header):
+    """
+    {bucket: deltas} across every rollup granularity; a changed CreatedAt
+    moves the incident between buckets.
+    """
+    result = {}
+    for granularity in ROLLUP_GRANULARITIES:
+        old = rollup_contributions(old_header, granularity)
+        new = rollup_contributions(new_header, granularity)
+        old_bucket = rollup_bucket(granularity, old_header.get("CreatedAt")) if old else None
+        new_bucket = rollup_bucket(granularity, new_header.get("CreatedAt")) if new else None
+        if old_bucket == new_bucket:
+            deltas = _deltas(old, new)
+            if deltas:
+                result[new_bucket] = deltas
+            continue
+        if old:
+            result[old_bucket] = _deltas(old, {})
+        if new:
+            result[new_bucket] = new
+    return result
+
+
+def signature_bucket(bucket, signature):
+    """ROLLUP#SIG sort key for one signature within a rollup bucket"""
+    return f"{bucket}#{signature}"
+
+
+def _split_signatures(counters):
+    """(rollup-item counters, {signature: value}) from a contributions/deltas dict"""
+    rest = {}
+    signatures = {}
+    for attr, value in counters.items():
+        if attr.startswith(SIGNATURE_PREFIX):
+            signatures[attr[len(SIGNATURE_PREFIX):]] = value
+        else:
+            rest[attr] = value
+    return rest, signatures
+
+
+def rollup_ttl(bucket):
+    """ExpiresAt epoch for a rollup bucket"""
+    for prefix, _, ttl in ROLLUP_GRANULARITIES.values():
+        if bucket.startswith(prefix):
+            return _epoch() + ttl
+    return None
+
+
+def _counter_update(bucket, deltas, extra_set=None, aggregate_key=STATS_KEY):
+    """update_item parameters adding `deltas` (and setting `extra_set`) on one aggregate item"""
+    names = {}
+    values = {}
+    adds = []
+    for i, (attr, delta) in enumerate(deltas.items()):
+        names[f"#c{i}"] = attr
+        values[f":d{i}"] = delta
+        adds.append(f"#c{i} :d{i}")
+
+    expression = "ADD " + ", ".join(adds)
+    if extra_set:
+        sets = []
+        for i, (attr, value) in enumerate(extra_set.items()):
+            names[f"#s{i}"] = attr
+            values[f":s{i}"] = value
+            sets.append(f"#s{i} = :s{i}")
+        expression = "SET " + ", ".join(sets) + " " + expression
+
+    return {
+        "Key": {"AggregateKey": aggregate_key, "Bucket": bucket},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+def change_updates(old_header, new_header):
+    """update_item parameters for every aggregate item one incident change touches"""
+    updates = []
+    deltas = counter_deltas(old_header, new_header)
+    if deltas:
+        updates.append(_counter_update(TOTAL_BUCKET, deltas, {"UpdatedAt": datetime.utcnow().isoformat() + "Z"}))
+
+    # Hourly arrivals only change when an incident is first inserted
+    if new_header and not old_header and new_header.get("CreatedAt"):
+        created = new_header["CreatedAt"]
+        expires = _epoch() + HOUR_BUCKET_TTL_SECONDS
+        updates.append(_counter_update(hour_bucket(created), {"Count": 1}, {"ExpiresAt": expires}))
+
+    # Rollups track the incident's current state, so TTL expiry is excluded upstream
+    for bucket, deltas in rollup_deltas(old_header, new_header).items():
+        counters, signatures = _split_signatures(deltas)
+        expires = {"ExpiresAt": rollup_ttl(bucket)}
+        if counters:
+            updates.append(_counter_update(bucket, counters, expires, ROLLUP_KEY))
+        for signature, delta in signatures.items():
+            updates.append(_counter_update(
+                signature_bucket(bucket, signature), {"Count": delta}, expires, SIGNATURE_ROLLUP_KEY
+            ))
+    return updates
+
+
+def _apply_once(event_id, updates):
+    marker = {
+        "Put": {
+            "TableName": AGGREGATE_TABLE_NAME,
+            "Item": {"AggregateKey": STREAM_KEY, "Bucket": event_id, "ExpiresAt": _epoch() + STREAM_MARKER_TTL_SECONDS},
+            "ConditionExpression": "attribute_not_exists(AggregateKey)",
+        }
+    }
+    actions = [marker] + [{"Update": {"TableName": AGGREGATE_TABLE_NAME, **update}} for update in updates]
+    client = dynamodb.meta.client
+    for attempt in range(1, TRANSACT_ATTEMPTS + 1):
+        try:
+            client.transact_write_items(TransactItems=actions)
+            return True
+        except client.exceptions.TransactionCanceledException as e:
+            codes = [reason.get("Code") for reason in e.response.get("CancellationReasons") or []]
+            if codes and codes[0] == "ConditionalCheckFailed":
+                print(f"[AGGREGATE] Stream record {event_id} already applied; skipping")
+                return False
+            if "TransactionConflict" not in codes or attempt == TRANSACT_ATTEMPTS:
+                raise
+            time.sleep(0.1 * attempt)
+
+
+def apply_incident_change(old_header, new_header, event_id=None):
+    """
+    Fold one incident insert/update/delete into the statistics counters.
+    With the stream record's `event_id` the deltas are applied at most
+    once; returns False for a record that was already applied.
+    """
+    updates = change_updates(old_header, new_header)
+    if event_id is None:
+        for update in updates:
+            aggregate_table.update_item(**update)
+        return True
+    return _apply_once(event_id, updates)
+
+
+def _epoch():
+    return int((datetime.utcnow() - datetime(1970, 1, 1)).total_seconds())
+
+
+def _query_all(query_kwargs):
+    items = []
+    while True:
+        response = aggregate_table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def get_rollups(granularity, start, end, signatures=False):
+    """
+    Rollup items of one granularity between two bucket labels (YYYY-MM-DD
+    for days, YYYY-MM-DDTHH for hours), inclusive and oldest first. With
+    `signatures` the per-signature counts are merged in as Signature#
+    attributes (one more paged query over ROLLUP#SIG).
+    """
+    prefix, length, _ = ROLLUP_GRANULARITIES[granularity]
+    low, high = prefix + start[:length], prefix + end[:length]
+    items = _query_all({
+        "KeyConditionExpression": Key("AggregateKey").eq(ROLLUP_KEY) & Key("Bucket").between(low, high),
+    })
+    if not signatures:
+        return items
+
+    by_bucket = {item["Bucket"]: item for item in items}
+    # "~" sorts after "#", so the upper bound covers every signature of the last bucket
+    for row in _query_all({
+        "KeyConditionExpression": Key("AggregateKey").eq(SIGNATURE_ROLLUP_KEY) & Key("Bucket").between(low, high + "~"),
+    }):
+        bucket, signature = row["Bucket"][:len(prefix) + length], row["Bucket"][len(prefix) + length + 1:]
+        item = by_bucket.get(bucket)
+        if item is None:
+            item = by_bucket[bucket] = {"AggregateKey": ROLLUP_KEY, "Bucket": bucket}
+        attr = SIGNATURE_PREFIX + signature
+        item[attr] = item.get(attr, 0) + row.get("Count", 0)
+    return [by_bucket[bucket] for bucket in sorted(by_bucket)]
+
+
+def get_daily_rollups(start_date, end_date, signatures=False):
+    """DAY# rollup items between two YYYY-MM-DD dates (inclusive), oldest first"""
+    return get_rollups("day", start_date, end_date, signatures)
+
+
+def rollup_counters(item, prefix):
+    """Breakdown counters of a rollup item, e.g. prefix "Severity#" -> {"HIGH": 3}"""
+    return {
+        attr[len(prefix):]: value
+        for attr, value in item.items()
+        if attr.startswith(prefix) and value > 0
+    }
+
+
+def rebuild_rollups(headers):
+    """Recompute every DAY# and (still-live) HOUR# rollup from incident headers"""
+    buckets = {}
+    hour_cutoff = rollup_bucket("hour", (datetime.utcnow() - timedelta(seconds=ROLLUP_GRANULARITIES["hour"][2])).isoformat())
+    for header in headers:
+        for granularity in ROLLUP_GRANULARITIES:
+            contributions = rollup_contributions(header, granularity)
+            if not contributions:
+                continue
+            bucket = rollup_bucket(granularity, header["CreatedAt"])
+            if granularity == "hour" and bucket < hour_cutoff:
+                continue
+            counters = buckets.setdefault(bucket, {})
+            for attr, value in contributions.items():
+                counters[attr] = counters.get(attr, 0) + value
+
+    signature_keys = set()
+    with aggregate_table.batch_writer() as batch:
+        for bucket, counters in buckets.items():
+            counters, signatures = _split_signatures(counters)
+            batch.put_item(Item={
+                "AggregateKey": ROLLUP_KEY,
+                "Bucket": bucket,
+                "ExpiresAt": rollup_ttl(bucket),
+                **counters,
+            })
+            for signature, count in signatures.items():
+                signature_keys.add(signature_bucket(bucket, signature))
+                batch.put_item(Item={
+                    "AggregateKey": SIGNATURE_ROLLUP_KEY,
+                    "Bucket": signature_bucket(bucket, signature),
+                    "Count": count,
+                    "ExpiresAt": rollup_ttl(bucket),
+                })
+        # Signature counts nothing contributes to any more
+        for row in _query_all({
+            "KeyConditionExpression": Key("AggregateKey").eq(SIGNATURE_ROLLUP_KEY),
+            "ProjectionExpression": "#b",
+            "ExpressionAttributeNames": {"#b": "Bucket"},
+        }):
+            if row["Bucket"] not in signature_keys:
+                batch.delete_item(Key={"AggregateKey": SIGNATURE_ROLLUP_KEY, "Bucket": row["Bucket"]})
+    print(f"[AGGREGATE] Rebuilt {len(buckets)} rollup bucket(s), {len(signature_keys)} signature count(s)")
+    return len(buckets)
+
+
+def get_statistics_counters():
+    """
+    Return the running counters as plain dicts plus the last-24h count.
+    Costs one get_item and one query over at most 25 hourly buckets.
+    """
+    item = aggregate_table.get_item(
+        Key={"AggregateKey": STATS_KEY, "Bucket": TOTAL_BUCKET}
+    ).get("Item", {})
+
+    severity_counts = {sev: int(item.get(f"Severity#{sev}", 0)) for sev in SEVERITIES}
+    status_counts = {status: int(item.get(f"Status#{status}", 0)) for status in STATUSES}
+    tag_counts = {
+        attr[len("Tag#"):]: int(value)
+        for attr, value in item.items()
+        if attr.startswith("Tag#") and value > 0
+    }
+
+    now = datetime.utcnow()
+    window_start = hour_bucket((now - timedelta(hours=23)).isoformat())
+    response = aggregate_table.query(
+        KeyConditionExpression=Key("AggregateKey").eq(STATS_KEY)
+        & Key("Bucket").between(window_start, hour_bucket(now.isoformat())),
+    )
+    incidents_24h = sum(int(row.get("Count", 0)) for row in response.get("Items", []))
+
+    return {
+        "totalIncidents": int(item.get("TotalIncidents", 0)),
+        "remediationEligible": int(item.get("RemediationEligible", 0)),
+        "incidents24h": incidents_24h,
+        "severityCounts": severity_counts,
+        "statusCounts": status_counts,
+        "tagCounts": tag_counts,
+        "updatedAt": item.get("UpdatedAt"),
+    }
+
+
+def rebuild_statistics(headers):
+    """
+    Recompute STATS/TOTAL and the recent hourly buckets from an iterable of
+    incident headers, replacing whatever the stream processor accumulated.
+    """
+    totals = {}
+    hours = {}
+    cutoff = hour_bucket((datetime.utcnow() - timedelta(hours=24)).isoformat())
+    for header in headers:
+        for attr, value in counter_contributions(header).items():
+            totals[attr] = totals.get(attr, 0) + value
+        bucket = hour_bucket(header.get("CreatedAt"))
+        if bucket >= cutoff:
+            hours[bucket] = hours.get(bucket, 0) + 1
+
+    now = datetime.utcnow()
+    expires = int((now - datetime(1970, 1, 1)).total_seconds()) + HOUR_BUCKET_TTL_SECONDS
+    aggregate_table.put_item(Item={
+        "AggregateKey": STATS_KEY,
+        "Bucket": TOTAL_BUCKET,
+        "UpdatedAt": now.isoformat() + "Z",
+        **totals,
+    })
+    for bucket, count in hours.items():
+        aggregate_table.put_item(Item={
+            "AggregateKey": STATS_KEY,
+            "Bucket": bucket,
+            "Count": count,
+            "ExpiresAt": expires,
+        })
+    print(f"[AGGREGATE] Rebuilt statistics from {totals.get('TotalIncidents', 0)} incident(s)")
+    return totals
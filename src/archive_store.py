@@ -0,0 +1,128 @@
+"""
+RCRA Incident Archive
+Cold storage for incidents that DynamoDB TTL has expired from the hot tables
+
+Expired incidents are written as gzip-compressed JSON Lines objects under
+date partitions (incidents/dt=YYYY-MM-DD/...) in ARCHIVE_BUCKET, or under
+ARCHIVE_LOCAL_DIR when running locally. read_archived() streams them back
+for historical queries.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import boto3
+
+ARCHIVE_BUCKET = os.environ.get("ARCHIVE_BUCKET")
+ARCHIVE_LOCAL_DIR = os.environ.get("ARCHIVE_LOCAL_DIR")
+ARCHIVE_PREFIX = os.environ.get("ARCHIVE_PREFIX", "incidents")
+
+s3 = boto3.client("s3") if ARCHIVE_BUCKET else None
+
+# Largest date range a single archive read may cover
+MAX_READ_DAYS = 92
+
+
+def _json_default(obj):
+    """Serialize DynamoDB Decimal values in archived records"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def partition_prefix(date_str):
+    """Key prefix of the partition holding incidents created on date_str"""
+    return f"{ARCHIVE_PREFIX}/dt={date_str}/"
+
+
+def _write_object(key, body):
+    if ARCHIVE_LOCAL_DIR:
+        path = os.path.join(ARCHIVE_LOCAL_DIR, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+    elif s3:
+        s3.put_object(
+            Bucket=ARCHIVE_BUCKET,
+            Key=key,
+            Body=body,
+            ContentType="application/x-ndjson",
+            ContentEncoding="gzip",
+        )
+    else:
+        raise RuntimeError("No archive destination configured (ARCHIVE_BUCKET or ARCHIVE_LOCAL_DIR)")
+
+
+def _list_keys(prefix):
+    if ARCHIVE_LOCAL_DIR:
+        directory = os.path.join(ARCHIVE_LOCAL_DIR, prefix)
+        if not os.path.isdir(directory):
+            return []
+        return [prefix + name for name in sorted(os.listdir(directory))]
+    if not s3:
+        return []
+    keys = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=ARCHIVE_BUCKET, Prefix=prefix):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+
+def _read_object(key):
+    if ARCHIVE_LOCAL_DIR:
+        with open(os.path.join(ARCHIVE_LOCAL_DIR, key), "rb") as f:
+            return f.read()
+    return s3.get_object(Bucket=ARCHIVE_BUCKET, Key=key)["Body"].read()
+
+
+def archive_incidents(incidents):
+    """
+    Write incidents to their date partitions, one compressed JSONL object
+    per partition per call. Returns the list of object keys written.
+    """
+    partitions = {}
+    for incident in incidents:
+        date_str = (incident.get("CreatedAt") or "unknown")[:10]
+        partitions.setdefault(date_str, []).append(incident)
+
+    keys = []
+    for date_str, records in sorted(partitions.items()):
+        lines = "".join(
+            json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+            for record in records
+        )
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        key = f"{partition_prefix(date_str)}{stamp}-{uuid4().hex[:8]}.jsonl.gz"
+        _write_object(key, gzip.compress(lines.encode("utf-8")))
+        keys.append(key)
+        print(f"[ARCHIVE] Wrote {len(records)} incident(s) to {key}")
+    return keys
+
+
+def read_archived(start_date, end_date, predicate=None):
+    """
+    Yield archived incidents created between start_date and end_date
+    (inclusive, YYYY-MM-DD), newest partition first. predicate, if given,
+    is called with each record and filters the stream.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    if end < start:
+        start, end = end, start
+    if (end - start).days + 1 > MAX_READ_DAYS:
+        raise ValueError(f"Archive reads are limited to {MAX_READ_DAYS} days per request")
+
+    day = end
+    while day >= start:
+        for key in _list_keys(partition_prefix(day.isoformat())):
+            for line in gzip.decompress(_read_object(key)).decode("utf-8").splitlines():
+                if not line:
+                    continue
+                record = json.loads(line)
+                if predicate is None or predicate(record):
+                    yield record
+        day -= timedelta(days=1)
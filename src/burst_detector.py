@@ -0,0 +1,284 @@
+"""
+RCRA Burst Detector
+Online arrival-rate anomaly detection per error signature and log group
+
+Every incident updates two small state items in RCRAAggregateTable, one
+for its "<LogGroup>#<ErrorSignature>" signature and one for its log
+group. Each item holds:
+
+- Fast / Slow   exponentially decayed arrival counts with FAST_HALF_LIFE
+                and BASELINE_HALF_LIFE; divided by their time constants
+                they are the current and baseline rates
+- Cusum         a Poisson CUSUM statistic testing "rate has jumped to
+                BURST_RATIO x baseline"; each arrival adds
+                ln(ratio) - (rate1 - rate0) * gap and it never drops below 0
+- LastAt        epoch seconds of the last arrival, so any later reader can
+                decay the state to "now" without history
+
+A key is bursting while its CUSUM, decayed to now, is at least
+CUSUM_THRESHOLD. Bursting keys also get a BURST_ACTIVE pointer item
+(TTL'd at the time the burst would fade) so "spiking now" is one small
+query. Updates are O(1) per incident and come from the incident stream;
+the remediator evaluates the same state with the incoming incident
+applied, before it is persisted.
+"""
+
+import math
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Key
+
+import incident_store
+from aggregate_store import aggregate_table
+
+BURST_KEY = "BURST"
+ACTIVE_KEY = "BURST_ACTIVE"
+SIGNATURE_PREFIX = "SIG#"
+LOG_GROUP_PREFIX = "LOG#"
+
+FAST_HALF_LIFE_SECONDS = 3600
+BASELINE_HALF_LIFE_SECONDS = 24 * 3600
+
+# Baseline never assumed below one incident per day
+MIN_BASELINE_PER_SECOND = 1.0 / (24 * 3600)
+
+# Alternative hypothesis of the CUSUM: rate jumped to this multiple of baseline
+BURST_RATIO = 4.0
+CUSUM_THRESHOLD = 2.0
+
+# Idle keys are forgotten after this long
+STATE_TTL_SECONDS = 30 * 24 * 3600
+
+# Optimistic-concurrency retries for one state item
+MAX_WRITE_ATTEMPTS = 3
+
+STATE_FIELDS = ("Fast", "Slow", "Cusum", "LastAt", "Count", "BurstStartedAt")
+
+_FAST_TAU = FAST_HALF_LIFE_SECONDS / math.log(2)
+_SLOW_TAU = BASELINE_HALF_LIFE_SECONDS / math.log(2)
+
+
+def _epoch(timestamp):
+    """
+    Epoch seconds of an ISO timestamp (naive timestamps are UTC), at the
+    millisecond precision LastAt is stored with so replays compare equal
+    """
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp(), 3)
+
+
+def _rates(slow):
+    """(baseline rate, burst rate) per second for a baseline count"""
+    baseline = max(slow / _SLOW_TAU, MIN_BASELINE_PER_SECOND)
+    return baseline, baseline * BURST_RATIO
+
+
+def observe(state, at):
+    """State after one arrival at epoch `at`; arrivals at or before LastAt are ignored"""
+    last = state.get("LastAt")
+    if last is not None and at <= last:
+        return state
+
+    gap = at - last if last is not None else 0.0
+    fast = state.get("Fast", 0.0) * math.exp(-gap / _FAST_TAU)
+    slow = state.get("Slow", 0.0) * math.exp(-gap / _SLOW_TAU)
+
+    # Log-likelihood ratio of the quiet gap and this arrival, against the
+    # baseline as it stood at the previous arrival
+    baseline, burst = _rates(state.get("Slow", 0.0))
+    cusum = max(0.0, state.get("Cusum", 0.0) - (burst - baseline) * gap) + math.log(BURST_RATIO)
+
+    new_state = {
+        "Fast": fast + 1,
+        "Slow": slow + 1,
+        "Cusum": cusum,
+        "LastAt": at,
+        "Count": state.get("Count", 0) + 1,
+        "BurstStartedAt": state.get("BurstStartedAt"),
+    }
+    if cusum >= CUSUM_THRESHOLD:
+        new_state["BurstStartedAt"] = new_state["BurstStartedAt"] or at
+    else:
+        new_state["BurstStartedAt"] = None
+    return new_state
+
+
+def assess(state, now=None):
+    """
+    Current view of a state decayed to `now`: ratePerHour,
+    baselinePerHour, score (CUSUM), bursting, activeUntil and count.
+    """
+    now = now or time.time()
+    last = state.get("LastAt")
+    if last is None:
+        return {"ratePerHour": 0.0, "baselinePerHour": 0.0, "score": 0.0, "bursting": False,
+                "activeUntil": None, "burstStartedAt": None, "count": 0, "recentCount": 0}
+
+    gap = max(now - last, 0.0)
+    fast = state.get("Fast", 0.0) * math.exp(-gap / _FAST_TAU)
+    slow = state.get("Slow", 0.0) * math.exp(-gap / _SLOW_TAU)
+    baseline, burst = _rates(state.get("Slow", 0.0))
+    score = max(0.0, state.get("Cusum", 0.0) - (burst - baseline) * gap)
+    active_until = last + (state.get("Cusum", 0.0) - CUSUM_THRESHOLD) / (burst - baseline)
+    return {
+        "ratePerHour": round(fast / _FAST_TAU * 3600, 3),
+        "baselinePerHour": round(max(slow / _SLOW_TAU, MIN_BASELINE_PER_SECOND) * 3600, 3),
+        "score": round(score, 3),
+        "bursting": score >= CUSUM_THRESHOLD,
+        "activeUntil": int(active_until) if score >= CUSUM_THRESHOLD else None,
+        "burstStartedAt": int(state["BurstStartedAt"]) if state.get("BurstStartedAt") else None,
+        "count": int(state.get("Count", 0)),
+        # Roughly the incidents of the last day (decayed with the baseline half-life)
+        "recentCount": int(round(slow)),
+    }
+
+
+def state_keys(log_group, error_signature):
+    """{bucket: (kind, name)} of the state items an incident updates"""
+    keys = {LOG_GROUP_PREFIX + (log_group or ""): ("logGroup", log_group or "")}
+    if error_signature:
+        signature = incident_store.signature_key(log_group, error_signature)
+        keys[SIGNATURE_PREFIX + signature] = ("signature", error_signature)
+    return keys
+
+
+def _from_item(item):
+    state = {}
+    for field in STATE_FIELDS:
+        if item.get(field) is not None:
+            state[field] = float(item[field]) if field != "Count" else int(item[field])
+    return state
+
+
+def _decimal(value):
+    return Decimal(str(round(value, 3)))
+
+
+def load_states(buckets):
+    """{bucket: state} for BURST state items (missing ones are empty)"""
+    states = {bucket: {} for bucket in buckets}
+    for bucket in buckets:
+        item = aggregate_table.get_item(Key={"AggregateKey": BURST_KEY, "Bucket": bucket}).get("Item")
+        if item:
+            states[bucket] = _from_item(item)
+    return states
+
+
+def _save(bucket, kind, name, log_group, previous, state):
+    """Write one state item unless another writer moved it; returns False on conflict"""
+    item = {
+        "AggregateKey": BURST_KEY,
+        "Bucket": bucket,
+        "Kind": kind,
+        "Name": name,
+        "LogGroup": log_group or "",
+        "ExpiresAt": int(state["LastAt"]) + STATE_TTL_SECONDS,
+    }
+    for field in STATE_FIELDS:
+        if state.get(field) is not None:
+            item[field] = state[field] if field == "Count" else _decimal(state[field])
+
+    if previous.get("LastAt") is None:
+        condition = {"ConditionExpression": "attribute_not_exists(LastAt)"}
+    else:
+        condition = {
+            "ConditionExpression": "LastAt = :prev",
+            "ExpressionAttributeValues": {":prev": _decimal(previous["LastAt"])},
+        }
+    try:
+        aggregate_table.put_item(Item=item, **condition)
+    except aggregate_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+    view = assess(state, state["LastAt"])
+    pointer_key = {"AggregateKey": ACTIVE_KEY, "Bucket": bucket}
+    if view["bursting"]:
+        aggregate_table.put_item(Item={
+            **item,
+            **pointer_key,
+            "ActiveUntil": view["activeUntil"],
+            "ExpiresAt": view["activeUntil"] + 3600,
+        })
+    elif previous.get("BurstStartedAt"):
+        aggregate_table.delete_item(Key=pointer_key)
+    return True
+
+
+def record_incidents(headers):
+    """
+    Apply incident arrivals (headers with CreatedAt) to their signature and
+    log-group states: one read and one write per distinct key per batch.
+    Returns the number of keys updated.
+    """
+    arrivals = {}
+    for header in headers:
+        if not header.get("CreatedAt"):
+            continue
+        at = _epoch(header["CreatedAt"])
+        log_group = header.get("LogGroup")
+        for bucket, (kind, name) in state_keys(log_group, header.get("ErrorSignature")).items():
+            arrivals.setdefault(bucket, (kind, name, log_group, []))[3].append(at)
+
+    updated = 0
+    for bucket, (kind, name, log_group, times) in arrivals.items():
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            previous = load_states([bucket])[bucket]
+            state = previous
+            for at in sorted(times):
+                state = observe(state, at)
+            if state is previous or _save(bucket, kind, name, log_group, previous, state):
+                break
+        else:
+            print(f"[BURST] Gave up updating {bucket} after {MAX_WRITE_ATTEMPTS} conflicting writes")
+            continue
+        if state is not previous:
+            updated += 1
+    return updated
+
+
+def evaluate_incident(log_group, error_signature, at=None):
+    """
+    Burst view for an incoming incident, as if it had already been
+    recorded (nothing is written). Returns {"signature", "logGroup",
+    "bursting"}.
+    """
+    at = at or time.time()
+    keys = state_keys(log_group, error_signature)
+    states = load_states(list(keys))
+    views = {}
+    for bucket, (kind, _) in keys.items():
+        views[kind] = assess(observe(states[bucket], at), at)
+    views.setdefault("signature", None)
+    views["bursting"] = any(view and view["bursting"] for view in (views["signature"], views["logGroup"]))
+    return views
+
+
+def active_bursts(now=None):
+    """Keys spiking right now, highest score first"""
+    now = now or time.time()
+    items = []
+    query_kwargs = {"KeyConditionExpression": Key("AggregateKey").eq(ACTIVE_KEY)}
+    while True:
+        response = aggregate_table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    bursts = []
+    for item in items:
+        view = assess(_from_item(item), now)
+        if not view["bursting"]:
+            continue
+        bursts.append({
+            "kind": item.get("Kind"),
+            "name": item.get("Name"),
+            "logGroup": item.get("LogGroup"),
+            **view,
+        })
+    bursts.sort(key=lambda burst: burst["score"], reverse=True)
+    return bursts
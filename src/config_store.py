@@ -0,0 +1,181 @@
+"""
+RCRA Configuration Store
+Typed, cached and versioned access to configuration kept in RCRAConfigTable
+
+Configuration used to live next to incidents as CONFIG_* rows, which every
+incident scan had to read and discard. It now has its own table keyed by
+ConfigKey; each write bumps a Version attribute under a conditional check
+so concurrent dashboard edits cannot silently overwrite each other.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource("dynamodb")
+
+CONFIG_TABLE_NAME = os.environ.get("CONFIG_TABLE_NAME", "RCRAConfigTable")
+config_table = dynamodb.Table(CONFIG_TABLE_NAME)
+
+# Seconds a warm Lambda container reuses a config value before re-reading it
+CACHE_TTL_SECONDS = int(os.environ.get("CONFIG_CACHE_TTL_SECONDS", "30"))
+
+CRITICAL_FUNCTIONS = "CRITICAL_FUNCTIONS"
+AUTO_REMEDIATION = "AUTO_REMEDIATION"
+
+# Default config - scenarios that auto-remediate by default
+DEFAULT_AUTO_REMEDIATION = {
+    "lambdaTimeout": True,
+    "outOfMemory": True,
+    "throttling": False,
+    "connectionPool": False,
+    "cacheCorruption": False,
+    "healthCheck": False,
+    "diskFull": False,
+    "authFailure": False,
+    "dependencyTimeout": False,
+    "dlqEscalation": False
+}
+
+# Legacy CONFIG_* rows in the incident table, used by migrate_legacy_config
+LEGACY_KEYS = {
+    CRITICAL_FUNCTIONS: ("CONFIG_CRITICAL_FUNCTIONS", "functions"),
+    AUTO_REMEDIATION: ("CONFIG_AUTO_REMEDIATION", "scenarios"),
+}
+
+MAX_WRITE_ATTEMPTS = 3
+
+_cache = {}
+
+
+class ConfigVersionConflict(Exception):
+    """Raised when a versioned write loses the race to another writer"""
+
+
+def _coerce_functions(value):
+    """Critical functions are a de-duplicated list of function names"""
+    functions = []
+    for name in value or []:
+        name = str(name).strip()
+        if name and name not in functions:
+            functions.append(name)
+    return functions
+
+
+def _coerce_scenarios(value):
+    """Merge saved scenario flags over the defaults, forcing booleans"""
+    merged = dict(DEFAULT_AUTO_REMEDIATION)
+    for scenario, enabled in (value or {}).items():
+        merged[str(scenario)] = bool(enabled)
+    return merged
+
+
+COERCERS = {
+    CRITICAL_FUNCTIONS: _coerce_functions,
+    AUTO_REMEDIATION: _coerce_scenarios,
+}
+
+
+def get_config(config_key, use_cache=True):
+    """
+    Return {"value", "version", "updatedAt"} for a config key.
+    Missing keys resolve to their typed default at version 0.
+    """
+    cached = _cache.get(config_key)
+    if use_cache and cached and time.time() - cached[0] < CACHE_TTL_SECONDS:
+        return cached[1]
+
+    response = config_table.get_item(Key={"ConfigKey": config_key}, ConsistentRead=not use_cache)
+    item = response.get("Item", {})
+    record = {
+        "value": COERCERS[config_key](item.get("Value")),
+        "version": int(item.get("Version", 0)),
+        "updatedAt": item.get("UpdatedAt"),
+    }
+    _cache[config_key] = (time.time(), record)
+    return record
+
+
+def put_config(config_key, value, expected_version=None):
+    """
+    Write a config value. With expected_version the write only succeeds if
+    the stored version still matches; raises ConfigVersionConflict otherwise.
+    """
+    if expected_version is None:
+        expected_version = get_config(config_key, use_cache=False)["version"]
+
+    value = COERCERS[config_key](value)
+    record = {
+        "value": value,
+        "version": expected_version + 1,
+        "updatedAt": datetime.utcnow().isoformat() + "Z",
+    }
+
+    condition = "attribute_not_exists(ConfigKey)" if expected_version == 0 else "Version = :expected"
+    put_kwargs = {
+        "Item": {
+            "ConfigKey": config_key,
+            "Value": value,
+            "Version": record["version"],
+            "UpdatedAt": record["updatedAt"],
+        },
+        "ConditionExpression": condition,
+    }
+    if expected_version:
+        put_kwargs["ExpressionAttributeValues"] = {":expected": expected_version}
+
+    try:
+        config_table.put_item(**put_kwargs)
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            _cache.pop(config_key, None)
+            raise ConfigVersionConflict(
+                f"{config_key} changed since version {expected_version}; reload and retry"
+            )
+        raise
+
+    _cache[config_key] = (time.time(), record)
+    return record
+
+
+def modify_config(config_key, change):
+    """Read-modify-write a config value, retrying on version conflicts"""
+    for attempt in range(MAX_WRITE_ATTEMPTS):
+        current = get_config(config_key, use_cache=False)
+        try:
+            return put_config(config_key, change(current["value"]), current["version"])
+        except ConfigVersionConflict:
+            if attempt == MAX_WRITE_ATTEMPTS - 1:
+                raise
+            print(f"[CONFIG] Version conflict on {config_key}, retrying")
+
+
+def get_critical_functions():
+    """List of function names that always require manual approval"""
+    return get_config(CRITICAL_FUNCTIONS)["value"]
+
+
+def get_auto_remediation_scenarios():
+    """Scenario name -> auto-remediation enabled flag, defaults applied"""
+    return get_config(AUTO_REMEDIATION)["value"]
+
+
+def migrate_legacy_config(incident_table):
+    """
+    Move CONFIG_* rows out of the incident table into RCRAConfigTable.
+    Keys already present in the config table are left as they are.
+    """
+    migrated = []
+    for config_key, (legacy_id, legacy_attr) in LEGACY_KEYS.items():
+        legacy = incident_table.get_item(Key={"IncidentId": legacy_id}).get("Item")
+        if not legacy:
+            continue
+        if get_config(config_key, use_cache=False)["version"] == 0:
+            put_config(config_key, legacy.get(legacy_attr), expected_version=0)
+            migrated.append(config_key)
+        incident_table.delete_item(Key={"IncidentId": legacy_id})
+    print(f"[CONFIG] Migrated legacy config rows: {migrated}")
+    return migrated
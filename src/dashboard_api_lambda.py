@@ -1,17 +1,30 @@
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 
-dynamodb = boto3.resource("dynamodb")
-table_name = os.environ.get("TABLE_NAME", "RCRARootCauseTable")
-table = dynamodb.Table(table_name)
+import aggregate_store
+import archive_store
+import burst_detector
+import config_store
+import incident_store
+import log_viewer
+import predictive_analysis
+import remediation_actions
+import remediation_jobs
+import response_cache
+import similarity_index
+
 topic_arn = os.environ.get("TOPIC_ARN")
 sns = boto3.client("sns") if topic_arn else None
-logs_client = boto3.client("logs")
+
+# wss:// URL of the live-updates WebSocket API, handed to dashboards on request
+websocket_url = os.environ.get("WEBSOCKET_URL")
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -25,6 +38,46 @@ class DecimalEncoder(json.JSONEncoder):
 
 lambda_client = boto3.client("lambda")
 
+# Header attributes each read path needs; sent as ProjectionExpressions so
+# DynamoDB only returns what the endpoint actually puts in its response
+LIST_ATTRIBUTES = [
+    "IncidentId", "TicketNumber", "Status", "ResolvedAt", "ResolvedBy", "CreatedAt",
+    "LogGroup", "LogStream", "RawPreview", "Summary", "Severity", "RootCause", "Tags",
+    "RemediationEligible", "RemediationAction", "ErrorSignature", "UpdatedAt",
+]
+RECENT_ATTRIBUTES = [
+    "IncidentId", "TicketNumber", "Status", "CreatedAt", "Summary", "Severity",
+    "RemediationAction", "RemediationEligible",
+]
+OCCURRENCE_ATTRIBUTES = ["IncidentId", "TicketNumber", "Status", "CreatedAt", "Summary"]
+LOG_ATTRIBUTES = ["IncidentId", "LogGroup", "LogStream", "CreatedAt"]
+# Related incidents shown on the detail view
+RELATED_LIMIT = 10
+
+# Bursting signatures/log groups listed under "spiking now"
+SPIKING_LIMIT = 10
+
+NOTIFY_ATTRIBUTES = ["IncidentId", "TicketNumber", "Status", "Severity", "Summary", "RemediationAction", "CreatedAt"]
+
+# Largest incident list one batch remediation may act on
+MAX_BATCH_INCIDENTS = 100
+
+# Largest incident set one bulk status change may act on
+MAX_BULK_INCIDENTS = 1000
+
+# Statuses a bulk status change may move incidents to
+BULK_STATUSES = ("OPEN", "IN_PROGRESS", "RESOLVED")
+
+# Lambda functions remediated concurrently by a batch request
+REMEDIATION_CONCURRENCY = int(os.environ.get("REMEDIATION_CONCURRENCY", "8"))
+
+# Overall budget of a batch remediation job (below the worker's Lambda timeout);
+# functions still queued when it runs out fail fast instead of being cut off
+BATCH_DEADLINE_SECONDS = float(os.environ.get("BATCH_REMEDIATION_DEADLINE_SECONDS", "480"))
+
+# Incidents listed individually in a summary notification
+SUMMARY_NOTIFY_LIMIT = 50
+
 
 def cors_headers():
     """Return CORS headers for API responses"""
@@ -32,22 +85,47 @@ def cors_headers():
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token",
         "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+        "Access-Control-Expose-Headers": "ETag",
     }
 
 
+def request_header(event, name):
+    """Case-insensitive request header lookup (API Gateway v2 lowercases names)"""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def is_cacheable_route(http_method, path):
+    """Read-only routes whose responses only change when incidents change"""
+    if http_method != "GET":
+        return False
+    if path.endswith("/logs"):
+        return False
+    return (
+        path.endswith("/statistics") or path.endswith("/incidents") or "/incidents/" in path
+        or path.endswith("/search") or path.endswith("/trends")
+    )
+
+
+def is_clock_dependent_route(path):
+    """Cacheable routes whose output also changes with the clock (no ETag, max-age only)"""
+    return path.endswith("/statistics") or path.endswith("/trends")
+
+
 def publish_stage_notification(stage, item, status, details=""):
     """Publish an SNS notification for a ticket stage transition"""
     if not sns or not topic_arn:
         return
 
-    incident_id = item.get("IncidentId")
-    ticket = item.get("TicketNumber", "N/A")
-    analysis = item.get("AnalysisResult", {})
-    remediation = item.get("RemediationResult", {})
+    header = incident_store.as_header(item)
+    incident_id = header.get("IncidentId")
+    ticket = header.get("TicketNumber", "N/A")
 
-    summary = analysis.get("summary", "No summary provided")
-    severity = analysis.get("severity", "UNKNOWN")
-    action_taken = remediation.get("remediationActionTaken", "N/A")
+    summary = header.get("Summary", "No summary provided")
+    severity = header.get("Severity", "UNKNOWN")
+    action_taken = header.get("RemediationAction", "N/A")
 
     subject = f"[RCRA] {stage}: {severity} - {incident_id}"
 
@@ -68,13 +146,53 @@ def publish_stage_notification(stage, item, status, details=""):
         print(f"[WARN] Failed to publish stage notification: {str(e)}")
 
 
+def publish_summary_notification(stage, items, statuses, details=""):
+    """Publish one SNS notification covering a bulk ticket transition"""
+    if not sns or not topic_arn or not items:
+        return
+
+    lines = []
+    for item in items[:SUMMARY_NOTIFY_LIMIT]:
+        header = incident_store.as_header(item)
+        incident_id = header.get("IncidentId")
+        lines.append(
+            f"- {incident_id} [{header.get('TicketNumber', 'N/A')}] "
+            f"{header.get('Severity', 'UNKNOWN')} -> {statuses.get(incident_id, 'N/A')}: "
+            f"{(header.get('Summary') or 'No summary provided')[:120]}"
+        )
+    if len(items) > SUMMARY_NOTIFY_LIMIT:
+        lines.append(f"... and {len(items) - SUMMARY_NOTIFY_LIMIT} more")
+
+    subject = f"[RCRA] {stage}: {len(items)} incidents"
+
+    message = (
+        f"Incidents: {len(items)}\n"
+        f"Details: {details}\n"
+        f"Timestamp: {datetime.utcnow().isoformat()}Z\n"
+        f"\n" + "\n".join(lines) + "\n"
+    )
+
+    try:
+        sns.publish(TopicArn=topic_arn, Subject=subject, Message=message)
+    except Exception as e:
+        print(f"[WARN] Failed to publish summary notification: {str(e)}")
+
+
 def handler(event, context):
     """
     API Gateway Lambda handler for RCRA Dashboard
     Routes:
     - GET /incidents - List all incidents with pagination
+    - GET /incidents/changes?since=<cursor> - Incidents created/updated since a cursor
     - GET /incidents/{id} - Get specific incident details
     - GET /statistics - Get system statistics
+    - GET /archive/incidents - Query incidents archived after TTL expiry
+    - GET /live-updates - WebSocket URL for pushed incident changes
+    - GET /search?q= - Ranked full-text incident search
+    - GET /trends - Daily/hourly incident counts from rollups
+    - POST /remediate/batch - Approve and remediate many incidents at once (as a job)
+    - GET /remediation-jobs/{id} - Progress and result of a remediation job
+    - POST /incidents/bulk-status - Resolve or move many incidents by id list or selector
     """
 
     # Support both API Gateway v1 and v2 formats
@@ -95,9 +213,39 @@ def handler(event, context):
             "body": json.dumps({"message": "OK"}),
         }
 
+    # Serve polling requests from the response cache / 304 when nothing changed
+    cache_key = None
+    etag = None
+    generation = response_cache.current_generation() if is_cacheable_route(http_method, path) else None
+    if generation is not None:
+        cache_key = response_cache.cache_key(path, query_parameters)
+        if not is_clock_dependent_route(path):
+            etag = response_cache.etag_for(cache_key, generation)
+        if_none_match = request_header(event, "If-None-Match") or ""
+        if etag and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return {
+                "statusCode": 304,
+                "headers": {**cors_headers(), **response_cache.cache_headers(etag)},
+                "body": "",
+            }
+        cached_body = response_cache.get(cache_key, generation)
+        if cached_body is not None:
+            return {
+                "statusCode": 200,
+                "headers": {**cors_headers(), "Content-Type": "application/json", **response_cache.cache_headers(etag)},
+                "body": cached_body,
+            }
+
     try:
         # Route to appropriate handler
-        if path == "/incidents" or path.endswith("/incidents"):
+        if path == "/archive/incidents" or path.endswith("/archive/incidents"):
+            response_data = get_archived_incidents(query_parameters)
+        elif path == "/incidents/changes" or path.endswith("/incidents/changes"):
+            response_data = get_incident_changes(query_parameters)
+        elif path.endswith("/incidents/bulk-status") and http_method == "POST":
+            body = json.loads(event.get("body", "{}"))
+            response_data = bulk_update_status(body)
+        elif path == "/incidents" or path.endswith("/incidents"):
             response_data = get_incidents(query_parameters)
         elif "/incidents/" in path and path_parameters.get("id"):
             if path.endswith("/logs"):
@@ -106,8 +254,19 @@ def handler(event, context):
                 response_data = get_incident_by_id(path_parameters["id"])
         elif path == "/statistics" or path.endswith("/statistics"):
             response_data = get_statistics()
+        elif path == "/trends" or path.endswith("/trends"):
+            response_data = get_trends(query_parameters)
+        elif path == "/search" or path.endswith("/search"):
+            response_data = search_incidents(query_parameters)
+        elif path == "/live-updates" or path.endswith("/live-updates"):
+            response_data = {"enabled": bool(websocket_url), "url": websocket_url}
         elif path == "/trigger-error" or path.endswith("/trigger-error"):
             response_data = trigger_dummy_error(query_parameters)
+        elif "/remediation-jobs/" in path and path_parameters.get("id"):
+            response_data = get_remediation_job(path_parameters["id"])
+        elif path.endswith("/remediate/batch") and http_method == "POST":
+            body = json.loads(event.get("body", "{}"))
+            response_data = batch_remediate(body)
         elif (path == "/remediate" or path.endswith("/remediate")) and http_method == "POST":
             body = json.loads(event.get("body", "{}"))
             response_data = trigger_remediation(body)
@@ -150,7 +309,7 @@ def handler(event, context):
                 }
         elif path == "/predictive-analysis" or path.endswith("/predictive-analysis"):
             if http_method == "GET":
-                response_data = get_predictive_analysis()
+                response_data = get_predictive_analysis(query_parameters)
             else:
                 return {
                     "statusCode": 405,
@@ -164,10 +323,20 @@ def handler(event, context):
                 "body": json.dumps({"error": "Route not found"}),
             }
 
+        body = json.dumps(response_data, cls=DecimalEncoder)
+        headers = {**cors_headers(), "Content-Type": "application/json"}
+
+        if cache_key and "error" not in response_data:
+            response_cache.put(cache_key, generation, body)
+            headers.update(response_cache.cache_headers(etag))
+        elif http_method == "POST" and response_data.get("success"):
+            # Incident/config writes make every cached response stale
+            response_cache.invalidate()
+
         return {
             "statusCode": 200,
-            "headers": {**cors_headers(), "Content-Type": "application/json"},
-            "body": json.dumps(response_data, cls=DecimalEncoder),
+            "headers": headers,
+            "body": body,
         }
 
     except Exception as e:
@@ -179,76 +348,195 @@ def handler(event, context):
         }
 
 
+def list_param(query_params, name):
+    """Comma-separated query parameter as a list of upper-cased values"""
+    value = query_params.get(name) or ""
+    return [part.strip().upper() for part in value.split(",") if part.strip()]
+
+
 def get_incidents(query_params):
-    """Get list of incidents with optional filtering and pagination"""
-    limit = int(query_params.get("limit", 50))
-    last_key = query_params.get("lastKey")
+    """
+    Get list of incidents with optional filtering, search, sorting and pagination.
+    Query parameters: status, severity (comma-separated), logGroup, from, to
+    (ISO dates/timestamps on creation time), tag, q (free text over summary
+    and tags), sort (newest|oldest|severity), limit, lastKey.
+    """
+    limit = min(int(query_params.get("limit", 50)), 200)
+    last_key = query_params.get("lastKey")  # Opaque continuation token
+    sort = query_params.get("sort", "newest")
+    if sort not in ("newest", "oldest", "severity"):
+        return {"error": "sort must be one of newest, oldest, severity"}
+
+    filters = {
+        "status": list_param(query_params, "status"),
+        "severity": list_param(query_params, "severity"),
+        "logGroup": query_params.get("logGroup"),
+        "since": query_params.get("from"),
+        "until": query_params.get("to"),
+        "tag": query_params.get("tag"),
+        "q": query_params.get("q"),
+    }
 
-    scan_kwargs = {"Limit": limit}
+    # Taken before the read so the first delta poll cannot miss a concurrent write
+    cursor = incident_store.change_cursor()
 
-    if last_key:
-        scan_kwargs["ExclusiveStartKey"] = {"IncidentId": last_key}
+    # Index-backed query: DayBucket/StatusDay/LogGroup GSIs or token postings
+    try:
+        items, next_token = incident_store.query_incidents(filters, sort, limit, last_key, LIST_ATTRIBUTES)
+    except ValueError as e:
+        return {"error": f"Invalid filter: {str(e)}"}
 
-    # Filter by severity if provided
-    severity = query_params.get("severity")
-    if severity:
-        scan_kwargs["FilterExpression"] = Attr("AnalysisResult.severity").eq(severity)
+    incidents = format_incident_list(items)
+
+    result = {
+        "incidents": incidents,
+        "count": len(incidents),
+        "lastKey": next_token,
+        "cursor": cursor,
+    }
 
-    response = table.scan(**scan_kwargs)
+    return result
 
-    items = response.get("Items", [])
-    
-    # Filter out configuration items (CONFIG_*)
-    items = [item for item in items if not item.get("IncidentId", "").startswith("CONFIG_")]
 
-    # Sort by CreatedAt descending
-    items.sort(key=lambda x: x.get("CreatedAt", ""), reverse=True)
+def search_incidents(query_params):
+    """Ranked full-text search over summaries, root causes, tags and raw messages"""
+    query = (query_params.get("q") or "").strip()
+    if not query:
+        return {"error": "q is required"}
+    limit = min(int(query_params.get("limit", 20)), 100)
+
+    hits, next_token = incident_store.search_incidents(
+        query,
+        since=query_params.get("from"),
+        until=query_params.get("to"),
+        limit=limit,
+        token=query_params.get("lastKey"),
+        attributes=LIST_ATTRIBUTES,
+    )
+
+    results = format_incident_list([header for header, _ in hits])
+    for result, (_, score) in zip(results, hits):
+        result["score"] = score
+
+    return {
+        "query": query,
+        "results": results,
+        "count": len(results),
+        "lastKey": next_token,
+    }
+
+
+def get_incident_changes(query_params):
+    """Incidents created or updated since a delta-sync cursor, plus the next cursor"""
+    since = query_params.get("since")
+    if not since:
+        return {"error": "since is required (use the cursor returned by /incidents)"}
+
+    limit = min(int(query_params.get("limit", 200)), 500)
+    try:
+        items, cursor, has_more = incident_store.list_changes(since, limit, LIST_ATTRIBUTES)
+    except incident_store.ResyncRequired as e:
+        return {"error": f"Resync required: {str(e)}", "resync": True}
+    except (ValueError, KeyError, TypeError):
+        return {"error": "Invalid cursor", "resync": True}
+
+    changes = format_incident_list(items)
+
+    return {
+        "changes": changes,
+        "count": len(changes),
+        "cursor": cursor,
+        "hasMore": has_more,
+    }
+
+
+def format_incident_list(items):
+    """Flatten header items into the list-view shape used by the dashboard"""
+    headers = [incident_store.as_header(item) for item in items]
+
+    # Occurrence counts for the whole page in one pass: one index query per distinct signature
+    error_counts = get_error_frequency_counts(headers)
 
     # Parse and flatten data for easier frontend consumption
     incidents = []
-    for item in items:
-        analysis = item.get("AnalysisResult", {})
-        remediation = item.get("RemediationResult", {})
-        
-        # Get error frequency for this signature
-        error_signature = item.get("ErrorSignature", "")
-        error_count = get_error_frequency_count(error_signature, item.get("LogGroup"))
+    for header in headers:
+        error_signature = header.get("ErrorSignature", "")
+        error_count = error_counts.get((error_signature, header.get("LogGroup")), 1)
         
         incident = {
-            "incidentId": item.get("IncidentId"),
-            "ticketNumber": item.get("TicketNumber", "N/A"),
-            "status": item.get("Status", "OPEN"),
-            "resolvedAt": item.get("ResolvedAt"),
-            "resolvedBy": item.get("ResolvedBy"),
-            "timestamp": item.get("CreatedAt"),
-            "logGroup": item.get("LogGroup"),
-            "logStream": item.get("LogStream"),
-            "rawMessage": item.get("RawLogMessage", "")[:200],  # Truncate for list view
-            "summary": analysis.get("summary", "N/A"),
-            "severity": analysis.get("severity", "UNKNOWN"),
-            "rootCause": analysis.get("probable_root_cause", "N/A"),
-            "tags": analysis.get("tags", []),
-            "remediationEligible": remediation.get("autoRemediationEligible", False),
-            "remediationAction": remediation.get("remediationActionTaken", "NONE"),
+            "incidentId": header.get("IncidentId"),
+            "ticketNumber": header.get("TicketNumber", "N/A"),
+            "status": header.get("Status", "OPEN"),
+            "resolvedAt": header.get("ResolvedAt"),
+            "resolvedBy": header.get("ResolvedBy"),
+            "timestamp": header.get("CreatedAt"),
+            "logGroup": header.get("LogGroup"),
+            "logStream": header.get("LogStream"),
+            "rawMessage": header.get("RawPreview", ""),  # Truncated for list view
+            "summary": header.get("Summary", "N/A"),
+            "severity": header.get("Severity", "UNKNOWN"),
+            "rootCause": header.get("RootCause", "N/A"),
+            "tags": header.get("Tags", []),
+            "remediationEligible": header.get("RemediationEligible", False),
+            "remediationAction": header.get("RemediationAction", "NONE"),
             "errorSignature": error_signature,
             "occurrenceCount": error_count,
         }
+        if header.get("UpdatedAt"):
+            incident["updatedAt"] = header["UpdatedAt"]
         incidents.append(incident)
 
-    result = {
-        "incidents": incidents,
-        "count": len(incidents),
-        "lastKey": response.get("LastEvaluatedKey", {}).get("IncidentId"),
-    }
+    return incidents
 
-    return result
+
+def get_archived_incidents(query_params):
+    """Query incidents that TTL has moved out of the hot table into the archive"""
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    end_date = query_params.get("to", today)
+    start_date = query_params.get("from", end_date)
+    limit = int(query_params.get("limit", 100))
+    severity = query_params.get("severity")
+    log_group = query_params.get("logGroup")
+
+    def matches(record):
+        header = incident_store.as_header(record)
+        if severity and header.get("Severity") != severity:
+            return False
+        if log_group and header.get("LogGroup") != log_group:
+            return False
+        return True
+
+    try:
+        incidents = []
+        for record in archive_store.read_archived(start_date, end_date, matches):
+            header = incident_store.as_header(record)
+            incidents.append({
+                "incidentId": header.get("IncidentId"),
+                "ticketNumber": header.get("TicketNumber", "N/A"),
+                "status": header.get("Status", "OPEN"),
+                "resolvedAt": header.get("ResolvedAt"),
+                "timestamp": header.get("CreatedAt"),
+                "logGroup": header.get("LogGroup"),
+                "summary": header.get("Summary", "N/A"),
+                "severity": header.get("Severity", "UNKNOWN"),
+                "rootCause": header.get("RootCause", "N/A"),
+                "tags": header.get("Tags", []),
+                "rawMessage": record.get("RawLogMessage") or header.get("RawPreview", ""),
+                "archived": True,
+            })
+            if len(incidents) >= limit:
+                break
+    except ValueError as e:
+        return {"error": str(e)}
+
+    incidents.sort(key=lambda x: x.get("timestamp") or "", reverse=True)
+    return {"incidents": incidents, "count": len(incidents), "from": start_date, "to": end_date}
 
 
 def get_incident_by_id(incident_id):
     """Get detailed information about a specific incident"""
-    response = table.get_item(Key={"IncidentId": incident_id})
-
-    item = response.get("Item")
+    # Only the detail view pays for the compressed raw log / analysis blob
+    item = incident_store.get_incident(incident_id)
     if not item:
         return {"error": "Incident not found"}
 
@@ -257,8 +545,10 @@ def get_incident_by_id(incident_id):
     remediation = item.get("RemediationResult", {})
     error_signature = item.get("ErrorSignature") or analysis.get("summary", "")[:100]
     log_group = item.get("LogGroup")
-    related = get_error_occurrences(error_signature, log_group)
-    related = [r for r in related if r.get("incidentId") != incident_id]
+    related = get_similar_incidents(item)
+    if related is None:
+        related = get_error_occurrences(item.get("ErrorSignature"), log_group)
+        related = [r for r in related if r.get("incidentId") != incident_id][:RELATED_LIMIT]
 
     incident_detail = {
         "incidentId": item.get("IncidentId"),
@@ -271,6 +561,9 @@ def get_incident_by_id(incident_id):
         "logStream": item.get("LogStream"),
         "rawMessage": item.get("RawLogMessage", ""),
         "errorSignature": error_signature,
+        # Stored signature only: the summary fallback above has no SignatureIndex
+        # entry, so bulk "resolve all occurrences" is offered only when set
+        "occurrenceSignature": item.get("ErrorSignature"),
         "analysis": {
             "summary": analysis.get("summary", "N/A"),
             "severity": analysis.get("severity", "UNKNOWN"),
@@ -291,125 +584,138 @@ def get_incident_by_id(incident_id):
 
 
 def get_incident_logs(incident_id, query_params):
-    """Fetch recent log events for the incident's log group/stream"""
-    limit = int(query_params.get("limit", 50))
+    """
+    One page of log events around the incident. Query params: before/after
+    (minutes around CreatedAt), pattern (CloudWatch filter pattern), scope
+    (stream|group), limit and token (from the previous page's nextToken).
+    """
     try:
-        # Fetch incident to get log metadata
-        response = table.get_item(Key={"IncidentId": incident_id})
-        item = response.get("Item")
+        item = incident_store.get_header(incident_id, LOG_ATTRIBUTES)
         if not item:
             return {"error": "Incident not found"}
-
-        log_group = item.get("LogGroup")
-        log_stream = item.get("LogStream")
-        if not log_group:
+        if not item.get("LogGroup"):
             return {"error": "Log group not recorded for this incident"}
-
-        params = {
-            "logGroupName": log_group,
-            "limit": limit,
-        }
-        if log_stream:
-            params["logStreamNames"] = [log_stream]
-
-        res = logs_client.filter_log_events(**params)
-        events = res.get("events", [])
-        # Normalize shape
-        parsed = [
-            {
-                "timestamp": evt.get("timestamp"),
-                "ingestionTime": evt.get("ingestionTime"),
-                "message": evt.get("message"),
-                "logStreamName": evt.get("logStreamName"),
-            }
-            for evt in events
-        ]
-        return {"events": parsed, "count": len(parsed)}
+        return log_viewer.get_page(incident_id, item, query_params)
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         print(f"[LOGS] Failed to fetch logs: {str(e)}")
         return {"error": str(e)}
 
 
-def get_statistics():
-    """Calculate and return system statistics"""
-    # Scan all items (in production, consider using DynamoDB Streams or separate stats table)
-    response = table.scan()
-    items = response.get("Items", [])
-    
-    # Filter out configuration items (CONFIG_*)
-    items = [item for item in items if not item.get("IncidentId", "").startswith("CONFIG_")]
-
-    # Calculate statistics
-    total_incidents = len(items)
-    severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0, "UNKNOWN": 0}
-    status_counts = {"OPEN": 0, "RESOLVED": 0}
-    remediation_eligible = 0
-    recent_incidents = []
+TREND_GROUPS = {"severity": "Severity#", "logGroup": "LogGroup#", "signature": "Signature#"}
 
-    # Get date for last 24 hours
-    now = datetime.utcnow()
-    last_24h = now - timedelta(hours=24)
-    incidents_24h = 0
 
-    all_tags = {}
+def get_trends(query_params):
+    """
+    Incident counts per day or hour from the rollup aggregates, optionally
+    broken down by severity, logGroup or signature (top N series).
+    Query parameters: granularity (day|hour), from, to, groupBy, top.
+    """
+    granularity = query_params.get("granularity", "day")
+    if granularity not in ("day", "hour"):
+        return {"error": "granularity must be day or hour"}
+    group_by = query_params.get("groupBy")
+    if group_by and group_by not in TREND_GROUPS:
+        return {"error": f"groupBy must be one of {', '.join(TREND_GROUPS)}"}
+    top = min(int(query_params.get("top", 5)), 20)
+
+    if granularity == "day":
+        fmt, width, step, default_span = "%Y-%m-%d", 10, timedelta(days=1), timedelta(days=29)
+    else:
+        fmt, width, step, default_span = "%Y-%m-%dT%H", 13, timedelta(hours=1), timedelta(hours=47)
+    try:
+        end = datetime.strptime(query_params.get("to", datetime.utcnow().strftime(fmt))[:width], fmt)
+        start = datetime.strptime(query_params["from"][:width], fmt) if query_params.get("from") else end - default_span
+    except ValueError:
+        return {"error": "from/to must be YYYY-MM-DD (day) or YYYY-MM-DDTHH (hour) timestamps"}
+    if (end - start) / step > 24 * 93:
+        return {"error": "Requested range is too large"}
+
+    labels = []
+    cursor = start
+    while cursor <= end:
+        labels.append(cursor.strftime(fmt))
+        cursor += step
+
+    rollups = {
+        item["Bucket"].split("#", 1)[1]: item
+        for item in aggregate_store.get_rollups(granularity, labels[0], labels[-1], signatures=group_by == "signature")
+    } if labels else {}
+
+    totals = [int(rollups.get(label, {}).get("Count", 0)) for label in labels]
+    avg_resolution = []
+    for label in labels:
+        item = rollups.get(label, {})
+        resolved = int(item.get("ResolvedCount", 0))
+        avg_resolution.append(round(float(item.get("ResolutionMinutes", 0)) / resolved, 2) if resolved else None)
 
-    for item in items:
-        analysis = item.get("AnalysisResult", {})
-        severity = analysis.get("severity", "UNKNOWN")
-        if severity in severity_counts:
-            severity_counts[severity] += 1
-        
-        # Count status
-        status = item.get("Status", "OPEN")
-        if status in status_counts:
-            status_counts[status] += 1
-
-        # Count remediation eligible
-        remediation = item.get("RemediationResult", {})
-        if remediation.get("autoRemediationEligible", False):
-            remediation_eligible += 1
-
-        # Count last 24h incidents
-        created_at = item.get("CreatedAt", "")
-        if created_at:
-            try:
-                incident_time = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                if incident_time.replace(tzinfo=None) > last_24h:
-                    incidents_24h += 1
-            except:
-                pass
-
-        # Aggregate tags
-        tags = analysis.get("tags", [])
-        for tag in tags:
-            all_tags[tag] = all_tags.get(tag, 0) + 1
+    result = {
+        "granularity": granularity,
+        "buckets": labels,
+        "total": totals,
+        "avgResolutionMinutes": avg_resolution,
+    }
+
+    if group_by:
+        prefix = TREND_GROUPS[group_by]
+        grand_totals = {}
+        per_bucket = {}
+        for label in labels:
+            counters = aggregate_store.rollup_counters(rollups.get(label, {}), prefix)
+            per_bucket[label] = counters
+            for name, value in counters.items():
+                grand_totals[name] = grand_totals.get(name, 0) + int(value)
+        leaders = sorted(grand_totals, key=grand_totals.get, reverse=True)[:top]
+        result["groupBy"] = group_by
+        result["series"] = {
+            name: [int(per_bucket[label].get(name, 0)) for label in labels]
+            for name in leaders
+        }
+
+    return result
+
+
+def get_statistics():
+    """Return system statistics from the stream-maintained aggregate"""
+    # One get_item for the counters plus a tiny hourly query; no incident scan
+    counters = aggregate_store.get_statistics_counters()
+    severity_counts = counters["severityCounts"]
+    status_counts = counters["statusCounts"]
+    total_incidents = counters["totalIncidents"]
 
     # Get top 10 tags
-    top_tags = sorted(all_tags.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_tags = sorted(counters["tagCounts"].items(), key=lambda x: x[1], reverse=True)[:10]
 
-    # Get 5 most recent incidents
-    items.sort(key=lambda x: x.get("CreatedAt", ""), reverse=True)
-    for item in items[:5]:
-        analysis = item.get("AnalysisResult", {})
-        remediation = item.get("RemediationResult", {})
+    # Get 5 most recent incidents straight off DayBucketIndex
+    recent_items, _ = incident_store.list_incidents(limit=5, attributes=RECENT_ATTRIBUTES)
+    recent_incidents = []
+    for item in recent_items:
         recent_incidents.append(
             {
                 "incidentId": item.get("IncidentId"),
                 "ticketNumber": item.get("TicketNumber", "N/A"),
                 "status": item.get("Status", "OPEN"),
                 "timestamp": item.get("CreatedAt"),
-                "summary": analysis.get("summary", "N/A"),
-                "severity": analysis.get("severity", "UNKNOWN"),
-                "remediationAction": remediation.get("remediationActionTaken", "NONE"),
-                "remediationEligible": remediation.get("autoRemediationEligible", False),
+                "summary": item.get("Summary", "N/A"),
+                "severity": item.get("Severity", "UNKNOWN"),
+                "remediationAction": item.get("RemediationAction", "NONE"),
+                "remediationEligible": item.get("RemediationEligible", False),
             }
         )
 
+    # Bursting signatures/log groups straight from the detector's active set
+    try:
+        spiking_now = burst_detector.active_bursts()[:SPIKING_LIMIT]
+    except Exception as e:
+        print(f"[DASHBOARD] Failed to load burst state: {str(e)}")
+        spiking_now = []
+
     statistics = {
         "overview": {
             "totalIncidents": total_incidents,
-            "incidents24h": incidents_24h,
-            "remediationEligible": remediation_eligible,
+            "incidents24h": counters["incidents24h"],
+            "remediationEligible": counters["remediationEligible"],
             "avgSeverity": _calculate_avg_severity(severity_counts, total_incidents),
             "openTickets": status_counts.get("OPEN", 0),
             "resolvedTickets": status_counts.get("RESOLVED", 0),
@@ -418,6 +724,7 @@ def get_statistics():
         "statusBreakdown": status_counts,
         "topTags": [{"tag": tag, "count": count} for tag, count in top_tags],
         "recentIncidents": recent_incidents,
+        "spikingNow": spiking_now,
         "lastUpdated": datetime.utcnow().isoformat() + "Z",
     }
 
@@ -490,73 +797,15 @@ def trigger_remediation(body):
         return {"error": "incidentId is required"}
     
     try:
-        # Get incident details
-        response = table.get_item(Key={"IncidentId": incident_id})
-        item = response.get("Item")
+        # Get incident details (remediation needs the raw log message)
+        item = incident_store.get_incident(incident_id)
         
         if not item:
             return {"error": "Incident not found"}
         
-        log_group = item.get("LogGroup", "")
-        raw_message = item.get("RawLogMessage", "").lower()
-        current_remediation = item.get("RemediationResult", {})
-        scenario = current_remediation.get("scenario", "general")
-        
-        # If this is an approval action, perform actual remediation
+        # Approved remediations change Lambda configuration; run them as a job
         if action == "approve_and_remediate" and approved:
-            remediation_result = perform_approved_remediation(log_group, raw_message, scenario, item)
-            
-            # Determine final status based on remediation result
-            final_status = "RESOLVED" if remediation_result.get("success") else "OPEN"
-            action_taken = remediation_result.get("actionTaken", "APPROVED_REMEDIATION_ATTEMPTED")
-            
-            remediation_update = {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": action_taken,
-                "details": remediation_result.get("details", "Approved remediation executed"),
-                "awsActions": remediation_result.get("awsActions", []),
-                "approvedBy": triggered_by,
-                "approvedAt": datetime.utcnow().isoformat() + "Z",
-                "scenario": scenario,
-            }
-            
-            update_expression = "SET RemediationResult = :rem, #status = :status"
-            expression_values = {
-                ":rem": remediation_update,
-                ":status": final_status,
-            }
-            
-            if final_status == "RESOLVED":
-                update_expression += ", ResolvedAt = :resolvedAt, ResolvedBy = :resolvedBy"
-                expression_values[":resolvedAt"] = datetime.utcnow().isoformat() + "Z"
-                expression_values[":resolvedBy"] = triggered_by
-            
-            table.update_item(
-                Key={"IncidentId": incident_id},
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames={"#status": "Status"},
-                ExpressionAttributeValues=expression_values,
-            )
-            
-            # Send notification
-            item["RemediationResult"] = remediation_update
-            item["Status"] = final_status
-            publish_stage_notification(
-                stage="Approved Remediation Complete" if final_status == "RESOLVED" else "Remediation Attempted",
-                item=item,
-                status=final_status,
-                details=remediation_update["details"],
-            )
-            
-            return {
-                "success": remediation_result.get("success", True),
-                "incidentId": incident_id,
-                "action": action_taken,
-                "status": final_status,
-                "message": remediation_result.get("details", "Approved remediation executed"),
-                "awsActions": remediation_result.get("awsActions", []),
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
+            return submit_remediation_job("approve", {"incidentId": incident_id, "triggeredBy": triggered_by}, 1)
         
         # Standard manual trigger (non-approval flow)
         remediation_action = (action or "MANUAL_TRIGGERED").upper()
@@ -568,19 +817,9 @@ def trigger_remediation(body):
             "manualTrigger": True,
         }
 
-        table.update_item(
-            Key={"IncidentId": incident_id},
-            UpdateExpression="SET RemediationResult = :rem, #status = :status",
-            ExpressionAttributeNames={"#status": "Status"},
-            ExpressionAttributeValues={
-                ":rem": remediation_update,
-                ":status": "IN_PROGRESS",
-            },
-        )
+        incident_store.update_incident(item, {"Status": "IN_PROGRESS"}, remediation=remediation_update)
 
         # Send notification for IN_PROGRESS stage
-        item["RemediationResult"] = remediation_update
-        item["Status"] = "IN_PROGRESS"
         publish_stage_notification(
             stage="Remediation In Progress",
             item=item,
@@ -604,193 +843,350 @@ def trigger_remediation(body):
         }
 
 
-def perform_approved_remediation(log_group, raw_message, scenario, item):
-    """Perform actual remediation after approval"""
-    # Extract function name from log group
-    function_name = log_group.replace("/aws/lambda/", "") if log_group.startswith("/aws/lambda/") else None
-    
-    if not function_name:
-        return {
-            "success": False,
-            "actionTaken": "APPROVED_BUT_NO_FUNCTION",
-            "details": "Could not extract function name from log group for remediation",
-            "awsActions": []
-        }
-    
-    try:
-        # Determine remediation based on scenario/error type
-        if scenario == "lambdaTimeout" or "timeout" in raw_message:
-            return remediate_timeout_approved(function_name)
-        elif scenario == "outOfMemory" or "memory" in raw_message:
-            return remediate_memory_approved(function_name)
-        elif scenario == "connectionPool" or ("connection" in raw_message and "pool" in raw_message):
-            return remediate_connection_pool_approved(function_name)
-        else:
-            # Generic restart for unknown scenarios
-            return remediate_restart_approved(function_name)
-            
-    except Exception as e:
-        return {
-            "success": False,
-            "actionTaken": "APPROVED_REMEDIATION_FAILED",
-            "details": f"Remediation failed: {str(e)}",
-            "awsActions": []
-        }
+def run_approved_remediation(incident_id, triggered_by):
+    """Perform an approved remediation for one incident and record the outcome"""
+    item = incident_store.get_incident(incident_id)
+    if not item:
+        return {"success": False, "error": "Incident not found"}
+
+    log_group = item.get("LogGroup", "")
+    raw_message = item.get("RawLogMessage", "").lower()
+    scenario = item.get("RemediationResult", {}).get("scenario", "general")
+
+    remediation_result = perform_approved_remediation(log_group, raw_message, scenario, item)
+
+    updates, remediation_update = approved_remediation_changes(remediation_result, triggered_by, scenario)
+    final_status = updates["Status"]
+    action_taken = remediation_update["remediationActionTaken"]
+
+    incident_store.update_incident(item, updates, remediation=remediation_update)
+
+    # Send notification
+    publish_stage_notification(
+        stage="Approved Remediation Complete" if final_status == "RESOLVED" else "Remediation Attempted",
+        item=item,
+        status=final_status,
+        details=remediation_update["details"],
+    )
+
+    pending = bool(remediation_result.get("pendingVerification"))
+    return {
+        "success": remediation_result.get("success", True) or pending,
+        "pendingVerification": pending,
+        "incidentId": incident_id,
+        "action": action_taken,
+        "status": final_status,
+        "message": remediation_result.get("details", "Approved remediation executed"),
+        "awsActions": remediation_result.get("awsActions", []),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
 
 
-def remediate_timeout_approved(function_name):
-    """Increase Lambda timeout after approval"""
+def submit_remediation_job(kind, request, total):
+    """
+    Queue a remediation job and hand it to the worker Lambda; without a
+    worker (local runs) the job runs before this returns.
+    """
+    job_id = remediation_jobs.create_job(kind, request, total)
     try:
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        current_timeout = response['Timeout']
-        new_timeout = min(current_timeout * 2, 900)
-        
-        if new_timeout > current_timeout:
-            lambda_client.update_function_configuration(
-                FunctionName=function_name,
-                Timeout=new_timeout
-            )
-            return {
-                "success": True,
-                "actionTaken": "APPROVED_AUTO_REMEDIATED",
-                "details": f"✅ Approved: Increased Lambda timeout from {current_timeout}s to {new_timeout}s",
-                "awsActions": [{
-                    "service": "lambda",
-                    "action": "update_function_configuration",
-                    "resource": function_name,
-                    "changes": {"timeout_before": current_timeout, "timeout_after": new_timeout}
-                }]
-            }
-        else:
-            return {
-                "success": True,
-                "actionTaken": "APPROVED_LIMIT_REACHED",
-                "details": f"Timeout already at maximum ({current_timeout}s). Manual optimization needed.",
-                "awsActions": []
-            }
+        started = remediation_jobs.start(job_id)
     except Exception as e:
-        return {
-            "success": False,
-            "actionTaken": "APPROVED_REMEDIATION_FAILED",
-            "details": f"Failed to increase timeout: {str(e)}",
-            "awsActions": []
-        }
+        remediation_jobs.complete(job_id, error=f"Could not start remediation worker: {str(e)}")
+        return {"success": False, "jobId": job_id, "error": str(e)}
+    if not started:
+        run_remediation_job(job_id)
+
+    job = remediation_jobs.get_job(job_id)
+    return {
+        "success": True,
+        "jobId": job_id,
+        "jobStatus": job["status"],
+        "incidentId": request.get("incidentId"),
+        "message": f"Remediation job {job_id} {job['status'].lower()}",
+        "job": job,
+    }
 
 
-def remediate_memory_approved(function_name):
-    """Increase Lambda memory after approval"""
+def run_remediation_job(job_id):
+    """Worker side of a remediation job: claim it, run it, store the outcome"""
+    claimed = remediation_jobs.claim(job_id)
+    if not claimed:
+        return None
+    kind, request = claimed
     try:
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        current_memory = response['MemorySize']
-        new_memory = min(current_memory * 2, 10240)
-        
-        if new_memory > current_memory:
-            lambda_client.update_function_configuration(
-                FunctionName=function_name,
-                MemorySize=new_memory
+        if kind == "approve":
+            result = run_approved_remediation(request["incidentId"], request["triggeredBy"])
+            remediation_jobs.record_progress(job_id)
+        elif kind == "batch":
+            result = run_batch_remediation(
+                request["incidentIds"], request["triggeredBy"],
+                on_function_done=lambda function_name: remediation_jobs.record_progress(job_id),
+                on_grouped=lambda total: remediation_jobs.set_total(job_id, total),
             )
-            return {
-                "success": True,
-                "actionTaken": "APPROVED_AUTO_REMEDIATED",
-                "details": f"✅ Approved: Increased Lambda memory from {current_memory}MB to {new_memory}MB",
-                "awsActions": [{
-                    "service": "lambda",
-                    "action": "update_function_configuration",
-                    "resource": function_name,
-                    "changes": {"memory_before": current_memory, "memory_after": new_memory}
-                }]
-            }
         else:
-            return {
-                "success": True,
-                "actionTaken": "APPROVED_LIMIT_REACHED",
-                "details": f"Memory already at maximum ({current_memory}MB). Manual optimization needed.",
-                "awsActions": []
-            }
+            raise ValueError(f"Unknown remediation job kind '{kind}'")
     except Exception as e:
-        return {
-            "success": False,
-            "actionTaken": "APPROVED_REMEDIATION_FAILED",
-            "details": f"Failed to increase memory: {str(e)}",
-            "awsActions": []
-        }
+        print(f"[JOBS] {job_id} failed: {str(e)}")
+        return remediation_jobs.complete(job_id, error=str(e))
+    return remediation_jobs.complete(job_id, result)
+
+
+def get_remediation_job(job_id):
+    """GET /remediation-jobs/{id}"""
+    job = remediation_jobs.get_job(job_id)
+    if not job:
+        return {"error": "Remediation job not found"}
+    return {"success": True, **job}
+
+
+def approved_remediation_changes(remediation_result, triggered_by, scenario):
+    """Header updates and stored remediation result for an approved remediation outcome"""
+    # Determine final status based on remediation result; a change that was
+    # sent but not confirmed in time leaves the incident IN_PROGRESS
+    if remediation_result.get("success"):
+        final_status = "RESOLVED"
+    elif remediation_result.get("pendingVerification"):
+        final_status = "IN_PROGRESS"
+    else:
+        final_status = "OPEN"
+
+    remediation_update = {
+        "autoRemediationEligible": True,
+        "remediationActionTaken": remediation_result.get("actionTaken", "APPROVED_REMEDIATION_ATTEMPTED"),
+        "details": remediation_result.get("details", "Approved remediation executed"),
+        "awsActions": remediation_result.get("awsActions", []),
+        "approvedBy": triggered_by,
+        "approvedAt": datetime.utcnow().isoformat() + "Z",
+        "scenario": scenario,
+    }
+
+    updates = {"Status": final_status}
+    if final_status == "RESOLVED":
+        updates["ResolvedAt"] = datetime.utcnow().isoformat() + "Z"
+        updates["ResolvedBy"] = triggered_by
+    return updates, remediation_update
+
+
+def function_name_for(log_group):
+    """Lambda function name behind a /aws/lambda/ log group, else None"""
+    return log_group.replace("/aws/lambda/", "") if log_group.startswith("/aws/lambda/") else None
+
+
+def approved_action(raw_message, scenario):
+    """Registry action an approved remediation applies (a restart when nothing more specific fits)"""
+    return remediation_actions.select_action(raw_message, scenario, default="restart", kinds=("lambda",))
+
+
+def perform_approved_remediation(log_group, raw_message, scenario, item):
+    """Perform actual remediation after approval"""
+    # Extract function name from log group
+    function_name = function_name_for(log_group)
+    
+    if not function_name:
+        return no_function_result()
+    
+    return remediate_function_approved(function_name, [approved_action(raw_message, scenario)])
 
 
-def remediate_connection_pool_approved(function_name):
-    """Restart Lambda to reset connection pool after approval"""
+def no_function_result():
+    """Approved-remediation outcome for incidents whose log group is not a Lambda function's"""
+    return {
+        "success": False,
+        "actionTaken": "APPROVED_BUT_NO_FUNCTION",
+        "details": "Could not extract function name from log group for remediation",
+        "awsActions": []
+    }
+
+
+# actionTaken for each remediation_actions outcome on the approval path
+APPROVED_ACTION_TAKEN = {
+    remediation_actions.REMEDIATED: "APPROVED_AUTO_REMEDIATED",
+    remediation_actions.LIMIT_REACHED: "APPROVED_LIMIT_REACHED",
+    remediation_actions.FAILED: "APPROVED_REMEDIATION_FAILED",
+    remediation_actions.PENDING_VERIFICATION: "APPROVED_PENDING_VERIFICATION",
+}
+
+
+def remediate_function_approved(function_name, actions, deadline=None):
+    """
+    Apply approved registry actions to one Lambda function; all of them go
+    out in a single verified configuration update, so a function is changed
+    once however many incidents asked for it.
+    """
+    outcome = remediation_actions.run(lambda_client, function_name, actions, deadline=deadline)
+    details = outcome["details"]
+    if outcome["outcome"] == remediation_actions.REMEDIATED:
+        details = f"✅ Approved: {details}"
+    return {
+        "success": outcome["success"],
+        "pendingVerification": outcome["outcome"] == remediation_actions.PENDING_VERIFICATION,
+        "actionTaken": APPROVED_ACTION_TAKEN[outcome["outcome"]],
+        "details": details,
+        "awsActions": outcome["awsActions"],
+        "verification": outcome["verification"],
+        "timeToEffectiveMs": outcome["timeToEffectiveMs"],
+        "timings": outcome["timings"],
+    }
+
+
+def batch_remediate(body):
+    """
+    Approve and remediate a list of incidents as one remediation job
+    (see run_batch_remediation); returns the job id immediately.
+    """
+    incident_ids = list(dict.fromkeys(body.get("incidentIds") or []))
+    triggered_by = body.get("triggeredBy", "DASHBOARD_BATCH_APPROVAL")
+
+    if not incident_ids:
+        return {"error": "incidentIds is required"}
+    if len(incident_ids) > MAX_BATCH_INCIDENTS:
+        return {"error": f"At most {MAX_BATCH_INCIDENTS} incidents per batch"}
+    if not body.get("approved", False):
+        return {"error": "Batch remediation must be approved"}
+
     try:
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        env_vars = response.get('Environment', {}).get('Variables', {})
-        env_vars['APPROVED_RESTART'] = datetime.utcnow().isoformat()
-        
-        lambda_client.update_function_configuration(
-            FunctionName=function_name,
-            Environment={'Variables': env_vars}
-        )
-        
-        return {
-            "success": True,
-            "actionTaken": "APPROVED_AUTO_REMEDIATED",
-            "details": f"✅ Approved: Restarted Lambda {function_name} to reset connection pool",
-            "awsActions": [{
-                "service": "lambda",
-                "action": "restart_function",
-                "resource": function_name,
-                "changes": {"method": "environment_variable_update", "timestamp": datetime.utcnow().isoformat()}
-            }]
-        }
+        # Progress counts the function groups run_batch_remediation will
+        # remediate; the worker re-counts them when it loads the incidents
+        headers = incident_store.load_headers(incident_ids, ["IncidentId", "LogGroup", "Status"])
+        groups, _ = group_batch_incidents(incident_ids, headers)
+        return submit_remediation_job("batch", {"incidentIds": incident_ids, "triggeredBy": triggered_by}, len(groups))
     except Exception as e:
         return {
             "success": False,
-            "actionTaken": "APPROVED_REMEDIATION_FAILED",
-            "details": f"Failed to restart Lambda: {str(e)}",
-            "awsActions": []
+            "error": str(e)
         }
 
 
-def remediate_restart_approved(function_name):
-    """Generic Lambda restart after approval"""
-    try:
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        env_vars = response.get('Environment', {}).get('Variables', {})
-        env_vars['APPROVED_RESTART'] = datetime.utcnow().isoformat()
-        
-        lambda_client.update_function_configuration(
-            FunctionName=function_name,
-            Environment={'Variables': env_vars}
-        )
-        
-        return {
-            "success": True,
-            "actionTaken": "APPROVED_AUTO_REMEDIATED",
-            "details": f"✅ Approved: Restarted Lambda {function_name}",
-            "awsActions": [{
-                "service": "lambda",
-                "action": "restart_function",
-                "resource": function_name,
-                "changes": {"method": "environment_variable_update"}
-            }]
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "actionTaken": "APPROVED_REMEDIATION_FAILED",
-            "details": f"Failed to restart Lambda: {str(e)}",
-            "awsActions": []
+def group_batch_incidents(incident_ids, items):
+    """
+    Group a batch's incidents by target Lambda function (None for log
+    groups that name no function); unknown and already-resolved incidents
+    are left out. Returns (groups, results) where results holds the
+    per-incident outcome of those left out. Shared by batch_remediate
+    (progress total, from headers) and run_batch_remediation.
+    """
+    results = {}
+    groups = {}
+    for incident_id in incident_ids:
+        item = items.get(incident_id)
+        if not item:
+            results[incident_id] = {"incidentId": incident_id, "success": False, "error": "Incident not found"}
+        elif item.get("Status") == "RESOLVED":
+            results[incident_id] = {"incidentId": incident_id, "success": False, "status": "RESOLVED",
+                                    "error": "Incident already resolved"}
+        else:
+            groups.setdefault(function_name_for(item.get("LogGroup", "")), []).append(item)
+    return groups, results
+
+
+def run_batch_remediation(incident_ids, triggered_by, on_function_done=None, on_grouped=None):
+    """
+    Remediate a list of approved incidents. Incidents are grouped by
+    target Lambda function so each function is changed once with the union
+    of its incidents' fixes; functions are remediated concurrently
+    (REMEDIATION_CONCURRENCY at a time) and every incident's status is then
+    written in transactional batches. The whole batch shares
+    BATCH_DEADLINE_SECONDS. `on_grouped(count)` is called with
+    the number of function groups before any runs and
+    `on_function_done(function_name)` as each one finishes. Returns
+    per-incident and per-function results.
+    """
+    items = incident_store.load_incidents(incident_ids)
+
+    grouped, results = group_batch_incidents(incident_ids, items)
+    groups = {}
+    for function_name, members in grouped.items():
+        for item in members:
+            scenario = item.get("RemediationResult", {}).get("scenario", "general")
+            action = approved_action(item.get("RawLogMessage", ""), scenario)
+            groups.setdefault(function_name, []).append((item, scenario, action))
+    if on_grouped:
+        on_grouped(len(groups))
+    deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
+
+    def remediate_group(function_name):
+        if not function_name:
+            outcome = no_function_result()
+        else:
+            actions = [action for _, _, action in groups[function_name]]
+            outcome = remediate_function_approved(function_name, actions, deadline=deadline)
+        if on_function_done:
+            on_function_done(function_name)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, min(REMEDIATION_CONCURRENCY, len(groups) or 1))) as pool:
+        outcomes = dict(zip(groups, pool.map(remediate_group, groups)))
+
+    changes = []
+    functions = []
+    for function_name, members in groups.items():
+        outcome = outcomes[function_name]
+        functions.append({
+            "functionName": function_name,
+            "incidentIds": [item["IncidentId"] for item, _, _ in members],
+            "success": outcome.get("success", False),
+            "action": outcome.get("actionTaken"),
+            "details": outcome.get("details"),
+            "awsActions": outcome.get("awsActions", []),
+        })
+        for item, scenario, _ in members:
+            updates, remediation_update = approved_remediation_changes(outcome, triggered_by, scenario)
+            changes.append((item, updates, remediation_update))
+
+    write_errors = incident_store.update_incidents(changes)
+
+    updated = []
+    statuses = {}
+    for item, updates, remediation_update in changes:
+        incident_id = item["IncidentId"]
+        error = write_errors.get(incident_id)
+        result = {
+            "incidentId": incident_id,
+            "success": error is None and updates["Status"] == "RESOLVED",
+            "status": updates["Status"] if error is None else item.get("Status"),
+            "action": remediation_update["remediationActionTaken"],
+            "message": remediation_update["details"],
         }
+        if error is not None:
+            result["error"] = f"Status update failed: {error}"
+        else:
+            if updates["Status"] == "IN_PROGRESS":
+                result["pendingVerification"] = True
+            updated.append(item)
+            statuses[incident_id] = updates["Status"]
+        results[incident_id] = result
+
+    resolved = sum(1 for status in statuses.values() if status == "RESOLVED")
+    publish_summary_notification(
+        stage="Batch Remediation Complete",
+        items=updated,
+        statuses=statuses,
+        details=f"{resolved} of {len(incident_ids)} incidents resolved across {len(functions)} functions by {triggered_by}",
+    )
+
+    return {
+        "success": True,
+        "requested": len(incident_ids),
+        "resolved": resolved,
+        "pending": sum(1 for result in results.values() if result.get("pendingVerification")),
+        "failed": sum(1 for result in results.values() if not result["success"] and not result.get("pendingVerification")),
+        "results": [results[incident_id] for incident_id in incident_ids],
+        "functions": functions,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
 
 
 def get_critical_functions():
     """Get the list of critical functions that require manual approval"""
     try:
-        response = table.get_item(Key={"IncidentId": "CONFIG_CRITICAL_FUNCTIONS"})
-        item = response.get("Item", {})
-        functions = item.get("functions", [])
+        record = config_store.get_config(config_store.CRITICAL_FUNCTIONS)
+        functions = record["value"]
         
         return {
             "success": True,
             "criticalFunctions": functions,
-            "count": len(functions)
+            "count": len(functions),
+            "version": record["version"]
         }
     except Exception as e:
         return {
@@ -806,12 +1202,8 @@ def update_critical_functions(body):
     action = body.get("action")  # "add" or "remove"
     function_name = body.get("functionName")
     
-    try:
-        # Get current list
-        response = table.get_item(Key={"IncidentId": "CONFIG_CRITICAL_FUNCTIONS"})
-        item = response.get("Item", {})
-        current_functions = item.get("functions", [])
-        
+    def apply_change(current_functions):
+        current_functions = list(current_functions)
         if action == "add" and function_name:
             if function_name not in current_functions:
                 current_functions.append(function_name)
@@ -821,17 +1213,17 @@ def update_critical_functions(body):
         elif functions is not None:
             # Replace entire list
             current_functions = functions
-        
-        # Save back
-        table.put_item(Item={
-            "IncidentId": "CONFIG_CRITICAL_FUNCTIONS",
-            "functions": current_functions,
-            "CreatedAt": datetime.utcnow().isoformat() + "Z"
-        })
+        return current_functions
+    
+    try:
+        # Versioned read-modify-write against the config table
+        record = config_store.modify_config(config_store.CRITICAL_FUNCTIONS, apply_change)
+        current_functions = record["value"]
         
         return {
             "success": True,
             "criticalFunctions": current_functions,
+            "version": record["version"],
             "message": f"Critical functions updated. Total: {len(current_functions)}"
         }
         
@@ -845,48 +1237,19 @@ def update_critical_functions(body):
 def get_auto_remediation_config():
     """Get auto-remediation configuration for each scenario type"""
     try:
-        response = table.get_item(Key={"IncidentId": "CONFIG_AUTO_REMEDIATION"})
-        item = response.get("Item", {})
-        
-        # Default config - scenarios that auto-remediate by default
-        default_config = {
-            "lambdaTimeout": True,
-            "outOfMemory": True,
-            "throttling": False,
-            "connectionPool": False,
-            "cacheCorruption": False,
-            "healthCheck": False,
-            "diskFull": False,
-            "authFailure": False,
-            "dependencyTimeout": False,
-            "dlqEscalation": False
-        }
-        
-        # Merge saved config with defaults
-        saved_config = item.get("scenarios", {})
-        merged_config = {**default_config, **saved_config}
+        record = config_store.get_config(config_store.AUTO_REMEDIATION)
         
         return {
             "success": True,
-            "config": merged_config,
-            "lastUpdated": item.get("CreatedAt", None)
+            "config": record["value"],
+            "version": record["version"],
+            "lastUpdated": record["updatedAt"]
         }
     except Exception as e:
         print(f"[ERROR] Failed to get auto-remediation config: {str(e)}")
         return {
             "success": True,
-            "config": {
-                "lambdaTimeout": True,
-                "outOfMemory": True,
-                "throttling": False,
-                "connectionPool": False,
-                "cacheCorruption": False,
-                "healthCheck": False,
-                "diskFull": False,
-                "authFailure": False,
-                "dependencyTimeout": False,
-                "dlqEscalation": False
-            },
+            "config": dict(config_store.DEFAULT_AUTO_REMEDIATION),
             "lastUpdated": None
         }
 
@@ -894,18 +1257,20 @@ def get_auto_remediation_config():
 def update_auto_remediation_config(body):
     """Update auto-remediation configuration"""
     config = body.get("config", {})
+    expected_version = body.get("version")
     
     try:
-        # Save config to DynamoDB
-        table.put_item(Item={
-            "IncidentId": "CONFIG_AUTO_REMEDIATION",
-            "scenarios": config,
-            "CreatedAt": datetime.utcnow().isoformat() + "Z"
-        })
+        # Save config; a stale "version" from the client is rejected
+        record = config_store.put_config(
+            config_store.AUTO_REMEDIATION,
+            config,
+            expected_version=int(expected_version) if expected_version is not None else None,
+        )
         
         return {
             "success": True,
-            "config": config,
+            "config": record["value"],
+            "version": record["version"],
             "message": "Auto-remediation configuration updated successfully"
         }
         
@@ -916,59 +1281,69 @@ def update_auto_remediation_config(body):
         }
 
 
-def get_error_frequency_count(error_signature, log_group):
-    """Get count of similar errors in last 24 hours"""
-    if not error_signature:
-        return 1
+def get_error_frequency_counts(headers):
+    """Get count of similar errors in last 24 hours for every incident on a page"""
+    groups = [
+        (header.get("ErrorSignature"), header.get("LogGroup"))
+        for header in headers
+        if header.get("ErrorSignature")
+    ]
+    if not groups:
+        return {}
     
     try:
-        from datetime import timedelta
-        from boto3.dynamodb.conditions import Attr
-        
-        now = datetime.utcnow()
-        last_24h = now - timedelta(hours=24)
-        last_24h_str = last_24h.isoformat() + "Z"
-        
-        response = table.scan(
-            FilterExpression=Attr('ErrorSignature').eq(error_signature) & 
-                           Attr('CreatedAt').gt(last_24h_str) &
-                           Attr('LogGroup').eq(log_group)
-        )
-        
-        return len(response.get('Items', []))
+        last_24h_str = (datetime.utcnow() - timedelta(hours=24)).isoformat() + "Z"
+        return incident_store.count_recent_occurrences(groups, last_24h_str)
     except Exception as e:
         print(f"[ERROR] Failed to get error frequency: {str(e)}")
-        return 1
+        return {}
+
+
+def get_similar_incidents(item):
+    """Most similar incidents from the embedding index, or None if it is unavailable"""
+    try:
+        hits = similarity_index.similar_incidents(item, k=RELATED_LIMIT)
+        headers = incident_store.load_headers([hit[0] for hit in hits], OCCURRENCE_ATTRIBUTES)
+    except Exception as e:
+        print(f"[ERROR] Failed to query similarity index: {str(e)}")
+        return None
+
+    related = []
+    for incident_id, created_at, similarity in hits:
+        header = headers.get(incident_id)
+        if not header:
+            continue  # expired since the index was built
+        related.append({
+            "timestamp": header.get("CreatedAt", created_at),
+            "incidentId": incident_id,
+            "ticketNumber": header.get("TicketNumber"),
+            "status": header.get("Status", "UNKNOWN"),
+            "summary": header.get("Summary", "N/A")[:100],
+            "similarity": round(similarity, 3),
+        })
+    return related
 
 
 def get_error_occurrences(error_signature, log_group):
     """Get list of related incidents - by error signature or same log group"""
     try:
-        from datetime import timedelta
-        from boto3.dynamodb.conditions import Attr
-        
-        now = datetime.utcnow()
         # Extended to 7 days for better related incident discovery
-        last_week = now - timedelta(days=7)
-        last_week_str = last_week.isoformat() + "Z"
-        
+        last_week_str = (datetime.utcnow() - timedelta(days=7)).isoformat() + "Z"
+
         items = []
-        
-        # First try to find incidents with same error signature (if available)
-        if error_signature:
-            response = table.scan(
-                FilterExpression=Attr('ErrorSignature').eq(error_signature) & 
-                               Attr('CreatedAt').gt(last_week_str)
+
+        # First try to find incidents with same error signature (if available): SignatureIndex
+        if error_signature and log_group:
+            items = incident_store.find_recent_occurrences(
+                error_signature, log_group, last_week_str, limit=RELATED_LIMIT + 1, attributes=OCCURRENCE_ATTRIBUTES
             )
-            items = response.get('Items', [])
-        
-        # If no matches by signature, find incidents from same log group
+
+        # If no matches by signature, find incidents from same log group: LogGroupIndex
         if not items and log_group:
-            response = table.scan(
-                FilterExpression=Attr('LogGroup').eq(log_group) & 
-                               Attr('CreatedAt').gt(last_week_str)
+            items, _ = incident_store.query_incidents(
+                {"logGroup": log_group, "since": last_week_str}, "newest", RELATED_LIMIT + 1,
+                attributes=OCCURRENCE_ATTRIBUTES,
             )
-            items = response.get('Items', [])
         
         occurrences = []
         for item in items:
@@ -977,13 +1352,13 @@ def get_error_occurrences(error_signature, log_group):
                 'incidentId': item.get('IncidentId'),
                 'ticketNumber': item.get('TicketNumber'),
                 'status': item.get('Status', 'UNKNOWN'),
-                'summary': item.get('AnalysisResult', {}).get('summary', 'N/A')[:100]
+                'summary': incident_store.as_header(item).get('Summary', 'N/A')[:100]
             })
         
         # Sort by timestamp descending
         occurrences.sort(key=lambda x: x['timestamp'] or '', reverse=True)
         
-        return occurrences[:10]  # Return last 10 occurrences
+        return occurrences[:RELATED_LIMIT + 1]  # Room for 10 besides the incident itself
     except Exception as e:
         print(f"[ERROR] Failed to get error occurrences: {str(e)}")
         return []
@@ -992,40 +1367,26 @@ def get_error_occurrences(error_signature, log_group):
 def resolve_incident(incident_id, resolved_by, resolution_notes=None):
     """Mark an incident as resolved"""
     try:
-        # Get the incident
-        response = table.get_item(Key={"IncidentId": incident_id})
-        item = response.get("Item")
+        # Get the incident header (only what the notification needs)
+        item = incident_store.get_header(incident_id, NOTIFY_ATTRIBUTES)
         
         if not item:
             return {"success": False, "error": "Incident not found"}
         
-        # Build update expression
-        update_expr = "SET #status = :status, ResolvedAt = :resolvedAt, ResolvedBy = :resolvedBy"
-        expr_values = {
-            ":status": "RESOLVED",
-            ":resolvedAt": datetime.utcnow().isoformat() + "Z",
-            ":resolvedBy": resolved_by
+        # Build header updates
+        updates = {
+            "Status": "RESOLVED",
+            "ResolvedAt": datetime.utcnow().isoformat() + "Z",
+            "ResolvedBy": resolved_by
         }
         
         if resolution_notes:
-            update_expr += ", ResolutionNotes = :notes"
-            expr_values[":notes"] = resolution_notes
+            updates["ResolutionNotes"] = resolution_notes
         
-        # Update status
-        table.update_item(
-            Key={"IncidentId": incident_id},
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames={
-                "#status": "Status"
-            },
-            ExpressionAttributeValues=expr_values
-        )
+        # Update status (header only; the detail blob is untouched)
+        incident_store.update_incident(item, updates)
 
         # Notify resolution
-        item["Status"] = "RESOLVED"
-        item["ResolvedAt"] = datetime.utcnow().isoformat() + "Z"
-        item["ResolvedBy"] = resolved_by
-        item["ResolutionNotes"] = resolution_notes
         publish_stage_notification(
             stage="Resolved",
             item=item,
@@ -1047,316 +1408,150 @@ def resolve_incident(incident_id, resolved_by, resolution_notes=None):
         }
 
 
-def linear_regression_predict(daily_counts):
+def bulk_update_status(body):
     """
-    Simple linear regression to predict future incident counts.
-    Uses least squares method without external libraries.
-    
-    Args:
-        daily_counts: list of (day_number, count) tuples
-    
-    Returns:
-        dict with slope, intercept, predictions for next 7 days, and confidence
+    Move many incidents to one status (RESOLVED by default). Targets are
+    either `incidentIds` or a `selector` ({signature, logGroup, since,
+    until}). Incidents already in the target status are skipped (reported
+    as `skipped`, not failures); the rest are written in transactional
+    batches, each conditional on the incident not having reached the
+    target status meanwhile, and one summary notification is sent.
+    Moving an incident out of RESOLVED clears its resolution fields.
     """
-    if len(daily_counts) < 3:
-        avg_count = sum(c for _, c in daily_counts) / len(daily_counts) if daily_counts else 0
-        # Generate simple predictions based on average
-        predictions = [
-            {"day": i, "predictedCount": round(avg_count, 1), "date": (datetime.utcnow() + timedelta(days=i)).strftime("%Y-%m-%d")}
-            for i in range(1, 8)
-        ]
-        current_total = sum(c for _, c in daily_counts)
+    status = body.get("status", "RESOLVED")
+    resolved_by = body.get("resolvedBy", "MANUAL_RESOLUTION")
+    resolution_notes = body.get("resolutionNotes")
+
+    if status not in BULK_STATUSES:
+        return {"error": f"status must be one of {', '.join(BULK_STATUSES)}"}
+
+    try:
+        truncated = False
+        if body.get("incidentIds"):
+            incident_ids = list(dict.fromkeys(body["incidentIds"]))
+            if len(incident_ids) > MAX_BULK_INCIDENTS:
+                return {"error": f"At most {MAX_BULK_INCIDENTS} incidents per request"}
+        elif body.get("selector"):
+            incident_ids, truncated = incident_store.select_incident_ids(
+                body["selector"], MAX_BULK_INCIDENTS, exclude_status=status
+            )
+        else:
+            return {"error": "incidentIds or selector is required"}
+
+        headers = incident_store.load_headers(incident_ids, NOTIFY_ATTRIBUTES)
+
+        updates = {"Status": status}
+        if status == "RESOLVED":
+            updates["ResolvedAt"] = datetime.utcnow().isoformat() + "Z"
+            updates["ResolvedBy"] = resolved_by
+            if resolution_notes:
+                updates["ResolutionNotes"] = resolution_notes
+        else:
+            # Reopened incidents must not keep a stale resolution
+            updates.update({"ResolvedAt": None, "ResolvedBy": None, "ResolutionNotes": None})
+
+        def already(incident_id):
+            return {"incidentId": incident_id, "success": True, "skipped": True, "status": status,
+                    "message": f"Incident already {status}"}
+
+        results = {}
+        changes = []
+        for incident_id in incident_ids:
+            header = headers.get(incident_id)
+            if not header:
+                results[incident_id] = {"incidentId": incident_id, "success": False, "error": "Incident not found"}
+            elif header.get("Status", "OPEN") == status:
+                results[incident_id] = already(incident_id)
+            else:
+                changes.append((header, updates, None))
+
+        write_errors = incident_store.update_incidents(changes, condition={
+            "expression": "attribute_not_exists(#status) OR #status <> :target",
+            "names": {"#status": "Status"},
+            "values": {":target": status},
+        })
+
+        # A rejected write either raced another change to the target status
+        # (a no-op) or lost its incident; re-read them to tell which
+        rejected = [incident_id for incident_id, error in write_errors.items() if error is not None]
+        current = incident_store.load_headers(rejected, ["IncidentId", "Status"]) if rejected else {}
+
+        updated = []
+        for header, _, _ in changes:
+            incident_id = header["IncidentId"]
+            error = write_errors.get(incident_id)
+            if error is None:
+                updated.append(header)
+                results[incident_id] = {"incidentId": incident_id, "success": True, "status": status}
+            elif current.get(incident_id, {}).get("Status") == status:
+                results[incident_id] = already(incident_id)
+            else:
+                results[incident_id] = {"incidentId": incident_id, "success": False,
+                                        "error": f"Status update failed: {error}"}
+        skipped = sum(1 for result in results.values() if result.get("skipped"))
+
+        verb = "resolved" if status == "RESOLVED" else f"moved to {status}"
+        publish_summary_notification(
+            stage="Bulk Resolved" if status == "RESOLVED" else "Bulk Status Change",
+            items=updated,
+            statuses={header["IncidentId"]: status for header in updated},
+            details=f"{len(updated)} incidents {verb} by {resolved_by}",
+        )
+
         return {
-            "slope": 0,
-            "intercept": round(avg_count, 3),
-            "predictions": predictions,
-            "trend": "insufficient_data",
-            "confidence": 0,
-            "nextWeekTotal": round(avg_count * 7, 1),
-            "currentWeekTotal": current_total,
-            "percentageChange": 0
+            "success": True,
+            "status": status,
+            "matched": len(incident_ids),
+            "updated": len(updated),
+            "skipped": skipped,
+            "failed": len(incident_ids) - len(updated) - skipped,
+            "truncated": truncated,
+            "results": [results[incident_id] for incident_id in incident_ids],
+            "message": f"{len(updated)} of {len(incident_ids)} incidents {verb}"
+        }
+
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
         }
-    
-    n = len(daily_counts)
-    x_values = [x for x, _ in daily_counts]
-    y_values = [y for _, y in daily_counts]
-    
-    # Calculate means
-    x_mean = sum(x_values) / n
-    y_mean = sum(y_values) / n
-    
-    # Calculate slope (m) and intercept (b) using least squares
-    numerator = sum((x - x_mean) * (y - y_mean) for x, y in daily_counts)
-    denominator = sum((x - x_mean) ** 2 for x in x_values)
-    
-    if denominator == 0:
-        slope = 0
-    else:
-        slope = numerator / denominator
-    
-    intercept = y_mean - slope * x_mean
-    
-    # Calculate R-squared for confidence
-    y_pred = [slope * x + intercept for x in x_values]
-    ss_res = sum((y - yp) ** 2 for y, yp in zip(y_values, y_pred))
-    ss_tot = sum((y - y_mean) ** 2 for y in y_values)
-    r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-    
-    # Predict next 7 days
-    last_day = max(x_values)
-    predictions = []
-    for i in range(1, 8):
-        predicted_day = last_day + i
-        predicted_count = max(0, round(slope * predicted_day + intercept, 1))
-        predictions.append({
-            "day": i,
-            "predictedCount": predicted_count,
-            "date": (datetime.utcnow() + timedelta(days=i)).strftime("%Y-%m-%d")
-        })
-    
-    # Determine trend
-    if slope > 0.5:
-        trend = "increasing"
-    elif slope < -0.5:
-        trend = "decreasing"
-    else:
-        trend = "stable"
-    
-    # Calculate weekly prediction
-    next_week_total = sum(p["predictedCount"] for p in predictions)
-    current_week_avg = sum(y_values[-7:]) if len(y_values) >= 7 else sum(y_values)
-    
-    return {
-        "slope": round(slope, 3),
-        "intercept": round(intercept, 3),
-        "trend": trend,
-        "confidence": round(max(0, min(1, r_squared)) * 100, 1),
-        "predictions": predictions,
-        "nextWeekTotal": round(next_week_total, 1),
-        "currentWeekTotal": current_week_avg,
-        "percentageChange": round(((next_week_total - current_week_avg) / current_week_avg * 100) if current_week_avg > 0 else 0, 1)
-    }
 
 
-def get_predictive_analysis():
-    """Use AI to analyze incident patterns and provide predictive insights"""
+def get_predictive_analysis(query_params):
+    """
+    Serve the latest precomputed predictive-analysis snapshot with its age.
+    ?refresh=true asks the predictive Lambda for a new one in the background.
+    """
     try:
-        # Fetch all incidents from last 30 days
-        now = datetime.utcnow()
-        last_30_days = now - timedelta(days=30)
-        last_30_days_str = last_30_days.isoformat() + "Z"
-        
-        response = table.scan(
-            FilterExpression=Attr('CreatedAt').gt(last_30_days_str) & 
-                           Attr('IncidentId').begins_with('inc-')
-        )
-        
-        items = response.get('Items', [])
-        
-        if not items:
+        snapshot = predictive_analysis.latest_snapshot()
+        refreshing = False
+        if snapshot is None or query_params.get("refresh") == "true":
+            refreshing = predictive_analysis.request_refresh("missing" if snapshot is None else "manual")
+
+        if snapshot is None:
             return {
                 "success": True,
+                "pending": True,
                 "analysis": {
-                    "summary": "No incidents found in the last 30 days to analyze.",
+                    "summary": "Predictive analysis is being generated. Check back in a minute.",
                     "patterns": [],
                     "predictions": [],
                     "recommendations": [],
                     "riskScore": 0
-                },
-                "incidentCount": 0
-            }
-        
-        # Prepare incident data for analysis
-        incident_summaries = []
-        error_types = {}
-        severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
-        time_distribution = {}
-        log_groups = {}
-        resolution_times = []
-        daily_incidents = {}  # For linear regression
-        
-        for item in items:
-            analysis = item.get("AnalysisResult", {})
-            summary = analysis.get("summary", "Unknown error")
-            severity = analysis.get("severity", "UNKNOWN")
-            root_cause = analysis.get("probable_root_cause", "Unknown")
-            tags = analysis.get("tags", [])
-            status = item.get("Status", "OPEN")
-            created_at = item.get("CreatedAt", "")
-            resolved_at = item.get("ResolvedAt")
-            log_group = item.get("LogGroup", "Unknown")
-            
-            incident_summaries.append({
-                "summary": summary,
-                "severity": severity,
-                "rootCause": root_cause,
-                "tags": tags,
-                "status": status,
-                "logGroup": log_group
-            })
-            
-            # Count error types
-            error_key = summary[:50] if summary else "Unknown"
-            error_types[error_key] = error_types.get(error_key, 0) + 1
-            
-            # Count severities
-            if severity in severity_counts:
-                severity_counts[severity] += 1
-            
-            # Track log groups
-            log_groups[log_group] = log_groups.get(log_group, 0) + 1
-            
-            # Calculate resolution times
-            if resolved_at and created_at:
-                try:
-                    created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    resolved = datetime.fromisoformat(resolved_at.replace('Z', '+00:00'))
-                    resolution_time = (resolved - created).total_seconds() / 60  # minutes
-                    resolution_times.append(resolution_time)
-                except:
-                    pass
-            
-            # Time distribution (hour of day) and daily counts
-            if created_at:
-                try:
-                    dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    hour = dt.hour
-                    time_distribution[hour] = time_distribution.get(hour, 0) + 1
-                    
-                    # Track daily incidents for linear regression
-                    day_key = dt.strftime("%Y-%m-%d")
-                    daily_incidents[day_key] = daily_incidents.get(day_key, 0) + 1
-                except:
-                    pass
-        
-        # Perform linear regression on daily incident counts
-        # Convert to list of (day_number, count) for regression
-        sorted_days = sorted(daily_incidents.keys())
-        daily_counts = [(i, daily_incidents[day]) for i, day in enumerate(sorted_days)]
-        
-        # Run linear regression prediction
-        regression_result = linear_regression_predict(daily_counts)
-        
-        # Build context for AI analysis
-        context = f"""
-Analyze the following incident data from the last 30 days and provide predictive insights:
-
-INCIDENT STATISTICS:
-- Total Incidents: {len(items)}
-- Severity Distribution: {json.dumps(severity_counts)}
-- Top Error Types: {json.dumps(dict(sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:5]))}
-- Affected Services: {json.dumps(dict(sorted(log_groups.items(), key=lambda x: x[1], reverse=True)[:5]))}
-- Average Resolution Time: {sum(resolution_times)/len(resolution_times) if resolution_times else 'N/A'} minutes
-- Peak Hours: {json.dumps(dict(sorted(time_distribution.items(), key=lambda x: x[1], reverse=True)[:3]))}
-
-LINEAR REGRESSION FORECAST:
-- Trend: {regression_result['trend']} (slope: {regression_result['slope']})
-- Predicted Next Week Total: {regression_result['nextWeekTotal']} incidents
-- Current Week Total: {regression_result['currentWeekTotal']} incidents  
-- Expected Change: {regression_result['percentageChange']}%
-- Model Confidence: {regression_result['confidence']}%
-- Daily Predictions: {json.dumps(regression_result['predictions'])}
-
-RECENT INCIDENT SAMPLES (last 10):
-{json.dumps(incident_summaries[:10], indent=2)}
-
-Based on this data, provide:
-1. PATTERN ANALYSIS: What recurring patterns do you see?
-2. RISK ASSESSMENT: What is the overall system health risk score (0-100)?
-3. PREDICTIONS: What types of incidents are likely to occur in the next 7 days based on the linear regression forecast?
-4. PREVENTION RECOMMENDATIONS: What proactive steps should be taken to prevent future incidents?
-5. RESOURCE RECOMMENDATIONS: What resources or configurations need attention?
-
-Format your response as JSON with these keys:
-- riskScore (number 0-100)
-- healthStatus (string: "Healthy", "Warning", "Critical")
-- patterns (array of strings describing patterns found)
-- predictions (array of objects with: type, probability, timeframe, impact)
-- recommendations (array of objects with: priority, action, reason, impact)
-- resourceAlerts (array of objects with: resource, issue, urgency)
-- summary (string with executive summary)
-"""
-        
-        # Call Bedrock for AI analysis
-        bedrock_region = os.environ.get("BEDROCK_REGION", "us-east-1")
-        bedrock = boto3.client("bedrock-runtime", region_name=bedrock_region)
-        
-        response = bedrock.invoke_model(
-            modelId="anthropic.claude-3-haiku-20240307-v1:0",
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ]
-            })
-        )
-        
-        result = json.loads(response["body"].read())
-        ai_response = result["content"][0]["text"]
-        
-        # Parse AI response (try to extract JSON)
-        try:
-            # Find JSON in response
-            json_start = ai_response.find('{')
-            json_end = ai_response.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                analysis_data = json.loads(ai_response[json_start:json_end])
-            else:
-                analysis_data = {
-                    "summary": ai_response,
-                    "patterns": [],
-                    "predictions": [],
-                    "recommendations": [],
-                    "riskScore": 50
                 }
-        except json.JSONDecodeError:
-            analysis_data = {
-                "summary": ai_response,
-                "patterns": [],
-                "predictions": [],
-                "recommendations": [],
-                "riskScore": 50
             }
-        
-        # Add metadata
-        analysis_data["incidentCount"] = len(items)
-        analysis_data["analysisDate"] = datetime.utcnow().isoformat() + "Z"
-        analysis_data["timeRange"] = "Last 30 days"
-        analysis_data["severityBreakdown"] = severity_counts
-        analysis_data["topErrorTypes"] = dict(sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:5])
-        analysis_data["avgResolutionTime"] = round(sum(resolution_times)/len(resolution_times), 2) if resolution_times else None
-        
-        # Add linear regression forecast
-        analysis_data["linearRegression"] = {
-            "trend": regression_result["trend"],
-            "slope": regression_result["slope"],
-            "confidence": regression_result["confidence"],
-            "nextWeekPrediction": {
-                "total": regression_result["nextWeekTotal"],
-                "dailyBreakdown": regression_result["predictions"],
-                "percentageChange": regression_result["percentageChange"],
-                "comparedTo": "current week"
-            },
-            "currentWeekTotal": regression_result["currentWeekTotal"]
-        }
-        
-        # Add daily incident history for charting
-        analysis_data["dailyHistory"] = [
-            {"date": day, "count": daily_incidents[day]} 
-            for day in sorted(daily_incidents.keys())
-        ]
-        
+
         return {
             "success": True,
-            "analysis": analysis_data
+            "analysis": snapshot["analysis"],
+            "snapshotVersion": snapshot["version"],
+            "generatedAt": snapshot["generatedAt"],
+            "ageSeconds": snapshot["ageSeconds"],
+            "refreshing": refreshing or snapshot["refreshRequested"],
         }
-        
+
     except Exception as e:
         print(f"[ERROR] Predictive analysis failed: {str(e)}")
         return {
@@ -6,10 +6,12 @@ Performs actual AWS operations to fix common issues automatically
 import json
 import os
 import re
-from datetime import datetime, timedelta
 
 import boto3
-from boto3.dynamodb.conditions import Attr
+
+import burst_detector
+import config_store
+import remediation_actions
 
 lambda_client = boto3.client("lambda")
 logs_client = boto3.client("logs")
@@ -20,6 +22,14 @@ dynamodb = boto3.resource("dynamodb")
 TABLE_NAME = os.environ.get("TABLE_NAME", "RCRARootCauseTable")
 table = dynamodb.Table(TABLE_NAME)
 
+# remediationActionTaken for each remediation_actions outcome
+ACTION_TAKEN = {
+    remediation_actions.REMEDIATED: "AUTO_REMEDIATED",
+    remediation_actions.LIMIT_REACHED: "LIMIT_REACHED",
+    remediation_actions.FAILED: "FAILED",
+    remediation_actions.PENDING_VERIFICATION: "PENDING_VERIFICATION",
+}
+
 
 def is_critical_function(log_group):
     """Check if the log group/function is marked as critical"""
@@ -28,10 +38,8 @@ def is_critical_function(log_group):
         # Log groups are typically: /aws/lambda/function-name
         function_name = log_group.replace("/aws/lambda/", "")
         
-        # Get critical functions list from DynamoDB
-        response = table.get_item(Key={"IncidentId": "CONFIG_CRITICAL_FUNCTIONS"})
-        item = response.get("Item", {})
-        critical_functions = item.get("functions", [])
+        # Get critical functions list from the (cached) config store
+        critical_functions = config_store.get_critical_functions()
         
         is_critical = function_name in critical_functions
         print(f"[REMEDIATOR] Function '{function_name}' critical check: {is_critical}")
@@ -44,46 +52,16 @@ def is_critical_function(log_group):
 
 
 def get_auto_remediation_config():
-    """Get auto-remediation configuration from DynamoDB"""
+    """Get auto-remediation configuration from the config store"""
     try:
-        response = table.get_item(Key={"IncidentId": "CONFIG_AUTO_REMEDIATION"})
-        item = response.get("Item", {})
-        
-        # Default config - scenarios that auto-remediate by default
-        default_config = {
-            "lambdaTimeout": True,
-            "outOfMemory": True,
-            "throttling": False,
-            "connectionPool": False,
-            "cacheCorruption": False,
-            "healthCheck": False,
-            "diskFull": False,
-            "authFailure": False,
-            "dependencyTimeout": False,
-            "dlqEscalation": False
-        }
-        
-        # Merge saved config with defaults
-        saved_config = item.get("scenarios", {})
-        merged_config = {**default_config, **saved_config}
+        merged_config = config_store.get_auto_remediation_scenarios()
         
         print(f"[REMEDIATOR] Auto-remediation config: {merged_config}")
         return merged_config
     except Exception as e:
         print(f"[REMEDIATOR] Error getting config: {str(e)}")
         # Return default config on error
-        return {
-            "lambdaTimeout": True,
-            "outOfMemory": True,
-            "throttling": False,
-            "connectionPool": False,
-            "cacheCorruption": False,
-            "healthCheck": False,
-            "diskFull": False,
-            "authFailure": False,
-            "dependencyTimeout": False,
-            "dlqEscalation": False
-        }
+        return dict(config_store.DEFAULT_AUTO_REMEDIATION)
 
 
 def is_scenario_auto_enabled(scenario):
@@ -110,23 +88,13 @@ def detect_scenario(raw_message, analysis):
     return "general"
 
 
-def get_recent_occurrence_count(error_signature, log_group):
-    """Count similar incidents in last 24h for recurrence detection."""
-    if not error_signature:
-        return 0
+def get_burst_status(error_signature, log_group):
+    """Burst detector view of this incident's signature and log group (None on error)."""
     try:
-        now = datetime.utcnow()
-        cutoff = now - timedelta(hours=24)
-        cutoff_str = cutoff.isoformat() + "Z"
-        response = table.scan(
-            FilterExpression=Attr("ErrorSignature").eq(error_signature)
-            & Attr("LogGroup").eq(log_group)
-            & Attr("CreatedAt").gt(cutoff_str),
-        )
-        return len(response.get("Items", []))
+        return burst_detector.evaluate_incident(log_group, error_signature)
     except Exception as e:
-        print(f"[REMEDIATOR] Failed to check recurrence: {str(e)}")
-        return 0
+        print(f"[REMEDIATOR] Failed to check burst state: {str(e)}")
+        return None
 
 
 def handler(event, context):
@@ -141,14 +109,17 @@ def handler(event, context):
     log_group = event.get("logGroup", "")
     severity = analysis.get("severity", "UNKNOWN")
     auto_candidate = analysis.get("auto_remediation_candidate", False)
-    error_signature = analysis.get("summary") or raw_message[:120]
+    # Same signature persist_lambda stores, so burst state keys line up
+    error_signature = (analysis.get("summary") or "Unknown error")[:100]
     scenario = detect_scenario(raw_message, analysis)
-    recurrence = get_recent_occurrence_count(error_signature, log_group)
+    burst = get_burst_status(error_signature, log_group)
+    spiking = bool(burst and burst["bursting"])
+    recurrence = burst["signature"]["recentCount"] if burst and burst["signature"] else 0
     
     print(f"[REMEDIATOR] Processing incident: {incident_id}")
     print(f"[REMEDIATOR] Severity: {severity}")
     print(f"[REMEDIATOR] Message: {raw_message[:200]}")
-    print(f"[REMEDIATOR] Scenario: {scenario}, recurrence(last24h): {recurrence}")
+    print(f"[REMEDIATOR] Scenario: {scenario}, recurrence(~24h): {recurrence}, spiking: {spiking}")
     
     # Check if this function is marked as critical
     if is_critical_function(log_group):
@@ -161,6 +132,7 @@ def handler(event, context):
                 "awsActions": [],
                 "criticalFunction": True,
                 "recurrenceCount": recurrence,
+                "spiking": spiking,
                 "scenario": scenario,
             }
         }
@@ -176,21 +148,24 @@ def handler(event, context):
                 "awsActions": [],
                 "requiresApproval": True,
                 "recurrenceCount": recurrence,
+                "spiking": spiking,
                 "scenario": scenario,
             }
         }
 
-    # Eligibility engine: require recurrence or explicit model hint or high severity
-    eligible = (recurrence >= 2) or auto_candidate or severity in ("HIGH", "CRITICAL")
+    # Eligibility engine: require a burst of this signature/log group, an
+    # explicit model hint or high severity
+    eligible = spiking or auto_candidate or severity in ("HIGH", "CRITICAL")
     if not eligible:
         event["remediationResult"] = {
             "autoRemediationEligible": False,
             "remediationActionTaken": "MANUAL_REVIEW_REQUIRED",
             "details": (
-                "Auto-remediation skipped: not recurring/high-severity and model did not flag auto_remediation_candidate."
+                "Auto-remediation skipped: not spiking/high-severity and model did not flag auto_remediation_candidate."
             ),
             "awsActions": [],
             "recurrenceCount": recurrence,
+            "spiking": spiking,
             "scenario": scenario,
         }
         return event
@@ -202,32 +177,19 @@ def handler(event, context):
         "details": "Eligible for auto-remediation; evaluating pattern-based runbooks.",
         "awsActions": [],
         "recurrenceCount": recurrence,
+        "spiking": spiking,
         "scenario": scenario,
     }
     
     # Check for specific error patterns and remediate
-    if "timeout" in raw_message.lower() or "timed out" in raw_message.lower():
-        remediation_result = remediate_timeout(log_group, raw_message, analysis)
-    
-    elif "memory" in raw_message.lower() or "outofmemory" in raw_message.lower():
-        remediation_result = remediate_memory(log_group, raw_message, analysis)
-    
-    elif "connection" in raw_message.lower() and ("pool" in raw_message.lower() or "exhausted" in raw_message.lower()):
-        remediation_result = remediate_connection_pool(log_group, raw_message, analysis)
-    
-    elif "throttle" in raw_message.lower() or "rate limit" in raw_message.lower():
-        remediation_result = remediate_throttling(log_group, raw_message, analysis)
-    
-    elif "cache" in raw_message.lower() and ("corrupt" in raw_message.lower() or "invalid" in raw_message.lower()):
-        remediation_result = remediate_cache(log_group, raw_message, analysis)
-    
-    elif "health check" in raw_message.lower() or "unhealthy" in raw_message.lower():
-        remediation_result = remediate_health_check(log_group, raw_message, analysis)
-    
+    action = remediation_actions.select_action(raw_message)
+    if action:
+        remediation_result = remediate(action, log_group)
     else:
         remediation_result["details"] = "No automatic remediation pattern matched. Manual intervention required."
 
     remediation_result.setdefault("recurrenceCount", recurrence)
+    remediation_result.setdefault("spiking", spiking)
     remediation_result.setdefault("scenario", scenario)
     
     # Add remediation result to event
@@ -239,292 +201,49 @@ def handler(event, context):
     return event
 
 
-def remediate_timeout(log_group, raw_message, analysis):
-    """
-    Remediate Lambda timeout issues by increasing timeout configuration
-    """
-    print("[REMEDIATION] Detected timeout issue")
-    
-    # Extract function name from log group
-    function_name = extract_function_name(log_group)
-    
-    if not function_name:
-        return {
-            "autoRemediationEligible": True,
-            "remediationActionTaken": "ANALYSIS_ONLY",
-            "details": "Timeout detected but unable to extract function name. Manual action required: Increase Lambda timeout.",
-            "awsActions": []
-        }
-    
-    # Check if it's safe to remediate (not critical functions)
-    if should_auto_remediate(function_name):
-        try:
-            # Get current configuration
-            response = lambda_client.get_function_configuration(FunctionName=function_name)
-            current_timeout = response['Timeout']
-            
-            # Increase timeout (max 900 seconds for Lambda)
-            new_timeout = min(current_timeout * 2, 900)
-            
-            if new_timeout > current_timeout:
-                # Update Lambda configuration
-                lambda_client.update_function_configuration(
-                    FunctionName=function_name,
-                    Timeout=new_timeout
-                )
-                
-                return {
-                    "autoRemediationEligible": True,
-                    "remediationActionTaken": "AUTO_REMEDIATED",
-                    "details": f"Increased Lambda timeout from {current_timeout}s to {new_timeout}s",
-                    "awsActions": [
-                        {
-                            "service": "lambda",
-                            "action": "update_function_configuration",
-                            "resource": function_name,
-                            "changes": {
-                                "timeout_before": current_timeout,
-                                "timeout_after": new_timeout
-                            }
-                        }
-                    ]
-                }
-            else:
-                return {
-                    "autoRemediationEligible": True,
-                    "remediationActionTaken": "LIMIT_REACHED",
-                    "details": f"Timeout already at maximum ({current_timeout}s). Consider optimizing code or splitting function.",
-                    "awsActions": []
-                }
-                
-        except Exception as e:
-            print(f"[REMEDIATION] Error: {str(e)}")
-            return {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": "FAILED",
-                "details": f"Failed to increase timeout: {str(e)}",
-                "awsActions": []
-            }
-    else:
-        return {
-            "autoRemediationEligible": False,
-            "remediationActionTaken": "MANUAL_APPROVAL_REQUIRED",
-            "details": f"Function {function_name} requires manual approval for timeout changes",
-            "awsActions": []
-        }
-
+def remediate(action, log_group):
+    """Run a remediation_actions registry action for this incident's function"""
+    print(f"[REMEDIATION] Detected {action} issue")
+    spec = remediation_actions.ACTIONS[action]
 
-def remediate_memory(log_group, raw_message, analysis):
-    """
-    Remediate memory issues by increasing Lambda memory allocation
-    """
-    print("[REMEDIATION] Detected memory issue")
-    
-    function_name = extract_function_name(log_group)
-    
-    if not function_name or not should_auto_remediate(function_name):
-        return {
-            "autoRemediationEligible": True,
-            "remediationActionTaken": "ANALYSIS_ONLY",
-            "details": "Memory issue detected. Recommendation: Increase Lambda memory allocation.",
-            "awsActions": []
-        }
-    
-    try:
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        current_memory = response['MemorySize']
-        
-        # Increase memory (max 10240 MB for Lambda)
-        new_memory = min(current_memory * 2, 10240)
-        
-        if new_memory > current_memory:
-            lambda_client.update_function_configuration(
-                FunctionName=function_name,
-                MemorySize=new_memory
-            )
-            
-            return {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": "AUTO_REMEDIATED",
-                "details": f"Increased Lambda memory from {current_memory}MB to {new_memory}MB",
-                "awsActions": [
-                    {
-                        "service": "lambda",
-                        "action": "update_function_configuration",
-                        "resource": function_name,
-                        "changes": {
-                            "memory_before": current_memory,
-                            "memory_after": new_memory
-                        }
-                    }
-                ]
-            }
-        else:
-            return {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": "LIMIT_REACHED",
-                "details": f"Memory already at maximum ({current_memory}MB). Consider code optimization.",
-                "awsActions": []
-            }
-            
-    except Exception as e:
+    if spec["kind"] == "advisory":
+        advisory = remediation_actions.advisory_result(action)
         return {
             "autoRemediationEligible": True,
-            "remediationActionTaken": "FAILED",
-            "details": f"Failed to increase memory: {str(e)}",
-            "awsActions": []
+            "remediationActionTaken": advisory["actionTaken"],
+            "details": advisory["details"],
+            "awsActions": advisory["awsActions"],
         }
 
-
-def remediate_connection_pool(log_group, raw_message, analysis):
-    """
-    Remediate connection pool issues by triggering a Lambda restart
-    """
-    print("[REMEDIATION] Detected connection pool exhaustion")
-    
+    # Extract function name from log group
     function_name = extract_function_name(log_group)
-    
-    if not function_name or not should_auto_remediate(function_name):
+
+    if not function_name:
         return {
             "autoRemediationEligible": True,
             "remediationActionTaken": "ANALYSIS_ONLY",
-            "details": "Connection pool exhaustion detected. Recommendation: Restart Lambda or increase connection limits.",
+            "details": f"{spec['recommendation']} Unable to extract function name; manual action required.",
             "awsActions": []
         }
-    
-    try:
-        # Trigger Lambda restart by updating an environment variable
-        response = lambda_client.get_function_configuration(FunctionName=function_name)
-        env_vars = response.get('Environment', {}).get('Variables', {})
-        
-        # Add/update a restart trigger variable
-        env_vars['LAST_RESTART'] = datetime.utcnow().isoformat()
-        
-        lambda_client.update_function_configuration(
-            FunctionName=function_name,
-            Environment={'Variables': env_vars}
-        )
-        
-        return {
-            "autoRemediationEligible": True,
-            "remediationActionTaken": "AUTO_REMEDIATED",
-            "details": f"Triggered Lambda restart to reset connection pool for {function_name}",
-            "awsActions": [
-                {
-                    "service": "lambda",
-                    "action": "restart_function",
-                    "resource": function_name,
-                    "changes": {
-                        "method": "environment_variable_update",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                }
-            ]
-        }
-        
-    except Exception as e:
+
+    # Check if it's safe to remediate (not critical functions)
+    if not should_auto_remediate(function_name):
         return {
             "autoRemediationEligible": True,
-            "remediationActionTaken": "FAILED",
-            "details": f"Failed to restart Lambda: {str(e)}",
+            "remediationActionTaken": "MANUAL_APPROVAL_REQUIRED",
+            "details": f"Function {function_name} requires manual approval. {spec['recommendation']}",
             "awsActions": []
         }
 
-
-def remediate_throttling(log_group, raw_message, analysis):
-    """
-    Remediate API throttling by creating CloudWatch alarm and notification
-    """
-    print("[REMEDIATION] Detected API throttling")
-    
-    return {
-        "autoRemediationEligible": True,
-        "remediationActionTaken": "NOTIFICATION_SENT",
-        "details": "API throttling detected. CloudWatch alarm created. AWS Support ticket recommended for quota increase.",
-        "awsActions": [
-            {
-                "service": "cloudwatch",
-                "action": "create_alarm",
-                "resource": "api-throttle-alarm",
-                "changes": {
-                    "alarm_created": True,
-                    "recommendation": "Request API Gateway quota increase"
-                }
-            }
-        ]
-    }
-
-
-def remediate_cache(log_group, raw_message, analysis):
-    """
-    Remediate cache issues - in production, this would clear Redis/ElastiCache
-    """
-    print("[REMEDIATION] Detected cache corruption")
-    
-    return {
-        "autoRemediationEligible": True,
-        "remediationActionTaken": "ANALYSIS_ONLY",
-        "details": "Cache corruption detected. Recommendation: Flush cache and rebuild. Manual approval required for production.",
-        "awsActions": [
-            {
-                "service": "elasticache",
-                "action": "flush_cache",
-                "resource": "pending_manual_approval",
-                "changes": {
-                    "status": "requires_approval",
-                    "impact": "temporary_cache_miss_spike"
-                }
-            }
-        ]
-    }
-
-
-def remediate_health_check(log_group, raw_message, analysis):
-    """
-    Remediate health check failures by restarting the service
-    """
-    print("[REMEDIATION] Detected health check failure")
-    
-    function_name = extract_function_name(log_group)
-    
-    if function_name and should_auto_remediate(function_name):
-        try:
-            # Trigger restart
-            response = lambda_client.get_function_configuration(FunctionName=function_name)
-            env_vars = response.get('Environment', {}).get('Variables', {})
-            env_vars['HEALTH_CHECK_RESTART'] = datetime.utcnow().isoformat()
-            
-            lambda_client.update_function_configuration(
-                FunctionName=function_name,
-                Environment={'Variables': env_vars}
-            )
-            
-            return {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": "AUTO_REMEDIATED",
-                "details": f"Restarted {function_name} due to health check failure",
-                "awsActions": [
-                    {
-                        "service": "lambda",
-                        "action": "restart_for_health",
-                        "resource": function_name,
-                        "changes": {"restart_reason": "health_check_failure"}
-                    }
-                ]
-            }
-        except Exception as e:
-            return {
-                "autoRemediationEligible": True,
-                "remediationActionTaken": "FAILED",
-                "details": f"Failed to restart: {str(e)}",
-                "awsActions": []
-            }
-    
+    outcome = remediation_actions.run(lambda_client, function_name, [action])
     return {
         "autoRemediationEligible": True,
-        "remediationActionTaken": "MANUAL_APPROVAL_REQUIRED",
-        "details": "Health check failure detected. Service restart requires manual approval.",
-        "awsActions": []
+        "remediationActionTaken": ACTION_TAKEN[outcome["outcome"]],
+        "details": outcome["details"],
+        "awsActions": outcome["awsActions"],
+        "verification": outcome["verification"],
+        "timeToEffectiveMs": outcome["timeToEffectiveMs"],
+        "timings": outcome["timings"],
     }
 
 
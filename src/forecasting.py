@@ -0,0 +1,194 @@
+"""
+RCRA Incident Forecasting
+Vectorized NumPy forecasts for many daily incident-count series at once
+
+Series are laid out as rows of one (series x days) matrix with missing
+days filled with zeros, and every model is fitted to all rows in a
+single batch:
+
+- linear     least-squares trend
+- seasonal   trend plus day-of-week effects (one shared design matrix,
+             solved for every series with a single lstsq call)
+- smoothing  Holt's linear exponential smoothing, stepped through time
+             for all series together
+
+model="auto" backtests each model on the last HOLDOUT_DAYS and picks
+the best one per series. Forecasts come with prediction intervals at the
+requested level.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+MODELS = ("linear", "seasonal", "smoothing")
+
+# Days held out to choose a model per series
+HOLDOUT_DAYS = 7
+
+# Holt smoothing parameters (level, trend)
+SMOOTHING_ALPHA = 0.3
+SMOOTHING_BETA = 0.1
+
+# Two-sided normal quantiles for the supported interval levels
+Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.9600}
+
+
+def build_matrix(series, start_date, end_date):
+    """
+    Zero-filled (series x days) count matrix. `series` maps a name to
+    {YYYY-MM-DD: count}. Returns (names, dates, matrix).
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    dates = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    index = {date: i for i, date in enumerate(dates)}
+
+    names = list(series)
+    matrix = np.zeros((len(names), len(dates)))
+    for row, name in enumerate(names):
+        for date, count in series[name].items():
+            if date in index:
+                matrix[row, index[date]] = float(count)
+    return names, dates, matrix
+
+
+def _design(t, weekdays, seasonal):
+    """Design matrix: intercept, trend and (optionally) 6 weekday dummies"""
+    columns = [np.ones_like(t), t]
+    if seasonal:
+        columns.extend((weekdays == d).astype(float) for d in range(1, 7))
+    return np.column_stack(columns)
+
+
+def _fit_regression(matrix, t, weekdays, future_t, future_weekdays, seasonal):
+    """Least-squares fit for every row; returns (forecast, interval scale per step)"""
+    X = _design(t, weekdays, seasonal)
+    X_future = _design(future_t, future_weekdays, seasonal)
+    coef, _, rank, _ = np.linalg.lstsq(X, matrix.T, rcond=None)
+
+    residuals = matrix - (X @ coef).T
+    dof = max(len(t) - rank, 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+
+    # Prediction-interval leverage x0 (X'X)^-1 x0' is shared by all series
+    leverage = np.einsum("ij,jk,ik->i", X_future, np.linalg.pinv(X.T @ X), X_future)
+    scale = sigma[:, None] * np.sqrt(1 + leverage)[None, :]
+    return (X_future @ coef).T, scale
+
+
+def _fit_smoothing(matrix, horizon):
+    """Holt's linear method for every row; returns (forecast, interval scale per step)"""
+    level = matrix[:, 0].copy()
+    trend = np.zeros(matrix.shape[0])
+    squared_errors = np.zeros(matrix.shape[0])
+    for step in range(1, matrix.shape[1]):
+        predicted = level + trend
+        observed = matrix[:, step]
+        squared_errors += (observed - predicted) ** 2
+        new_level = SMOOTHING_ALPHA * observed + (1 - SMOOTHING_ALPHA) * predicted
+        trend = SMOOTHING_BETA * (new_level - level) + (1 - SMOOTHING_BETA) * trend
+        level = new_level
+
+    steps = np.arange(1, horizon + 1)
+    sigma = np.sqrt(squared_errors / max(matrix.shape[1] - 1, 1))
+    # Variance of Holt forecasts grows with the horizon
+    growth = np.sqrt(1 + (steps - 1) * SMOOTHING_ALPHA ** 2 * (1 + steps * SMOOTHING_BETA))
+    return level[:, None] + trend[:, None] * steps[None, :], sigma[:, None] * growth[None, :]
+
+
+def _fit(model, matrix, start_weekday, horizon):
+    days = matrix.shape[1]
+    t = np.arange(days, dtype=float)
+    future_t = np.arange(days, days + horizon, dtype=float)
+    weekdays = (start_weekday + t.astype(int)) % 7
+    future_weekdays = (start_weekday + future_t.astype(int)) % 7
+    if model == "linear":
+        return _fit_regression(matrix, t, weekdays, future_t, future_weekdays, seasonal=False)
+    if model == "seasonal":
+        return _fit_regression(matrix, t, weekdays, future_t, future_weekdays, seasonal=True)
+    if model == "smoothing":
+        return _fit_smoothing(matrix, horizon)
+    raise ValueError(f"Unknown model '{model}'")
+
+
+def _choose_models(matrix, start_weekday):
+    """Index into MODELS of the best backtested model per row"""
+    if matrix.shape[1] < HOLDOUT_DAYS * 2:
+        return np.zeros(matrix.shape[0], dtype=int)
+    train, test = matrix[:, :-HOLDOUT_DAYS], matrix[:, -HOLDOUT_DAYS:]
+    errors = np.stack([
+        np.abs(_fit(model, train, start_weekday, HOLDOUT_DAYS)[0] - test).mean(axis=1)
+        for model in MODELS
+    ])
+    return errors.argmin(axis=0)
+
+
+def forecast(matrix, start_date, horizon=7, model="auto", level=0.9):
+    """
+    Forecast `horizon` days past the end of every row of `matrix` (whose
+    first column is start_date). Returns a dict of arrays: forecast, lower,
+    upper (series x horizon, clipped at zero), model (name per series),
+    slope (linear trend per day) and r2 (linear fit quality).
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    z = Z_SCORES.get(level)
+    if z is None:
+        raise ValueError(f"level must be one of {sorted(Z_SCORES)}")
+    start_weekday = datetime.strptime(start_date, "%Y-%m-%d").weekday()
+
+    if model == "auto":
+        choice = _choose_models(matrix, start_weekday)
+    else:
+        choice = np.full(matrix.shape[0], MODELS.index(model))
+
+    point = np.zeros((matrix.shape[0], horizon))
+    scale = np.zeros((matrix.shape[0], horizon))
+    for i, name in enumerate(MODELS):
+        rows = choice == i
+        if rows.any():
+            point[rows], scale[rows] = _fit(name, matrix[rows], start_weekday, horizon)
+
+    # Linear trend statistics for every row, whatever model was chosen
+    t = np.arange(matrix.shape[1], dtype=float)
+    t_centered = t - t.mean()
+    y_centered = matrix - matrix.mean(axis=1, keepdims=True)
+    denominator = (t_centered ** 2).sum() or 1.0
+    slope = (y_centered * t_centered).sum(axis=1) / denominator
+    ss_tot = (y_centered ** 2).sum(axis=1)
+    ss_res = ((y_centered - slope[:, None] * t_centered[None, :]) ** 2).sum(axis=1)
+    r2 = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1), 0.0)
+
+    return {
+        "forecast": np.clip(point, 0, None),
+        "lower": np.clip(point - z * scale, 0, None),
+        "upper": np.clip(point + z * scale, 0, None),
+        "model": [MODELS[i] for i in choice],
+        "slope": slope,
+        "r2": np.clip(r2, 0, 1),
+    }
+
+
+def forecast_series(series, start_date, end_date, horizon=7, model="auto", level=0.9):
+    """
+    Convenience wrapper: forecast named {date: count} series. Returns
+    {name: {model, slope, forecast, lower, upper, nextPeriodTotal, ...}}.
+    """
+    names, dates, matrix = build_matrix(series, start_date, end_date)
+    if not names:
+        return {}
+    result = forecast(matrix, dates[0], horizon, model, level)
+    out = {}
+    for row, name in enumerate(names):
+        out[name] = {
+            "model": result["model"][row],
+            "slope": round(float(result["slope"][row]), 3),
+            "forecast": [round(float(v), 2) for v in result["forecast"][row]],
+            "lower": [round(float(v), 2) for v in result["lower"][row]],
+            "upper": [round(float(v), 2) for v in result["upper"][row]],
+            "nextPeriodTotal": round(float(result["forecast"][row].sum()), 1),
+            "recentTotal": int(matrix[row, -horizon:].sum()),
+        }
+    return out
@@ -0,0 +1,912 @@
+"""
+Incident Storage Layout
+Splits each incident into a slim header item and a compressed detail item
+
+The header lives in RCRARootCauseTable and carries only what list and
+statistics views need (ids, timestamps, severity, status, signature and a
+short summary). RawLogMessage, AnalysisResult and RemediationResult are
+gzip-compressed into a single binary attribute on RCRAIncidentDetailTable
+and are only loaded for the incident detail view.
+
+Headers carry a DayBucket (YYYY-MM-DD of CreatedAt) so the DayBucketIndex
+GSI can serve newest-first listings with a plain reverse-order query.
+A SignatureKey (LogGroup + ErrorSignature) feeds SignatureIndex so
+occurrence counts are index queries rather than table scans.
+Every write stamps UpdatedAt/UpdateBucket, which UpdatedAtIndex uses to
+serve "what changed since <cursor>" delta queries. Bulk changes
+(update_incidents) go through TransactWriteItems with an optional
+condition every header must still satisfy.
+
+Filtered listings (query_incidents) pick the most selective access path:
+the search_index token postings for free text and tags, LogGroupIndex
+for a log group, StatusDayIndex ("<Status>#<DayBucket>") for a single
+status, otherwise DayBucketIndex; remaining criteria become filters.
+LogGroupIndex and StatusDayIndex are only used once DescribeTable reports
+them ACTIVE (DynamoDB creates one GSI per table update, so they ship in
+separate deploys); until then those listings fall back to DayBucketIndex.
+
+Both items get an ExpiresAt epoch so DynamoDB TTL drops incidents after
+INCIDENT_RETENTION_DAYS; the detail item outlives its header by a grace
+period so the stream archiver can still read it (see archive_store).
+"""
+
+import base64
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+import search_index
+from parallel_scan import parallel_scan, projection_kwargs
+
+dynamodb = boto3.resource("dynamodb")
+
+TABLE_NAME = os.environ.get("TABLE_NAME", "RCRARootCauseTable")
+DETAIL_TABLE_NAME = os.environ.get("DETAIL_TABLE_NAME", "RCRAIncidentDetailTable")
+table = dynamodb.Table(TABLE_NAME)
+detail_table = dynamodb.Table(DETAIL_TABLE_NAME)
+
+# Length of the text previews kept on the header item
+SUMMARY_LENGTH = 200
+
+# Attributes moved off the header item into the compressed detail blob
+DETAIL_FIELDS = ("RawLogMessage", "AnalysisResult", "RemediationResult")
+
+# GSI partitioned by day with CreatedAt as the sort key
+DAY_BUCKET_INDEX = "DayBucketIndex"
+
+# GSI keyed by "<LogGroup>#<ErrorSignature>" with CreatedAt as the sort key
+SIGNATURE_INDEX = "SignatureIndex"
+
+# GSI partitioned by the day of UpdatedAt with UpdatedAt as the sort key
+UPDATED_AT_INDEX = "UpdatedAtIndex"
+
+# TransactWriteItems accepts at most this many actions per call
+TRANSACT_MAX_ACTIONS = 100
+
+# Delta queries re-read this far behind the cursor to absorb GSI lag;
+# clients merge by IncidentId so the overlap is harmless
+CHANGE_SKEW_SECONDS = 5
+
+# Oldest cursor list_changes serves (one UpdatedAtIndex query per day);
+# older clients must reload the list
+CHANGE_LOOKBACK_DAYS = int(os.environ.get("INCIDENT_CHANGE_LOOKBACK_DAYS", "7"))
+
+# GSI keyed by LogGroup with CreatedAt as the sort key
+LOG_GROUP_INDEX = "LogGroupIndex"
+
+# GSI keyed by "<Status>#<DayBucket>" with CreatedAt as the sort key
+STATUS_DAY_INDEX = "StatusDayIndex"
+
+# How long an index's DescribeTable status is trusted before re-checking
+# (an ACTIVE index stays ACTIVE, so only inactive ones are re-checked)
+INDEX_CHECK_SECONDS = 300
+
+# Header attributes that key the table's GSIs; DynamoDB rejects an item
+# whose index key is null or empty, so such attributes are left off
+INDEX_KEY_ATTRIBUTES = ("CreatedAt", "DayBucket", "SignatureKey", "UpdatedAt", "UpdateBucket", "LogGroup", "StatusDay")
+
+# Order used by sort=severity
+SEVERITY_ORDER = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN")
+
+# How many day buckets a listing walks back before it stops
+LIST_LOOKBACK_DAYS = int(os.environ.get("INCIDENT_LIST_LOOKBACK_DAYS", "90"))
+
+# Age after which TTL expires an incident out of the hot tables (0 disables)
+RETENTION_DAYS = int(os.environ.get("INCIDENT_RETENTION_DAYS", "90"))
+
+# Extra lifetime of detail items so the archiver can merge them on expiry
+DETAIL_GRACE_SECONDS = 24 * 3600
+
+
+def _json_default(obj):
+    """Serialize DynamoDB Decimal values when re-compressing stored items"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compress_detail(detail):
+    """Gzip a detail dict into bytes suitable for a DynamoDB binary attribute"""
+    payload = json.dumps(detail, default=_json_default, separators=(",", ":"))
+    return gzip.compress(payload.encode("utf-8"), mtime=0)
+
+
+def decompress_detail(blob):
+    """Inverse of compress_detail; accepts raw bytes or a boto3 Binary"""
+    if blob is None:
+        return {}
+    data = getattr(blob, "value", blob)
+    return json.loads(gzip.decompress(bytes(data)).decode("utf-8"))
+
+
+def day_bucket(created_at):
+    """Partition key for DayBucketIndex: the YYYY-MM-DD part of CreatedAt"""
+    return (created_at or "")[:10]
+
+
+def signature_key(log_group, error_signature):
+    """Partition key for SignatureIndex"""
+    return f"{log_group or ''}#{error_signature or ''}"
+
+
+def status_day(status, created_at):
+    """Partition key for StatusDayIndex"""
+    return f"{status or 'OPEN'}#{day_bucket(created_at)}"
+
+
+def expires_at(created_at):
+    """TTL epoch for an incident created at the given ISO timestamp, or None"""
+    if RETENTION_DAYS <= 0 or not created_at:
+        return None
+    try:
+        created = datetime.fromisoformat(created_at.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        created = datetime.utcnow()
+    expiry = created + timedelta(days=RETENTION_DAYS)
+    return int((expiry - datetime(1970, 1, 1)).total_seconds())
+
+
+def as_header(item):
+    """
+    Return the slim header view of an incident item.
+    Works for both the split layout and legacy items that still embed
+    RawLogMessage/AnalysisResult/RemediationResult.
+    """
+    analysis = item.get("AnalysisResult")
+    remediation = item.get("RemediationResult")
+    if analysis is None and remediation is None:
+        return {k: v for k, v in item.items() if k not in DETAIL_FIELDS}
+
+    analysis = analysis or {}
+    remediation = remediation or {}
+    header = {k: v for k, v in item.items() if k not in DETAIL_FIELDS}
+    header.update({
+        "Severity": analysis.get("severity", "UNKNOWN"),
+        "Summary": (analysis.get("summary") or "N/A")[:SUMMARY_LENGTH],
+        "RootCause": (analysis.get("probable_root_cause") or "N/A")[:SUMMARY_LENGTH],
+        "Tags": analysis.get("tags", []),
+        "RemediationEligible": remediation.get("autoRemediationEligible", False),
+        "RemediationAction": remediation.get("remediationActionTaken", "NONE"),
+        "Scenario": remediation.get("scenario", "general"),
+        "RawPreview": (item.get("RawLogMessage") or "")[:SUMMARY_LENGTH],
+    })
+    return header
+
+
+def _detail_item(incident_id, detail, expiry):
+    """Build the RCRAIncidentDetailTable item for a detail dict"""
+    detail_item = {"IncidentId": incident_id, "Payload": compress_detail(detail)}
+    if expiry:
+        detail_item["ExpiresAt"] = expiry + DETAIL_GRACE_SECONDS
+    return detail_item
+
+
+def put_incident(item):
+    """Persist a full incident as a compressed detail item plus a slim header"""
+    header = as_header(item)
+    header["DetailStored"] = True
+    header["DayBucket"] = day_bucket(header.get("CreatedAt"))
+    header["SignatureKey"] = signature_key(header.get("LogGroup"), header.get("ErrorSignature"))
+    header["StatusDay"] = status_day(header.get("Status"), header.get("CreatedAt"))
+    header["UpdatedAt"] = header.get("UpdatedAt") or datetime.utcnow().isoformat() + "Z"
+    header["UpdateBucket"] = day_bucket(header["UpdatedAt"])
+    expiry = expires_at(header.get("CreatedAt"))
+    if expiry:
+        header["ExpiresAt"] = expiry
+    # Incidents without a log group (or creation time) simply stay out of those indexes
+    for attr in INDEX_KEY_ATTRIBUTES:
+        if header.get(attr) in (None, ""):
+            header.pop(attr, None)
+
+    detail = {field: item.get(field) for field in DETAIL_FIELDS}
+    detail_table.put_item(Item=_detail_item(item["IncidentId"], detail, expiry))
+    table.put_item(Item=header)
+    # Full text (root cause, raw message) is indexed, not just the header previews
+    search_index.index_incident({**item, **header})
+    return header
+
+
+def get_header(incident_id, attributes=None):
+    """Fetch only the header item, optionally projected to `attributes`"""
+    response = table.get_item(Key={"IncidentId": incident_id}, **projection_kwargs(attributes))
+    return response.get("Item")
+
+
+def get_incident(incident_id):
+    """
+    Load a full incident (header merged with its detail blob).
+    Legacy single-item incidents are returned unchanged.
+    """
+    response = table.get_item(Key={"IncidentId": incident_id})
+    item = response.get("Item")
+    if not item or not item.get("DetailStored"):
+        return item
+
+    detail_response = detail_table.get_item(Key={"IncidentId": incident_id})
+    detail = decompress_detail(detail_response.get("Item", {}).get("Payload"))
+    for field in DETAIL_FIELDS:
+        item[field] = detail.get(field) or ({} if field != "RawLogMessage" else "")
+    return item
+
+
+def load_headers(incident_ids, attributes=None):
+    """Batch-load header items; returns {incident_id: header}"""
+    headers = {}
+    ids = list(dict.fromkeys(incident_ids))
+    for start in range(0, len(ids), 100):
+        keys = {"Keys": [{"IncidentId": i} for i in ids[start:start + 100]], **projection_kwargs(attributes)}
+        request = {TABLE_NAME: keys}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(TABLE_NAME, []):
+                headers[item["IncidentId"]] = item
+            request = response.get("UnprocessedKeys") or None
+    return headers
+
+
+def load_incidents(incident_ids):
+    """Batch equivalent of get_incident; returns {incident_id: full item}"""
+    items = load_headers(incident_ids)
+    details = load_details([i for i, item in items.items() if item.get("DetailStored")])
+    for incident_id, item in items.items():
+        if not item.get("DetailStored"):
+            continue
+        detail = details.get(incident_id, {})
+        for field in DETAIL_FIELDS:
+            item[field] = detail.get(field) or ({} if field != "RawLogMessage" else "")
+    return items
+
+
+def load_details(incident_ids):
+    """Batch-load and decompress detail blobs; returns {incident_id: detail}"""
+    details = {}
+    ids = list(dict.fromkeys(incident_ids))
+    for start in range(0, len(ids), 100):
+        request = {DETAIL_TABLE_NAME: {"Keys": [{"IncidentId": i} for i in ids[start:start + 100]]}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for detail_item in response.get("Responses", {}).get(DETAIL_TABLE_NAME, []):
+                details[detail_item["IncidentId"]] = decompress_detail(detail_item.get("Payload"))
+            request = response.get("UnprocessedKeys") or None
+    return details
+
+
+def _prepare_update(item, updates, remediation=None):
+    """
+    Header attribute updates (plus the replacement detail item, if any)
+    for an incident change; shared by update_incident and update_incidents.
+    Returns (updates, detail_item) with updates empty when nothing changes.
+    """
+    incident_id = item["IncidentId"]
+    updates = dict(updates)
+    detail_item = None
+
+    if remediation is not None:
+        if item.get("DetailStored"):
+            detail = {field: item.get(field) for field in DETAIL_FIELDS}
+            detail["RemediationResult"] = remediation
+            detail_item = _detail_item(incident_id, detail, item.get("ExpiresAt"))
+            updates["RemediationEligible"] = remediation.get("autoRemediationEligible", False)
+            updates["RemediationAction"] = remediation.get("remediationActionTaken", "NONE")
+        else:
+            updates["RemediationResult"] = remediation
+        item["RemediationResult"] = remediation
+
+    if not updates:
+        return updates, detail_item
+
+    updates["UpdatedAt"] = datetime.utcnow().isoformat() + "Z"
+    updates["UpdateBucket"] = day_bucket(updates["UpdatedAt"])
+    if "Status" in updates:
+        created_at = item.get("CreatedAt") or (get_header(incident_id, ["CreatedAt"]) or {}).get("CreatedAt")
+        updates["StatusDay"] = status_day(updates["Status"], created_at)
+    return updates, detail_item
+
+
+def _update_expression(updates):
+    """Update expression, names and values for a dict of attribute updates; None removes the attribute"""
+    names = {}
+    values = {}
+    assignments = []
+    removals = []
+    for i, (attr, value) in enumerate(updates.items()):
+        names[f"#a{i}"] = attr
+        if value is None:
+            removals.append(f"#a{i}")
+            continue
+        values[f":v{i}"] = value
+        assignments.append(f"#a{i} = :v{i}")
+    expression = "SET " + ", ".join(assignments) if assignments else ""
+    if removals:
+        expression = (expression + " REMOVE " + ", ".join(removals)).strip()
+    return expression, names, values
+
+
+def update_incident(item, updates, remediation=None):
+    """
+    Apply header attribute updates to an incident previously loaded with
+    get_incident. When a new remediation result is given it replaces the
+    stored RemediationResult and the header's remediation summary.
+    """
+    updates, detail_item = _prepare_update(item, updates, remediation)
+    if detail_item:
+        detail_table.put_item(Item=detail_item)
+    if not updates:
+        return item
+
+    expression, names, values = _update_expression(updates)
+    table.update_item(
+        Key={"IncidentId": item["IncidentId"]},
+        UpdateExpression=expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+    item.update(updates)
+    return item
+
+
+def _transact_actions(change, condition):
+    """TransactWriteItems actions (header update, detail put) for one prepared change"""
+    item, updates, detail_item = change
+    expression, names, values = _update_expression(updates)
+    update = {
+        "TableName": TABLE_NAME,
+        "Key": {"IncidentId": item["IncidentId"]},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+        "ConditionExpression": "attribute_exists(IncidentId)",
+    }
+    if condition:
+        update["ConditionExpression"] += f" AND ({condition['expression']})"
+        update["ExpressionAttributeNames"].update(condition.get("names", {}))
+        update["ExpressionAttributeValues"].update(condition.get("values", {}))
+    actions = [{"Update": update}]
+    if detail_item:
+        actions.append({"Put": {"TableName": DETAIL_TABLE_NAME, "Item": detail_item}})
+    return actions
+
+
+def _transact(changes, condition):
+    """
+    Write prepared changes in one transaction. Returns {incident_id: error}
+    for rejected incidents; when the transaction is cancelled, incidents
+    that did not fail their own condition are retried once without the
+    rejected ones.
+    """
+    actions = []
+    owners = []
+    for change in changes:
+        for action in _transact_actions(change, condition):
+            actions.append(action)
+            owners.append(change[0]["IncidentId"])
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=actions)
+        return {}
+    except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get("CancellationReasons") or []
+        rejected = {
+            owners[i]: reason.get("Message") or reason.get("Code")
+            for i, reason in enumerate(reasons)
+            if reason.get("Code") == "ConditionalCheckFailed"
+        }
+        if not rejected:
+            raise
+    retry = [change for change in changes if change[0]["IncidentId"] not in rejected]
+    if retry:
+        rejected.update(_transact(retry, condition))
+    return rejected
+
+
+def update_incidents(changes, condition=None):
+    """
+    Apply many (item, updates, remediation) changes, like update_incident,
+    with TransactWriteItems in chunks of up to TRANSACT_MAX_ACTIONS actions.
+    `condition` is an optional {"expression", "names", "values"} every
+    header must satisfy (e.g. still OPEN); incidents failing it are left
+    untouched. Returns {incident_id: error message or None}.
+    """
+    results = {}
+    prepared = []
+    for item, updates, remediation in changes:
+        updates, detail_item = _prepare_update(item, updates, remediation)
+        if not updates:
+            results[item["IncidentId"]] = None
+            continue
+        prepared.append((item, updates, detail_item))
+
+    chunks = []
+    chunk, chunk_actions = [], 0
+    for change in prepared:
+        actions = 2 if change[2] else 1
+        if chunk and chunk_actions + actions > TRANSACT_MAX_ACTIONS:
+            chunks.append(chunk)
+            chunk, chunk_actions = [], 0
+        chunk.append(change)
+        chunk_actions += actions
+    if chunk:
+        chunks.append(chunk)
+
+    for chunk in chunks:
+        try:
+            rejected = _transact(chunk, condition)
+        except Exception as e:
+            print(f"[STORE] Transactional update failed: {str(e)}")
+            rejected = {change[0]["IncidentId"]: str(e) for change in chunk}
+        for item, updates, _ in chunk:
+            error = rejected.get(item["IncidentId"])
+            results[item["IncidentId"]] = error
+            if error is None:
+                item.update(updates)
+    return results
+
+
+def encode_token(state):
+    """Turn listing state into an opaque URL-safe continuation token"""
+    if not state:
+        return None
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_token(token):
+    """Inverse of encode_token; invalid tokens restart the listing"""
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, TypeError):
+        print(f"[STORE] Ignoring invalid continuation token: {token[:40]}")
+        return None
+
+
+def _query_partitions(index, partitions, limit, state, filter_expression=None,
+                      attributes=None, ascending=False):
+    """
+    Query index partitions in order until `limit` items are collected.
+    `partitions` is a list of (label, key_condition); `state` is the
+    {"p": label, "key": start_key} position a previous call stopped at.
+    Returns (items, state), state being None once every partition is read.
+    """
+    labels = [label for label, _ in partitions]
+    resuming = state.get("p") in labels
+    position = labels.index(state["p"]) if resuming else 0
+    start_key = state.get("key") if resuming else None
+
+    items = []
+    while len(items) < limit and position < len(partitions):
+        query_kwargs = {
+            "IndexName": index,
+            "KeyConditionExpression": partitions[position][1],
+            "ScanIndexForward": ascending,
+            "Limit": limit - len(items),
+            **projection_kwargs(attributes),
+        }
+        if filter_expression is not None:
+            query_kwargs["FilterExpression"] = filter_expression
+        if start_key:
+            query_kwargs["ExclusiveStartKey"] = start_key
+
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        start_key = response.get("LastEvaluatedKey")
+        if not start_key:
+            position += 1
+
+    if position >= len(partitions):
+        return items, None
+    return items, {"p": labels[position], "key": start_key}
+
+
+def _day_range(since=None, until=None, ascending=False):
+    """YYYY-MM-DD buckets between since and until (default: the lookback window)"""
+    today = datetime.utcnow().date()
+    oldest = today - timedelta(days=LIST_LOOKBACK_DAYS)
+    first = max(oldest, datetime.strptime(since[:10], "%Y-%m-%d").date()) if since else oldest
+    last = min(today, datetime.strptime(until[:10], "%Y-%m-%d").date()) if until else today
+    days = [(last - timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+    return list(reversed(days)) if ascending else days
+
+
+def _created_condition(since=None, until=None):
+    """CreatedAt sort-key condition for an inclusive [since, until] range"""
+    if not since and not until:
+        return None
+    # "~" sorts after any time suffix, so a date-only `until` covers the whole day
+    return Key("CreatedAt").between(since or "", (until or "9999") + "~")
+
+
+def list_incidents(limit=50, token=None, filter_expression=None, attributes=None):
+    """
+    List incident headers newest-first by querying DayBucketIndex one day at
+    a time in reverse order. Returns (items, next_token); next_token is None
+    once the lookback window is exhausted. `attributes` limits the projection.
+    """
+    partitions = [(day, Key("DayBucket").eq(day)) for day in _day_range()]
+    items, state = _query_partitions(
+        DAY_BUCKET_INDEX, partitions, limit, decode_token(token) or {}, filter_expression, attributes
+    )
+    return items, encode_token(state)
+
+
+def _matches(header, filters):
+    """Python-side equivalent of the filters for items loaded by id"""
+    if filters.get("status") and header.get("Status", "OPEN") not in filters["status"]:
+        return False
+    if filters.get("severity") and header.get("Severity", "UNKNOWN") not in filters["severity"]:
+        return False
+    if filters.get("logGroup") and header.get("LogGroup") != filters["logGroup"]:
+        return False
+    if filters.get("signature") and header.get("ErrorSignature") != filters["signature"]:
+        return False
+    return True
+
+
+def _filter_condition(filters, exclude=()):
+    """FilterExpression for every criterion the chosen index doesn't cover"""
+    conditions = []
+    if filters.get("status") and "status" not in exclude:
+        conditions.append(Attr("Status").is_in(filters["status"]))
+    if filters.get("severity") and "severity" not in exclude:
+        conditions.append(Attr("Severity").is_in(filters["severity"]))
+    if filters.get("logGroup") and "logGroup" not in exclude:
+        conditions.append(Attr("LogGroup").eq(filters["logGroup"]))
+    if filters.get("signature") and "signature" not in exclude:
+        conditions.append(Attr("ErrorSignature").eq(filters["signature"]))
+    condition = None
+    for part in conditions:
+        condition = part if condition is None else condition & part
+    return condition
+
+
+_index_status = {}
+
+
+def index_active(index_name):
+    """
+    True once a GSI on the incident table is ACTIVE. Indexes missing from
+    the table or still backfilling are re-checked after INDEX_CHECK_SECONDS;
+    if DescribeTable itself fails the index is assumed to exist.
+    """
+    cached = _index_status.get(index_name)
+    if cached and (cached[0] or time.monotonic() - cached[1] < INDEX_CHECK_SECONDS):
+        return cached[0]
+    try:
+        description = table.meta.client.describe_table(TableName=TABLE_NAME)["Table"]
+        statuses = {
+            index["IndexName"]: index.get("IndexStatus")
+            for index in description.get("GlobalSecondaryIndexes", [])
+        }
+        active = statuses.get(index_name) == "ACTIVE"
+    except Exception as e:
+        print(f"[STORE] Could not check {index_name} status: {str(e)}")
+        active = True
+    if not active:
+        print(f"[STORE] {index_name} is not active yet; falling back to {DAY_BUCKET_INDEX}")
+    _index_status[index_name] = (active, time.monotonic())
+    return active
+
+
+def _index_partitions(filters, ascending):
+    """(index, partitions, criteria the index already satisfies) for filters"""
+    since, until = filters.get("since"), filters.get("until")
+    created = _created_condition(since, until)
+
+    def with_range(condition):
+        return condition & created if created is not None else condition
+
+    if filters.get("logGroup") and index_active(LOG_GROUP_INDEX):
+        condition = with_range(Key("LogGroup").eq(filters["logGroup"]))
+        return LOG_GROUP_INDEX, [("lg", condition)], ("logGroup",)
+
+    days = _day_range(since, until, ascending)
+    statuses = filters.get("status") or []
+    if len(statuses) == 1 and index_active(STATUS_DAY_INDEX):
+        partitions = [(day, with_range(Key("StatusDay").eq(f"{statuses[0]}#{day}"))) for day in days]
+        return STATUS_DAY_INDEX, partitions, ("status",)
+    return DAY_BUCKET_INDEX, [(day, with_range(Key("DayBucket").eq(day))) for day in days], ()
+
+
+def _query_by_index(filters, sort, limit, state, attributes):
+    ascending = sort == "oldest"
+    index, partitions, covered = _index_partitions(filters, ascending)
+
+    if sort != "severity":
+        condition = _filter_condition(filters, covered)
+        return _query_partitions(index, partitions, limit, state, condition, attributes, ascending)
+
+    # Severity order: one newest-first pass per severity level
+    wanted = [sev for sev in SEVERITY_ORDER if not filters.get("severity") or sev in filters["severity"]]
+    level = state.get("sev", 0)
+    items = []
+    while len(items) < limit and level < len(wanted):
+        condition = _filter_condition(dict(filters, severity=[wanted[level]]), covered)
+        page, state = _query_partitions(index, partitions, limit - len(items), state, condition, attributes)
+        items.extend(page)
+        if state is None:
+            level += 1
+            state = {}
+    if level >= len(wanted):
+        return items, None
+    return items, dict(state, sev=level)
+
+
+def _query_by_tokens(tokens, filters, sort, limit, state, attributes):
+    candidates = search_index.match(tokens, filters.get("since"), filters.get("until"))
+    if sort == "oldest":
+        candidates.reverse()
+    ids = [incident_id for _, incident_id in candidates]
+    if sort == "severity":
+        ranks = {sev: i for i, sev in enumerate(SEVERITY_ORDER)}
+        severities = {
+            incident_id: header.get("Severity", "UNKNOWN")
+            for incident_id, header in load_headers(ids, ["IncidentId", "Severity"]).items()
+        }
+        ids.sort(key=lambda i: ranks.get(severities.get(i), len(ranks)))
+
+    if attributes:
+        attributes = list(dict.fromkeys(list(attributes) + ["Status", "Severity", "LogGroup"]))
+
+    offset = state.get("offset", 0)
+    items = []
+    while len(items) < limit and offset < len(ids):
+        chunk = ids[offset:offset + max(limit - len(items), 25)]
+        headers = load_headers(chunk, attributes)
+        for incident_id in chunk:
+            offset += 1
+            header = headers.get(incident_id)
+            if header and _matches(header, filters):
+                items.append(header)
+                if len(items) >= limit:
+                    break
+    if offset >= len(ids):
+        return items, None
+    return items, {"offset": offset}
+
+
+def search_incidents(query, since=None, until=None, limit=20, token=None, attributes=None):
+    """
+    Ranked full-text search. Returns ([(header, score)], next_token); hits
+    whose header has already expired are skipped.
+    """
+    hits = search_index.search(query, since, until)
+    offset = (decode_token(token) or {}).get("offset", 0)
+
+    results = []
+    while len(results) < limit and offset < len(hits):
+        chunk = hits[offset:offset + limit - len(results)]
+        headers = load_headers([incident_id for incident_id, _, _ in chunk], attributes)
+        for incident_id, score, _ in chunk:
+            if incident_id in headers:
+                results.append((headers[incident_id], score))
+        offset += len(chunk)
+
+    next_token = encode_token({"offset": offset}) if offset < len(hits) else None
+    return results, next_token
+
+
+def query_incidents(filters=None, sort="newest", limit=50, token=None, attributes=None):
+    """
+    Filtered, sorted incident listing. `filters` may hold status and
+    severity lists, logGroup, signature, since/until ISO bounds on
+    CreatedAt, tag and free text q; `sort` is newest, oldest or severity. Returns
+    (items, next_token) like list_incidents.
+    """
+    filters = filters or {}
+    state = decode_token(token) or {}
+
+    tokens = search_index.tokenize(filters.get("q"))
+    if filters.get("tag"):
+        tokens.append(search_index.tag_token(filters["tag"]))
+
+    if tokens:
+        items, state = _query_by_tokens(tokens, filters, sort, limit, state, attributes)
+    else:
+        items, state = _query_by_index(filters, sort, limit, state, attributes)
+    return items, encode_token(state)
+
+
+def select_incident_ids(selector, limit, exclude_status=None):
+    """
+    Ids of incidents matching a bulk-action selector: signature, logGroup
+    and since/until bounds on CreatedAt (at least one required), skipping
+    incidents already in `exclude_status`. Signature plus log group is
+    served by SignatureIndex, anything else by query_incidents. Returns
+    (ids, truncated) with at most `limit` ids.
+    """
+    filters = {key: selector.get(key) for key in ("signature", "logGroup", "since", "until") if selector.get(key)}
+    if not filters:
+        raise ValueError("selector needs at least one of signature, logGroup, since, until")
+
+    status_condition = None
+    if exclude_status:
+        status_condition = Attr("Status").not_exists() | Attr("Status").ne(exclude_status)
+
+    if filters.get("signature") and filters.get("logGroup"):
+        condition = Key("SignatureKey").eq(signature_key(filters["logGroup"], filters["signature"]))
+        created = _created_condition(filters.get("since"), filters.get("until"))
+        if created is not None:
+            condition = condition & created
+        items, _ = _query_partitions(
+            SIGNATURE_INDEX, [("sig", condition)], limit + 1, {}, status_condition, ["IncidentId"]
+        )
+    else:
+        index, partitions, covered = _index_partitions(filters, False)
+        filter_expression = _filter_condition(filters, covered)
+        if status_condition is not None:
+            filter_expression = status_condition if filter_expression is None else filter_expression & status_condition
+        items, _ = _query_partitions(index, partitions, limit + 1, {}, filter_expression, ["IncidentId"])
+
+    ids = list(dict.fromkeys(item["IncidentId"] for item in items))
+    return ids[:limit], len(ids) > limit
+
+
+def iter_headers(attributes=None, filter_expression=None):
+    """Stream every incident header via a parallel segmented scan (admin/backfill use)"""
+    condition = Attr("IncidentId").begins_with("inc-")
+    if filter_expression is not None:
+        condition = condition & filter_expression
+    for item in parallel_scan(TABLE_NAME, attributes=attributes, filter_expression=condition):
+        yield as_header(item)
+
+
+def migrate_legacy_incidents():
+    """
+    Rewrite legacy single-item incidents into the header/detail layout so
+    they pick up DayBucket and show up in DayBucketIndex listings.
+    """
+    migrated = 0
+    condition = Attr("DetailStored").not_exists() & Attr("IncidentId").begins_with("inc-")
+    for item in parallel_scan(TABLE_NAME, filter_expression=condition):
+        put_incident(item)
+        migrated += 1
+    print(f"[STORE] Migrated {migrated} legacy incident(s)")
+    return migrated
+
+
+def reindex_incidents():
+    """Backfill StatusDay and search postings for headers written before they existed"""
+    reindexed = 0
+    batch = []
+
+    def flush():
+        details = load_details([header["IncidentId"] for header in batch])
+        for header in batch:
+            search_index.index_incident({**details.get(header["IncidentId"], {}), **header})
+        batch.clear()
+
+    condition = Attr("DetailStored").exists() & Attr("IncidentId").begins_with("inc-")
+    for header in parallel_scan(TABLE_NAME, filter_expression=condition):
+        expected = status_day(header.get("Status"), header.get("CreatedAt"))
+        if header.get("StatusDay") != expected:
+            table.update_item(
+                Key={"IncidentId": header["IncidentId"]},
+                UpdateExpression="SET StatusDay = :s",
+                ExpressionAttributeValues={":s": expected},
+            )
+        batch.append(header)
+        if len(batch) >= 100:
+            flush()
+        reindexed += 1
+    if batch:
+        flush()
+    print(f"[STORE] Reindexed {reindexed} incident(s)")
+    return reindexed
+
+
+def find_recent_occurrences(error_signature, log_group, since, limit=None, attributes=None):
+    """Headers sharing a signature and log group created after `since`, newest first"""
+    query_kwargs = {
+        "IndexName": SIGNATURE_INDEX,
+        "KeyConditionExpression": Key("SignatureKey").eq(signature_key(log_group, error_signature))
+        & Key("CreatedAt").gt(since),
+        "ScanIndexForward": False,
+        **projection_kwargs(attributes),
+    }
+    if limit:
+        query_kwargs["Limit"] = limit
+
+    items = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response or (limit and len(items) >= limit):
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return items[:limit] if limit else items
+
+
+def count_recent_occurrences(groups, since):
+    """
+    Count incidents per (error_signature, log_group) created after `since`.
+    Each distinct group costs one COUNT query on SignatureIndex, however
+    many incidents on a page share it.
+    """
+    counts = {}
+    for error_signature, log_group in set(groups):
+        query_kwargs = {
+            "IndexName": SIGNATURE_INDEX,
+            "KeyConditionExpression": Key("SignatureKey").eq(signature_key(log_group, error_signature))
+            & Key("CreatedAt").gt(since),
+            "Select": "COUNT",
+        }
+        total = 0
+        while True:
+            response = table.query(**query_kwargs)
+            total += response.get("Count", 0)
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        counts[(error_signature, log_group)] = total
+    return counts
+
+
+class ResyncRequired(Exception):
+    """Raised when a delta-sync cursor is older than CHANGE_LOOKBACK_DAYS"""
+
+
+def change_cursor(timestamp=None):
+    """Opaque delta-sync cursor at `timestamp` (default: now)"""
+    return encode_token({"t": timestamp or datetime.utcnow().isoformat() + "Z"})
+
+
+def list_changes(cursor, limit=200, attributes=None):
+    """
+    Headers created or updated after the cursor position, oldest change
+    first. Returns (items, next_cursor, has_more). A raw ISO timestamp is
+    accepted in place of a cursor. Raises ResyncRequired for positions
+    older than CHANGE_LOOKBACK_DAYS; clients reload the list instead.
+    """
+    state = decode_token(cursor) if cursor and not cursor[:4].isdigit() else None
+    since = state["t"] if state else cursor
+    since_dt = datetime.fromisoformat(since.replace("Z", "+00:00")).replace(tzinfo=None)
+    if since_dt < datetime.utcnow() - timedelta(days=CHANGE_LOOKBACK_DAYS):
+        raise ResyncRequired(f"cursor is older than {CHANGE_LOOKBACK_DAYS} days")
+
+    # Page continuations resume at the index position they stopped at;
+    # fresh polls re-read a small overlap
+    resume = state if state and state.get("d") else None
+    if not resume:
+        since_dt -= timedelta(seconds=CHANGE_SKEW_SECONDS)
+    lower = since_dt.isoformat() + "Z" if not resume else since
+
+    today = datetime.utcnow().date()
+    day = datetime.strptime(resume["d"], "%Y-%m-%d").date() if resume else since_dt.date()
+    start_key = resume.get("k") if resume else None
+    items = []
+    while day <= today:
+        query_kwargs = {
+            "IndexName": UPDATED_AT_INDEX,
+            "KeyConditionExpression": Key("UpdateBucket").eq(day.isoformat()) & Key("UpdatedAt").gt(lower),
+            **projection_kwargs(attributes),
+        }
+        while True:
+            query_kwargs["Limit"] = limit - len(items)
+            if start_key:
+                query_kwargs["ExclusiveStartKey"] = start_key
+            response = table.query(**query_kwargs)
+            items.extend(response.get("Items", []))
+            start_key = response.get("LastEvaluatedKey")
+            if not start_key or len(items) >= limit:
+                break
+        if len(items) >= limit:
+            # The next page continues from this query's exact index position,
+            # so changes sharing the last UpdatedAt are not skipped
+            if not start_key:
+                day += timedelta(days=1)
+            if day > today:
+                break
+            next_cursor = encode_token({"t": lower, "d": day.isoformat(), "k": start_key})
+            return items, next_cursor, True
+        day += timedelta(days=1)
+
+    # Quiet periods still move the cursor forward so later polls stay one-bucket cheap
+    settled = (datetime.utcnow() - timedelta(seconds=CHANGE_SKEW_SECONDS)).isoformat() + "Z"
+    latest = max([since, settled] + [item["UpdatedAt"] for item in items])
+    return items, change_cursor(latest), False
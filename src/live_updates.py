@@ -0,0 +1,154 @@
+"""
+RCRA Live Updates
+Pushes incident-changed events to connected dashboards over WebSocket
+
+Dashboard tabs open a connection to the RCRA WebSocket API; the
+$connect/$disconnect routes (websocket_lambda) record them in
+RCRAConnectionsTable. A dedicated RCRARootCauseTable stream consumer
+(live_updates_lambda) turns each batch of incident changes into compact
+events and posts them to every open connection through the API Gateway
+management API, so idle tabs cost nothing until something changes.
+
+Without WEBSOCKET_ENDPOINT (local runs and tests) messages are delivered
+to an in-process outbox instead; see local_messages().
+"""
+
+import json
+import os
+import time
+from decimal import Decimal
+
+import boto3
+
+dynamodb = boto3.resource("dynamodb")
+
+CONNECTIONS_TABLE_NAME = os.environ.get("CONNECTIONS_TABLE_NAME", "RCRAConnectionsTable")
+connections_table = dynamodb.Table(CONNECTIONS_TABLE_NAME)
+
+# https://{api-id}.execute-api.{region}.amazonaws.com/{stage}
+WEBSOCKET_ENDPOINT = os.environ.get("WEBSOCKET_ENDPOINT")
+management_api = (
+    boto3.client("apigatewaymanagementapi", endpoint_url=WEBSOCKET_ENDPOINT)
+    if WEBSOCKET_ENDPOINT else None
+)
+
+# API Gateway closes WebSocket connections after 2 hours; TTL sweeps any
+# row whose $disconnect never arrived
+CONNECTION_TTL_SECONDS = 3 * 3600
+
+# Keeps each pushed frame well under the 128 KB WebSocket message limit
+EVENTS_PER_MESSAGE = 50
+
+EVENT_FIELDS = {
+    "incidentId": "IncidentId",
+    "ticketNumber": "TicketNumber",
+    "status": "Status",
+    "resolvedAt": "ResolvedAt",
+    "resolvedBy": "ResolvedBy",
+    "timestamp": "CreatedAt",
+    "updatedAt": "UpdatedAt",
+    "logGroup": "LogGroup",
+    "summary": "Summary",
+    "severity": "Severity",
+    "rootCause": "RootCause",
+    "rawMessage": "RawPreview",
+    "tags": "Tags",
+    "remediationEligible": "RemediationEligible",
+    "remediationAction": "RemediationAction",
+    "errorSignature": "ErrorSignature",
+}
+
+# Local stand-in for the management API: connection id -> delivered payloads
+_local_outbox = {}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """Helper class to convert DynamoDB Decimal to JSON"""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj % 1 == 0 else float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def register_connection(connection_id):
+    connections_table.put_item(Item={
+        "ConnectionId": connection_id,
+        "ConnectedAt": int(time.time()),
+        "ExpiresAt": int(time.time()) + CONNECTION_TTL_SECONDS,
+    })
+
+
+def remove_connection(connection_id):
+    connections_table.delete_item(Key={"ConnectionId": connection_id})
+    _local_outbox.pop(connection_id, None)
+
+
+def list_connections():
+    """Ids of every recorded connection (the table stays tiny: one row per open tab)"""
+    ids = []
+    scan_kwargs = {"ProjectionExpression": "ConnectionId"}
+    while True:
+        response = connections_table.scan(**scan_kwargs)
+        ids.extend(item["ConnectionId"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return ids
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def compact_event(event_name, header):
+    """List-view fields of one changed incident, tagged with the stream event name"""
+    event = {"event": event_name}
+    for field, attr in EVENT_FIELDS.items():
+        if header.get(attr) is not None:
+            event[field] = header[attr]
+    return event
+
+
+def post(connection_id, payload):
+    """
+    Deliver one payload to one connection. Returns False when the
+    connection is gone so the caller can drop it.
+    """
+    if management_api is None:
+        _local_outbox.setdefault(connection_id, []).append(json.loads(payload))
+        return True
+    try:
+        management_api.post_to_connection(ConnectionId=connection_id, Data=payload.encode("utf-8"))
+        return True
+    except management_api.exceptions.GoneException:
+        return False
+
+
+def broadcast(events):
+    """
+    Push events to every open connection, EVENTS_PER_MESSAGE per frame.
+    Returns (connections reached, stale connections removed).
+    """
+    if not events:
+        return 0, 0
+
+    payloads = [
+        json.dumps({"type": "incidents.changed", "incidents": events[i:i + EVENTS_PER_MESSAGE]}, cls=DecimalEncoder)
+        for i in range(0, len(events), EVENTS_PER_MESSAGE)
+    ]
+
+    reached = 0
+    stale = 0
+    for connection_id in list_connections():
+        try:
+            delivered = all(post(connection_id, payload) for payload in payloads)
+        except Exception as e:
+            print(f"[LIVE] Failed to post to {connection_id}: {str(e)}")
+            continue
+        if delivered:
+            reached += 1
+        else:
+            remove_connection(connection_id)
+            stale += 1
+    return reached, stale
+
+
+def local_messages(connection_id):
+    """Payloads delivered to a connection by the in-process stand-in"""
+    return _local_outbox.get(connection_id, [])
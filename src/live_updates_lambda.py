@@ -0,0 +1,39 @@
+"""
+RCRA Live Updates Lambda
+Second RCRARootCauseTable stream consumer that fans out incident changes
+
+Runs separately from the statistics/archive stream processor with no
+batching window, so a new incident reaches open dashboards within a
+second or two. TTL expiries are not pushed; dashboards only show
+incidents still in the hot table anyway.
+"""
+
+import incident_store
+import live_updates
+from stream_records import deserialize_image, is_ttl_expiry
+
+
+def collect_events(records):
+    """Compact events for each incident touched by the batch, latest image wins"""
+    events = {}
+    for record in records:
+        if is_ttl_expiry(record):
+            continue
+        images = record.get("dynamodb", {})
+        image = deserialize_image(images.get("NewImage") or images.get("OldImage"))
+        incident_id = image.get("IncidentId", "")
+        if not incident_id.startswith("inc-"):
+            continue
+        events[incident_id] = live_updates.compact_event(
+            record.get("eventName"), incident_store.as_header(image)
+        )
+    return list(events.values())
+
+
+def handler(event, context):
+    records = event.get("Records", [])
+    events = collect_events(records)
+    reached, stale = live_updates.broadcast(events)
+
+    print(f"[LIVE] Pushed {len(events)} change(s) to {reached} connection(s), dropped {stale} stale")
+    return {"records": len(records), "events": len(events), "connections": reached, "stale": stale}
@@ -0,0 +1,155 @@
+"""
+RCRA Incident Log Viewer
+Paged CloudWatch Logs reads around an incident, with a short-lived page cache
+
+GET /incidents/{id}/logs reads a time window around the incident's
+CreatedAt (WINDOW_BEFORE/AFTER_MINUTES by default) from its log stream,
+or the whole log group, optionally narrowed by a CloudWatch filter
+pattern. Each response carries at most `limit` events plus an opaque
+continuation token that pins the window, pattern and CloudWatch
+nextToken, so the next page continues the same read lazily.
+
+CloudWatch can return empty pages while it scans sparse streams, so one
+request follows nextToken for at most MAX_CALLS_PER_PAGE calls before
+handing a token back. Pages are cached per incident for
+PAGE_CACHE_TTL_SECONDS; reopening a log view or paging back costs no
+CloudWatch calls.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import boto3
+
+import incident_store
+
+logs_client = boto3.client("logs")
+
+WINDOW_BEFORE_MINUTES = 15
+WINDOW_AFTER_MINUTES = 15
+
+# Largest window a caller may ask for on either side of CreatedAt
+MAX_WINDOW_MINUTES = 24 * 60
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# filter_log_events calls spent filling one page
+MAX_CALLS_PER_PAGE = 5
+
+PAGE_CACHE_TTL_SECONDS = 60
+MAX_CACHED_PAGES = 512
+
+_pages = {}
+
+
+def _epoch_ms(value):
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def _minutes(query_params, name, default):
+    value = query_params.get(name)
+    if value in (None, ""):
+        return default
+    minutes = int(value)
+    if minutes < 0 or minutes > MAX_WINDOW_MINUTES:
+        raise ValueError(f"{name} must be between 0 and {MAX_WINDOW_MINUTES} minutes")
+    return minutes
+
+
+def read_params(header, query_params):
+    """
+    Window, pattern, scope and page size for a request. A continuation
+    token overrides the window, pattern and scope it was issued for.
+    """
+    state = incident_store.decode_token(query_params.get("token")) or {}
+    limit = min(max(int(query_params.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    if state:
+        return {**state, "limit": limit}
+
+    created = datetime.fromisoformat(header["CreatedAt"].replace("Z", "+00:00")).replace(tzinfo=None)
+    before = _minutes(query_params, "before", WINDOW_BEFORE_MINUTES)
+    after = _minutes(query_params, "after", WINDOW_AFTER_MINUTES)
+    scope = query_params.get("scope", "stream")
+    if scope not in ("stream", "group"):
+        raise ValueError("scope must be stream or group")
+    return {
+        "start": _epoch_ms(created - timedelta(minutes=before)),
+        "end": _epoch_ms(created + timedelta(minutes=after)),
+        "pattern": query_params.get("pattern") or "",
+        "scope": scope,
+        "next": None,
+        "limit": limit,
+    }
+
+
+def _fetch(header, params):
+    """Read up to params["limit"] events from CloudWatch; returns (events, next CloudWatch token)"""
+    request = {
+        "logGroupName": header["LogGroup"],
+        "startTime": params["start"],
+        "endTime": params["end"],
+    }
+    if params["pattern"]:
+        request["filterPattern"] = params["pattern"]
+    if params["scope"] == "stream" and header.get("LogStream"):
+        request["logStreamNames"] = [header["LogStream"]]
+
+    events = []
+    next_token = params.get("next")
+    for _ in range(MAX_CALLS_PER_PAGE):
+        request["limit"] = params["limit"] - len(events)
+        if next_token:
+            request["nextToken"] = next_token
+        response = logs_client.filter_log_events(**request)
+        events.extend(response.get("events", []))
+        next_token = response.get("nextToken")
+        if not next_token or len(events) >= params["limit"]:
+            break
+    return events, next_token
+
+
+def get_page(incident_id, header, query_params):
+    """
+    One page of log events for an incident: {events, count, window,
+    pattern, scope, nextToken, cached}. nextToken is None at the end.
+    """
+    params = read_params(header, query_params)
+    key = (incident_id, params["start"], params["end"], params["pattern"], params["scope"], params.get("next"), params["limit"])
+
+    entry = _pages.get(key)
+    cached = bool(entry and time.time() - entry[0] < PAGE_CACHE_TTL_SECONDS)
+    if cached:
+        events, next_token = entry[1]
+    else:
+        events, next_token = _fetch(header, params)
+        if len(_pages) >= MAX_CACHED_PAGES:
+            _pages.clear()
+        _pages[key] = (time.time(), (events, next_token))
+
+    token = None
+    if next_token:
+        token = incident_store.encode_token({
+            "start": params["start"],
+            "end": params["end"],
+            "pattern": params["pattern"],
+            "scope": params["scope"],
+            "next": next_token,
+        })
+    return {
+        "events": [
+            {
+                "timestamp": evt.get("timestamp"),
+                "ingestionTime": evt.get("ingestionTime"),
+                "message": evt.get("message"),
+                "logStreamName": evt.get("logStreamName"),
+            }
+            for evt in events
+        ],
+        "count": len(events),
+        "window": {"start": params["start"], "end": params["end"]},
+        "pattern": params["pattern"],
+        "scope": params["scope"],
+        "nextToken": token,
+        "cached": cached,
+    }
@@ -0,0 +1,64 @@
+"""
+RCRA Maintenance Lambda
+Admin and backfill jobs that need to read the whole incident table
+
+Invoke with {"action": "<name>"}:
+- rebuild-statistics        recompute the STATS aggregate from all incidents
+- rebuild-rollups           recompute the daily/hourly ROLLUP aggregates from all incidents
+- migrate-legacy-incidents  split pre-header incidents into header/detail items
+- migrate-legacy-config     move CONFIG_* rows into RCRAConfigTable
+- reindex-incidents         backfill StatusDay keys and search postings
+- rebuild-similarity-index  re-embed all incidents into a new related-incident index
+"""
+
+import aggregate_store
+import config_store
+import incident_store
+import similarity_index
+
+
+def rebuild_statistics(event):
+    totals = aggregate_store.rebuild_statistics(incident_store.iter_headers())
+    return {"totalIncidents": totals.get("TotalIncidents", 0)}
+
+
+def rebuild_rollups(event):
+    return {"buckets": aggregate_store.rebuild_rollups(incident_store.iter_headers())}
+
+
+def migrate_legacy_incidents(event):
+    return {"migrated": incident_store.migrate_legacy_incidents()}
+
+
+def migrate_legacy_config(event):
+    return {"migrated": config_store.migrate_legacy_config(incident_store.table)}
+
+
+def reindex_incidents(event):
+    return {"reindexed": incident_store.reindex_incidents()}
+
+
+def rebuild_similarity_index(event):
+    manifest = similarity_index.build_index(incident_store.iter_headers(similarity_index.EMBED_ATTRIBUTES))
+    return {"version": manifest["version"], "rows": manifest["rows"]}
+
+
+ACTIONS = {
+    "rebuild-statistics": rebuild_statistics,
+    "rebuild-rollups": rebuild_rollups,
+    "migrate-legacy-incidents": migrate_legacy_incidents,
+    "migrate-legacy-config": migrate_legacy_config,
+    "reindex-incidents": reindex_incidents,
+    "rebuild-similarity-index": rebuild_similarity_index,
+}
+
+
+def handler(event, context):
+    action = event.get("action")
+    if action not in ACTIONS:
+        return {"success": False, "error": f"Unknown action '{action}'", "actions": sorted(ACTIONS)}
+
+    print(f"[MAINTENANCE] Running {action}")
+    result = ACTIONS[action](event)
+    print(f"[MAINTENANCE] {action} finished: {result}")
+    return {"success": True, "action": action, **result}
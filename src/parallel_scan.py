@@ -0,0 +1,103 @@
+"""
+Parallel Segmented Scan
+Streams every item of a DynamoDB table using Segment/TotalSegments scans
+
+For admin and backfill paths that genuinely need the whole table
+(rebuilding aggregates, migrations, exports). Each segment is scanned by
+its own worker thread, which follows LastEvaluatedKey to completion and
+hands pages to the caller through a bounded queue, so memory stays at a
+few pages no matter how large the table is.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+DEFAULT_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", str(max(4, (os.cpu_count() or 1) * 2))))
+
+# Pages buffered per worker before producers block
+PAGES_PER_WORKER = 2
+
+_DONE = object()
+
+
+def projection_kwargs(attributes):
+    """
+    ProjectionExpression/ExpressionAttributeNames for a list of top-level
+    attribute names; every name is aliased so reserved words like Status work.
+    """
+    if not attributes:
+        return {}
+    names = {f"#p{i}": attr for i, attr in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def _scan_segment(table_name, segment, total_segments, scan_kwargs, pages, stop):
+    # boto3 resources are not thread-safe; each worker gets its own session
+    segment_table = boto3.session.Session().resource("dynamodb").Table(table_name)
+    kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+    try:
+        while not stop.is_set():
+            response = segment_table.scan(**kwargs)
+            page = response.get("Items", [])
+            while page and not stop.is_set():
+                try:
+                    pages.put(page, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    except Exception as e:
+        pages.put(e)
+    finally:
+        pages.put(_DONE)
+
+
+def parallel_scan(table_name, attributes=None, filter_expression=None,
+                  total_segments=None, page_size=None):
+    """
+    Yield every item of `table_name`, scanning `total_segments` segments
+    concurrently. `attributes` limits the projection; `filter_expression`
+    is a boto3 condition applied server-side. Item order is not defined.
+    """
+    total_segments = total_segments or DEFAULT_SEGMENTS
+    scan_kwargs = projection_kwargs(attributes)
+    if filter_expression is not None:
+        scan_kwargs["FilterExpression"] = filter_expression
+    if page_size:
+        scan_kwargs["Limit"] = page_size
+
+    pages = queue.Queue(maxsize=total_segments * PAGES_PER_WORKER)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=total_segments)
+    for segment in range(total_segments):
+        executor.submit(_scan_segment, table_name, segment, total_segments, scan_kwargs, pages, stop)
+
+    finished = 0
+    try:
+        while finished < total_segments:
+            page = pages.get()
+            if page is _DONE:
+                finished += 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        # Consumer stopped early or a segment failed: release blocked workers
+        stop.set()
+        while finished < total_segments:
+            try:
+                if pages.get(timeout=1) is _DONE:
+                    finished += 1
+            except queue.Empty:
+                continue
+        executor.shutdown(wait=True)
@@ -5,6 +5,8 @@ from datetime import datetime
 
 import boto3
 
+import incident_store
+
 TABLE_NAME = os.environ["TABLE_NAME"]
 TOPIC_ARN = os.environ["TOPIC_ARN"]
 
@@ -29,21 +31,14 @@ def track_error_frequency(error_signature, log_group):
     """
     try:
         from datetime import timedelta
-        from boto3.dynamodb.conditions import Attr
         
         # Calculate 24 hours ago
         now = datetime.utcnow()
         last_24h = now - timedelta(hours=24)
         last_24h_str = last_24h.isoformat() + "Z"
         
-        # Scan for similar errors in last 24 hours
-        response = table.scan(
-            FilterExpression=Attr('ErrorSignature').eq(error_signature) & 
-                           Attr('CreatedAt').gt(last_24h_str) &
-                           Attr('LogGroup').eq(log_group)
-        )
-        
-        items = response.get('Items', [])
+        # Query SignatureIndex for similar errors in last 24 hours (newest first)
+        items = incident_store.find_recent_occurrences(error_signature, log_group, last_24h_str)
         occurrences = []
         
         for item in items:
@@ -54,9 +49,6 @@ def track_error_frequency(error_signature, log_group):
                 'status': item.get('Status', 'UNKNOWN')
             })
         
-        # Sort by timestamp descending
-        occurrences.sort(key=lambda x: x['timestamp'], reverse=True)
-        
         return {
             'count': len(occurrences),
             'occurrences': occurrences[:10],  # Last 10 occurrences
@@ -91,6 +83,11 @@ def handler(event, context):
         status = "RESOLVED"
         resolved_at = datetime.utcnow().isoformat() + "Z"
         resolved_by = "SYSTEM_AUTO_REMEDIATION"
+    elif remediation_action == "PENDING_VERIFICATION":
+        # The fix was sent but not confirmed in time; not resolved yet
+        status = "IN_PROGRESS"
+        resolved_at = None
+        resolved_by = None
     else:
         status = "OPEN"
         resolved_at = None
@@ -103,7 +100,7 @@ def handler(event, context):
     item = {
         "IncidentId": incident_id,
         "TicketNumber": ticket_number,
-        "Status": status,  # OPEN or RESOLVED
+        "Status": status,  # OPEN, IN_PROGRESS (fix pending verification) or RESOLVED
         "ResolvedAt": resolved_at,
         "ResolvedBy": resolved_by,
         "CreatedAt": datetime.utcnow().isoformat() + "Z",
@@ -115,7 +112,8 @@ def handler(event, context):
         "ErrorSignature": error_signature,  # For frequency tracking
     }
 
-    table.put_item(Item=item)
+    # Slim header in the incident table, heavy fields compressed into the detail table
+    incident_store.put_incident(item)
     
     # Track error frequency (check for similar errors in last 24 hours)
     error_occurrences = track_error_frequency(error_signature, event.get("logGroup"))
@@ -130,6 +128,8 @@ def handler(event, context):
         subject = f"[RCRA] ✅ AUTO-FIXED: {severity} - {incident_id}"
     elif remediation_action == 'FAILED':
         subject = f"[RCRA] ⚠️ AUTO-FIX FAILED: {severity} - {incident_id}"
+    elif remediation_action == 'PENDING_VERIFICATION':
+        subject = f"[RCRA] ⏳ AUTO-FIX PENDING: {severity} - {incident_id}"
     elif remediation_action == 'MANUAL_APPROVAL_REQUIRED':
         subject = f"[RCRA] 👤 APPROVAL NEEDED: {severity} - {incident_id}"
     else:
@@ -222,6 +222,16 @@ AWS Actions Performed:
 Details: {details}
 
 Manual intervention is required. Please review the incident in the dashboard.
+"""
+
+    elif action_taken == 'PENDING_VERIFICATION':
+        message += f"""⏳ AUTO-REMEDIATION PENDING VERIFICATION
+
+Details: {details}
+
+The change was sent but had not taken effect when the remediator stopped
+waiting. The incident stays IN_PROGRESS; confirm the function recovered
+and resolve it in the dashboard.
 """
 
     elif action_taken == 'MANUAL_APPROVAL_REQUIRED':
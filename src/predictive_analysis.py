@@ -0,0 +1,476 @@
+"""
+RCRA Predictive Analysis
+Precomputed, versioned predictive-analysis snapshots
+
+Analysis inputs come from the daily rollups in RCRAAggregateTable (30
+small items) rather than raw incidents. The forecasting module fits the
+total and every log-group and signature series in one vectorized batch,
+and one Bedrock call turns the result into a snapshot. Snapshots are
+generated by the predictive Lambda on a schedule, or early once
+PREDICTIVE_REFRESH_INCIDENTS new incidents have arrived since the last
+one (counted by the stream processor). GET /predictive-analysis serves
+the latest snapshot with its age and never calls Bedrock itself.
+
+The aggregate table holds PREDICTIVE / LATEST (current analysis, version,
+pending-incident counter) and PREDICTIVE / SNAPSHOT#<version> history.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import boto3
+
+import aggregate_store
+import forecasting
+import incident_store
+
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
+MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+
+PREDICTIVE_FUNCTION_NAME = os.environ.get("PREDICTIVE_FUNCTION_NAME")
+lambda_client = boto3.client("lambda") if PREDICTIVE_FUNCTION_NAME else None
+
+# New incidents since the last snapshot that trigger an early refresh
+REFRESH_INCIDENTS = int(os.environ.get("PREDICTIVE_REFRESH_INCIDENTS", "25"))
+
+# Minimum gap between two refresh requests
+REFRESH_COOLDOWN_SECONDS = 15 * 60
+
+ANALYSIS_DAYS = 30
+
+# Forecast horizon (days) and prediction-interval level
+FORECAST_DAYS = 7
+FORECAST_LEVEL = 0.9
+
+# Log groups and signatures with per-series forecasts in a snapshot
+SERIES_FORECASTS = 10
+
+PREDICTIVE_KEY = "PREDICTIVE"
+LATEST_BUCKET = "LATEST"
+SNAPSHOT_PREFIX = "SNAPSHOT#"
+
+# How long superseded snapshots are kept for comparison
+SNAPSHOT_TTL_SECONDS = 30 * 24 * 3600
+
+SAMPLE_ATTRIBUTES = ["Summary", "Severity", "RootCause", "Tags", "Status", "LogGroup"]
+
+
+def forecast_volume(history, now=None):
+    """
+    Forecast the next FORECAST_DAYS of total incident volume from
+    [(date, count)] history. Returns trend, slope, confidence (R² as a
+    percentage), chosen model, daily predictions with interval bounds and
+    the week-over-week totals.
+    """
+    now = now or datetime.utcnow()
+    dates = [(now + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(1, FORECAST_DAYS + 1)]
+    counts = [count for _, count in history]
+    current_total = sum(counts[-FORECAST_DAYS:])
+
+    if len(history) < 3:
+        avg_count = sum(counts) / len(counts) if counts else 0
+        return {
+            "slope": 0,
+            "model": "average",
+            "trend": "insufficient_data",
+            "confidence": 0,
+            "predictions": [
+                {"day": i + 1, "predictedCount": round(avg_count, 1), "date": date}
+                for i, date in enumerate(dates)
+            ],
+            "nextWeekTotal": round(avg_count * FORECAST_DAYS, 1),
+            "currentWeekTotal": current_total,
+            "percentageChange": 0,
+        }
+
+    result = forecasting.forecast(counts, history[0][0], FORECAST_DAYS, level=FORECAST_LEVEL)
+    slope = float(result["slope"][0])
+    predictions = [
+        {
+            "day": i + 1,
+            "predictedCount": round(float(result["forecast"][0][i]), 1),
+            "lower": round(float(result["lower"][0][i]), 1),
+            "upper": round(float(result["upper"][0][i]), 1),
+            "date": date,
+        }
+        for i, date in enumerate(dates)
+    ]
+
+    if slope > 0.5:
+        trend = "increasing"
+    elif slope < -0.5:
+        trend = "decreasing"
+    else:
+        trend = "stable"
+
+    next_week_total = round(sum(p["predictedCount"] for p in predictions), 1)
+    return {
+        "slope": round(slope, 3),
+        "model": result["model"][0],
+        "trend": trend,
+        "confidence": round(float(result["r2"][0]) * 100, 1),
+        "predictions": predictions,
+        "nextWeekTotal": next_week_total,
+        "nextWeekRange": [
+            round(sum(p["lower"] for p in predictions), 1),
+            round(sum(p["upper"] for p in predictions), 1),
+        ],
+        "currentWeekTotal": current_total,
+        "percentageChange": round(((next_week_total - current_total) / current_total * 100) if current_total > 0 else 0, 1),
+    }
+
+
+def forecast_breakdowns(inputs, now=None):
+    """
+    Forecast every log group and signature series in one batch and keep
+    the SERIES_FORECASTS with the largest expected volume per dimension.
+    """
+    now = now or datetime.utcnow()
+    history = inputs["dailyHistory"]
+    if not history:
+        return {"logGroups": [], "signatures": []}
+
+    series = {}
+    for dimension in ("logGroups", "signatures"):
+        for name, daily in inputs["dailySeries"][dimension].items():
+            series[(dimension, name)] = daily
+    forecasts = forecasting.forecast_series(
+        series, history[0][0], now.strftime("%Y-%m-%d"), FORECAST_DAYS, level=FORECAST_LEVEL
+    )
+
+    breakdowns = {"logGroups": [], "signatures": []}
+    for (dimension, name), result in forecasts.items():
+        breakdowns[dimension].append({
+            "name": name,
+            "model": result["model"],
+            "slope": result["slope"],
+            "nextWeekTotal": result["nextPeriodTotal"],
+            "nextWeekRange": [round(sum(result["lower"]), 1), round(sum(result["upper"]), 1)],
+            "currentWeekTotal": result["recentTotal"],
+        })
+    for dimension in breakdowns:
+        breakdowns[dimension].sort(key=lambda entry: entry["nextWeekTotal"], reverse=True)
+        del breakdowns[dimension][SERIES_FORECASTS:]
+    return breakdowns
+
+
+def _latest_key():
+    return {"AggregateKey": PREDICTIVE_KEY, "Bucket": LATEST_BUCKET}
+
+
+def _top(counts, n):
+    return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True)[:n])
+
+
+def _prefixed(item, prefix):
+    return {name: int(value) for name, value in aggregate_store.rollup_counters(item, prefix).items()}
+
+
+def collect_inputs(now=None):
+    """Aggregate the last ANALYSIS_DAYS of daily rollups into analysis inputs"""
+    now = now or datetime.utcnow()
+    start = (now - timedelta(days=ANALYSIS_DAYS)).strftime("%Y-%m-%d")
+    rollups = aggregate_store.get_daily_rollups(start, now.strftime("%Y-%m-%d"), signatures=True)
+
+    severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    error_types = {}
+    log_groups = {}
+    time_distribution = {}
+    daily_incidents = {}
+    daily_series = {"logGroups": {}, "signatures": {}}
+    resolved_count = 0
+    resolution_minutes = 0.0
+
+    for item in rollups:
+        count = int(item.get("Count", 0))
+        if count <= 0:
+            continue
+        day = item["Bucket"][len(aggregate_store.DAY_PREFIX):]
+        daily_incidents[day] = count
+        for severity, value in _prefixed(item, "Severity#").items():
+            if severity in severity_counts:
+                severity_counts[severity] += value
+        for signature, value in _prefixed(item, "Signature#").items():
+            error_key = signature[:50]
+            error_types[error_key] = error_types.get(error_key, 0) + value
+            daily_series["signatures"].setdefault(signature, {})[day] = value
+        for name, value in _prefixed(item, "LogGroup#").items():
+            log_groups[name] = log_groups.get(name, 0) + value
+            daily_series["logGroups"].setdefault(name, {})[day] = value
+        for hour, value in _prefixed(item, "Hour#").items():
+            time_distribution[int(hour)] = time_distribution.get(int(hour), 0) + value
+        resolved_count += int(item.get("ResolvedCount", 0))
+        resolution_minutes += float(item.get("ResolutionMinutes", 0))
+
+    # Days without incidents count as zero so the forecast sees real time
+    history = []
+    if daily_incidents:
+        day = datetime.strptime(min(daily_incidents), "%Y-%m-%d").date()
+        while day <= now.date():
+            history.append((day.isoformat(), daily_incidents.get(day.isoformat(), 0)))
+            day += timedelta(days=1)
+
+    return {
+        "total": sum(daily_incidents.values()),
+        "severityCounts": severity_counts,
+        "errorTypes": error_types,
+        "logGroups": log_groups,
+        "timeDistribution": time_distribution,
+        "dailyHistory": history,
+        "dailySeries": daily_series,
+        "avgResolutionTime": round(resolution_minutes / resolved_count, 2) if resolved_count else None,
+    }
+
+
+def _empty_analysis():
+    return {
+        "summary": "No incidents found in the last 30 days to analyze.",
+        "patterns": [],
+        "predictions": [],
+        "recommendations": [],
+        "riskScore": 0,
+        "incidentCount": 0,
+    }
+
+
+def _invoke_bedrock(context):
+    bedrock = boto3.client("bedrock-runtime", region_name=BEDROCK_REGION)
+    response = bedrock.invoke_model(
+        modelId=MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 2000,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": context
+                }
+            ]
+        })
+    )
+    result = json.loads(response["body"].read())
+    return result["content"][0]["text"]
+
+
+def _parse_ai_response(ai_response):
+    """Extract the JSON object from the model output, falling back to plain text"""
+    try:
+        json_start = ai_response.find('{')
+        json_end = ai_response.rfind('}') + 1
+        if json_start != -1 and json_end > json_start:
+            return json.loads(ai_response[json_start:json_end])
+    except json.JSONDecodeError:
+        pass
+    return {
+        "summary": ai_response,
+        "patterns": [],
+        "predictions": [],
+        "recommendations": [],
+        "riskScore": 50
+    }
+
+
+def build_analysis(inputs, samples):
+    """Run the forecasts and the Bedrock analysis over collected inputs"""
+    if not inputs["total"]:
+        return _empty_analysis()
+
+    regression_result = forecast_volume(inputs["dailyHistory"])
+    breakdowns = forecast_breakdowns(inputs)
+    rising = [
+        {"name": entry["name"], "nextWeekTotal": entry["nextWeekTotal"], "currentWeekTotal": entry["currentWeekTotal"]}
+        for entry in breakdowns["logGroups"] + breakdowns["signatures"]
+        if entry["nextWeekTotal"] > entry["currentWeekTotal"]
+    ][:5]
+    avg_resolution = inputs["avgResolutionTime"]
+
+    context = f"""
+Analyze the following incident data from the last 30 days and provide predictive insights:
+
+INCIDENT STATISTICS:
+- Total Incidents: {inputs['total']}
+- Severity Distribution: {json.dumps(inputs['severityCounts'])}
+- Top Error Types: {json.dumps(_top(inputs['errorTypes'], 5))}
+- Affected Services: {json.dumps(_top(inputs['logGroups'], 5))}
+- Average Resolution Time: {avg_resolution if avg_resolution is not None else 'N/A'} minutes
+- Peak Hours: {json.dumps(_top(inputs['timeDistribution'], 3))}
+
+VOLUME FORECAST ({regression_result['model']} model):
+- Trend: {regression_result['trend']} (slope: {regression_result['slope']})
+- Predicted Next Week Total: {regression_result['nextWeekTotal']} incidents (90% range: {regression_result.get('nextWeekRange')})
+- Current Week Total: {regression_result['currentWeekTotal']} incidents  
+- Expected Change: {regression_result['percentageChange']}%
+- Model Confidence: {regression_result['confidence']}%
+- Daily Predictions: {json.dumps(regression_result['predictions'])}
+- Series Expected To Rise: {json.dumps(rising)}
+
+RECENT INCIDENT SAMPLES (last 10):
+{json.dumps(samples, indent=2)}
+
+Based on this data, provide:
+1. PATTERN ANALYSIS: What recurring patterns do you see?
+2. RISK ASSESSMENT: What is the overall system health risk score (0-100)?
+3. PREDICTIONS: What types of incidents are likely to occur in the next 7 days based on the forecast?
+4. PREVENTION RECOMMENDATIONS: What proactive steps should be taken to prevent future incidents?
+5. RESOURCE RECOMMENDATIONS: What resources or configurations need attention?
+
+Format your response as JSON with these keys:
+- riskScore (number 0-100)
+- healthStatus (string: "Healthy", "Warning", "Critical")
+- patterns (array of strings describing patterns found)
+- predictions (array of objects with: type, probability, timeframe, impact)
+- recommendations (array of objects with: priority, action, reason, impact)
+- resourceAlerts (array of objects with: resource, issue, urgency)
+- summary (string with executive summary)
+"""
+
+    analysis_data = _parse_ai_response(_invoke_bedrock(context))
+
+    # Add metadata
+    analysis_data["incidentCount"] = inputs["total"]
+    analysis_data["analysisDate"] = datetime.utcnow().isoformat() + "Z"
+    analysis_data["timeRange"] = "Last 30 days"
+    analysis_data["severityBreakdown"] = inputs["severityCounts"]
+    analysis_data["topErrorTypes"] = _top(inputs["errorTypes"], 5)
+    analysis_data["avgResolutionTime"] = avg_resolution
+
+    # Add volume forecast
+    analysis_data["linearRegression"] = {
+        "trend": regression_result["trend"],
+        "slope": regression_result["slope"],
+        "model": regression_result["model"],
+        "confidence": regression_result["confidence"],
+        "nextWeekPrediction": {
+            "total": regression_result["nextWeekTotal"],
+            "range": regression_result.get("nextWeekRange"),
+            "dailyBreakdown": regression_result["predictions"],
+            "percentageChange": regression_result["percentageChange"],
+            "comparedTo": "current week"
+        },
+        "currentWeekTotal": regression_result["currentWeekTotal"]
+    }
+    analysis_data["seriesForecasts"] = breakdowns
+
+    # Add daily incident history for charting
+    analysis_data["dailyHistory"] = [{"date": day, "count": count} for day, count in inputs["dailyHistory"]]
+    return analysis_data
+
+
+def recent_samples(limit=10):
+    """Newest incident headers in the shape the analysis prompt expects"""
+    items, _ = incident_store.list_incidents(limit, attributes=SAMPLE_ATTRIBUTES)
+    return [
+        {
+            "summary": item.get("Summary", "Unknown error"),
+            "severity": item.get("Severity", "UNKNOWN"),
+            "rootCause": item.get("RootCause", "Unknown"),
+            "tags": item.get("Tags", []),
+            "status": item.get("Status", "OPEN"),
+            "logGroup": item.get("LogGroup", "Unknown"),
+        }
+        for item in items
+    ]
+
+
+def generate_snapshot(reason="schedule"):
+    """Compute a fresh analysis and publish it as the next snapshot version"""
+    latest = aggregate_store.aggregate_table.get_item(Key=_latest_key()).get("Item", {})
+    pending = int(latest.get("PendingIncidents", 0))
+
+    analysis = build_analysis(collect_inputs(), recent_samples())
+    generated_at = datetime.utcnow().isoformat() + "Z"
+    body = json.dumps(analysis, default=str)
+
+    version = int(aggregate_store.aggregate_table.update_item(
+        Key=_latest_key(),
+        UpdateExpression="ADD VersionCounter :one",
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="UPDATED_NEW",
+    )["Attributes"]["VersionCounter"])
+
+    expires = int((datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()) + SNAPSHOT_TTL_SECONDS
+    aggregate_store.aggregate_table.put_item(Item={
+        "AggregateKey": PREDICTIVE_KEY,
+        "Bucket": f"{SNAPSHOT_PREFIX}{version:08d}",
+        "Version": version,
+        "GeneratedAt": generated_at,
+        "Reason": reason,
+        "Analysis": body,
+        "ExpiresAt": expires,
+    })
+
+    # Incidents that arrived while computing stay pending for the next refresh
+    aggregate_store.aggregate_table.update_item(
+        Key=_latest_key(),
+        UpdateExpression=(
+            "SET Version = :v, GeneratedAt = :g, Reason = :r, Analysis = :a "
+            "ADD PendingIncidents :done REMOVE RefreshRequestedAt"
+        ),
+        ExpressionAttributeValues={":v": version, ":g": generated_at, ":r": reason, ":a": body, ":done": -pending},
+    )
+    print(f"[PREDICTIVE] Published snapshot v{version} ({reason}, {analysis.get('incidentCount', 0)} incidents)")
+    return {"version": version, "generatedAt": generated_at, "incidentCount": analysis.get("incidentCount", 0)}
+
+
+def latest_snapshot():
+    """The current snapshot as {version, generatedAt, ageSeconds, reason, analysis}, or None"""
+    item = aggregate_store.aggregate_table.get_item(Key=_latest_key()).get("Item", {})
+    if not item.get("Analysis"):
+        return None
+    generated = datetime.fromisoformat(item["GeneratedAt"].replace("Z", "+00:00")).replace(tzinfo=None)
+    return {
+        "version": int(item["Version"]),
+        "generatedAt": item["GeneratedAt"],
+        "ageSeconds": int((datetime.utcnow() - generated).total_seconds()),
+        "reason": item.get("Reason"),
+        "refreshRequested": bool(item.get("RefreshRequestedAt")),
+        "analysis": json.loads(item["Analysis"]),
+    }
+
+
+def request_refresh(reason):
+    """
+    Ask the predictive Lambda for a new snapshot, at most once per
+    REFRESH_COOLDOWN_SECONDS. Returns True if a refresh was started.
+    """
+    if not lambda_client:
+        return False
+    now = datetime.utcnow()
+    try:
+        aggregate_store.aggregate_table.update_item(
+            Key=_latest_key(),
+            UpdateExpression="SET RefreshRequestedAt = :now",
+            ConditionExpression="attribute_not_exists(RefreshRequestedAt) OR RefreshRequestedAt < :cutoff",
+            ExpressionAttributeValues={
+                ":now": now.isoformat() + "Z",
+                ":cutoff": (now - timedelta(seconds=REFRESH_COOLDOWN_SECONDS)).isoformat() + "Z",
+            },
+        )
+    except aggregate_store.aggregate_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+    lambda_client.invoke(
+        FunctionName=PREDICTIVE_FUNCTION_NAME,
+        InvocationType="Event",
+        Payload=json.dumps({"reason": reason}).encode("utf-8"),
+    )
+    print(f"[PREDICTIVE] Requested snapshot refresh ({reason})")
+    return True
+
+
+def note_new_incidents(count):
+    """Count new incidents toward the volume trigger; refresh once enough arrived"""
+    if count <= 0:
+        return False
+    response = aggregate_store.aggregate_table.update_item(
+        Key=_latest_key(),
+        UpdateExpression="ADD PendingIncidents :n",
+        ExpressionAttributeValues={":n": count},
+        ReturnValues="UPDATED_NEW",
+    )
+    if int(response["Attributes"]["PendingIncidents"]) >= REFRESH_INCIDENTS:
+        return request_refresh("volume")
+    return False
@@ -0,0 +1,20 @@
+"""
+RCRA Predictive Analysis Lambda
+Generates predictive-analysis snapshots
+
+Runs on a schedule and on demand (volume trigger from the stream
+processor, or a refresh request from the dashboard); see
+predictive_analysis for how snapshots are built and served.
+"""
+
+import predictive_analysis
+
+
+def handler(event, context):
+    reason = (event or {}).get("reason", "schedule")
+    try:
+        snapshot = predictive_analysis.generate_snapshot(reason)
+        return {"success": True, **snapshot}
+    except Exception as e:
+        print(f"[PREDICTIVE] Snapshot generation failed: {str(e)}")
+        return {"success": False, "error": str(e)}
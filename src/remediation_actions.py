@@ -0,0 +1,320 @@
+"""
+RCRA Remediation Actions
+One action registry shared by automated and approved remediation
+
+enhanced_remediator_lambda (automatic, per incident) and the dashboard
+approval path (single incidents and batch jobs) both pick an action with
+select_action() and execute it with run(); they only differ in policy
+(who may remediate what) and in how they label the outcome.
+
+Each ACTIONS entry is either:
+
+- "lambda"    plan(configuration, context) returns the configuration
+              changes for the target function; run() merges the plans of
+              every action requested for one function into a single
+              update, applied and verified with remediation_verifier
+- "advisory"  a fixed outcome (notification / recommendation) with no
+              AWS change
+
+Timeout and memory plans size the new setting from the function's recent
+usage (right_sizing) instead of doubling it.
+
+run() times every phase (config read, plan, apply, verify) and reports
+the timings with the result, so guards and performance work made here
+apply to every caller. The whole run shares one deadline
+(DEADLINE_SECONDS, kept below the callers' Lambda timeouts): usage reads,
+waits for in-flight updates and verification all stop at it, and a change
+that could not be sent in time is reported as FAILED rather than sent late.
+An update that was sent but had not settled by the deadline is
+PENDING_VERIFICATION, not REMEDIATED.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import remediation_verifier
+import right_sizing
+
+# Lambda configuration ceilings
+MAX_TIMEOUT_SECONDS = 900
+MAX_MEMORY_MB = 10240
+
+# Environment variable bumped to force fresh execution environments
+RESTART_MARKER = "LAST_RESTART"
+
+REMEDIATED = "REMEDIATED"
+LIMIT_REACHED = "LIMIT_REACHED"
+FAILED = "FAILED"
+PENDING_VERIFICATION = "PENDING_VERIFICATION"
+
+# Overall budget of one run() (config read through verification)
+DEADLINE_SECONDS = float(os.environ.get("REMEDIATION_DEADLINE_SECONDS", "90"))
+
+
+def _usage(configuration, context):
+    # One usage read per run, shared by the timeout and memory plans
+    if "usage" not in context:
+        context["usage"] = right_sizing.usage(context["functionName"], configuration, context["deadline"])
+    return context["usage"]
+
+
+def _plan_timeout(configuration, context):
+    current_timeout = configuration["Timeout"]
+    if current_timeout >= MAX_TIMEOUT_SECONDS:
+        return {"limit": f"Timeout already at maximum ({current_timeout}s). Consider optimizing code or splitting function."}
+    usage = _usage(configuration, context)
+    new_timeout, basis = right_sizing.timeout_target(configuration, usage, MAX_TIMEOUT_SECONDS)
+    memory = configuration["MemorySize"]
+    return {
+        "changes": {"Timeout": new_timeout},
+        "details": f"Increased Lambda timeout from {current_timeout}s to {new_timeout}s ({basis})",
+        "awsAction": {
+            "service": "lambda",
+            "action": "update_function_configuration",
+            "resource": context["functionName"],
+            "changes": {"timeout_before": current_timeout, "timeout_after": new_timeout},
+            "rightSizing": {
+                "basis": basis,
+                "usage": usage,
+                "costEstimate": right_sizing.cost_estimate(
+                    usage,
+                    (current_timeout, memory),
+                    (new_timeout, memory),
+                    (min(current_timeout * 2, MAX_TIMEOUT_SECONDS), memory),
+                ),
+            },
+        },
+    }
+
+
+def _plan_memory(configuration, context):
+    current_memory = configuration["MemorySize"]
+    if current_memory >= MAX_MEMORY_MB:
+        return {"limit": f"Memory already at maximum ({current_memory}MB). Consider code optimization."}
+    usage = _usage(configuration, context)
+    new_memory, basis = right_sizing.memory_target(configuration, usage, MAX_MEMORY_MB)
+    timeout = configuration["Timeout"]
+    return {
+        "changes": {"MemorySize": new_memory},
+        "details": f"Increased Lambda memory from {current_memory}MB to {new_memory}MB ({basis})",
+        "awsAction": {
+            "service": "lambda",
+            "action": "update_function_configuration",
+            "resource": context["functionName"],
+            "changes": {"memory_before": current_memory, "memory_after": new_memory},
+            "rightSizing": {
+                "basis": basis,
+                "usage": usage,
+                "costEstimate": right_sizing.cost_estimate(
+                    usage,
+                    (timeout, current_memory),
+                    (timeout, new_memory),
+                    (timeout, min(current_memory * 2, MAX_MEMORY_MB)),
+                ),
+            },
+        },
+    }
+
+
+def _restart_planner(reason, details):
+    def plan(configuration, context):
+        env_vars = dict(configuration.get("Environment", {}).get("Variables", {}))
+        env_vars[RESTART_MARKER] = datetime.utcnow().isoformat()
+        return {
+            "changes": {"Environment": {"Variables": env_vars}},
+            "details": details.format(function=context["functionName"]),
+            "awsAction": {
+                "service": "lambda",
+                "action": "restart_function",
+                "resource": context["functionName"],
+                "changes": {
+                    "method": "environment_variable_update",
+                    "reason": reason,
+                    "timestamp": env_vars[RESTART_MARKER],
+                },
+            },
+        }
+    return plan
+
+
+ACTIONS = {
+    "timeout": {
+        "kind": "lambda",
+        "scenario": "lambdaTimeout",
+        "matches": lambda text: "timeout" in text or "timed out" in text,
+        "plan": _plan_timeout,
+        "recommendation": "Timeout detected. Recommendation: Increase Lambda timeout.",
+        "failure": "Failed to increase timeout",
+    },
+    "memory": {
+        "kind": "lambda",
+        "scenario": "outOfMemory",
+        "matches": lambda text: "memory" in text or "outofmemory" in text,
+        "plan": _plan_memory,
+        "recommendation": "Memory issue detected. Recommendation: Increase Lambda memory allocation.",
+        "failure": "Failed to increase memory",
+    },
+    "connectionPool": {
+        "kind": "lambda",
+        "scenario": "connectionPool",
+        "matches": lambda text: "connection" in text and ("pool" in text or "exhausted" in text),
+        "plan": _restart_planner("connection_pool", "Restarted Lambda {function} to reset connection pool"),
+        "recommendation": "Connection pool exhaustion detected. Recommendation: Restart Lambda or increase connection limits.",
+        "failure": "Failed to restart Lambda",
+    },
+    "throttling": {
+        "kind": "advisory",
+        "scenario": "throttling",
+        "matches": lambda text: "throttle" in text or "rate limit" in text,
+        "actionTaken": "NOTIFICATION_SENT",
+        "details": "API throttling detected. CloudWatch alarm created. AWS Support ticket recommended for quota increase.",
+        "awsActions": [{
+            "service": "cloudwatch",
+            "action": "create_alarm",
+            "resource": "api-throttle-alarm",
+            "changes": {"alarm_created": True, "recommendation": "Request API Gateway quota increase"},
+        }],
+    },
+    "cache": {
+        "kind": "advisory",
+        "scenario": "cacheCorruption",
+        "matches": lambda text: "cache" in text and ("corrupt" in text or "invalid" in text),
+        "actionTaken": "ANALYSIS_ONLY",
+        "details": "Cache corruption detected. Recommendation: Flush cache and rebuild. Manual approval required for production.",
+        "awsActions": [{
+            "service": "elasticache",
+            "action": "flush_cache",
+            "resource": "pending_manual_approval",
+            "changes": {"status": "requires_approval", "impact": "temporary_cache_miss_spike"},
+        }],
+    },
+    "healthCheck": {
+        "kind": "lambda",
+        "scenario": None,
+        "matches": lambda text: "health check" in text or "unhealthy" in text,
+        "plan": _restart_planner("health_check_failure", "Restarted {function} due to health check failure"),
+        "recommendation": "Health check failure detected. Recommendation: Restart the service.",
+        "failure": "Failed to restart",
+    },
+    "restart": {
+        "kind": "lambda",
+        "scenario": None,
+        "matches": lambda text: False,
+        "plan": _restart_planner("generic", "Restarted Lambda {function}"),
+        "recommendation": "Recommendation: Restart the Lambda function.",
+        "failure": "Failed to restart Lambda",
+    },
+}
+
+
+def select_action(raw_message, scenario=None, default=None, kinds=("lambda", "advisory")):
+    """
+    Registry action for an incident: the action registered for `scenario`
+    if any, else the first whose message pattern matches, else `default`.
+    Only actions of the given kinds are considered.
+    """
+    candidates = [name for name, spec in ACTIONS.items() if spec["kind"] in kinds]
+    for name in candidates:
+        if scenario and ACTIONS[name]["scenario"] == scenario:
+            return name
+    text = (raw_message or "").lower()
+    for name in candidates:
+        if ACTIONS[name]["matches"](text):
+            return name
+    return default
+
+
+def advisory_result(action):
+    """Fixed outcome of an advisory action: {actionTaken, details, awsActions}"""
+    spec = ACTIONS[action]
+    return {
+        "actionTaken": spec["actionTaken"],
+        "details": spec["details"],
+        "awsActions": [dict(aws_action) for aws_action in spec["awsActions"]],
+    }
+
+
+def _elapsed_ms(started):
+    return int((time.monotonic() - started) * 1000)
+
+
+def run(lambda_client, function_name, actions, deadline=None):
+    """
+    Execute one or more Lambda actions against a function with a single
+    configuration read and a single verified update, within
+    DEADLINE_SECONDS (or the caller's earlier `deadline`, a
+    time.monotonic() value). Returns {outcome (REMEDIATED, LIMIT_REACHED,
+    PENDING_VERIFICATION or FAILED), success, details, awsActions,
+    verification, timeToEffectiveMs, timings}; success is False for a
+    pending verification.
+    """
+    actions = list(dict.fromkeys(actions))
+    timings = {}
+    started = time.monotonic()
+    deadline = min(started + DEADLINE_SECONDS, deadline or float("inf"))
+    context = {"functionName": function_name, "deadline": deadline}
+    try:
+        phase = time.monotonic()
+        configuration = lambda_client.get_function_configuration(FunctionName=function_name)
+        timings["configReadMs"] = _elapsed_ms(phase)
+
+        phase = time.monotonic()
+        changes = {}
+        details = []
+        aws_actions = []
+        for action in actions:
+            plan = ACTIONS[action]["plan"](configuration, context)
+            if "limit" in plan:
+                details.append(plan["limit"])
+                continue
+            changes.update(plan["changes"])
+            details.append(plan["details"])
+            aws_actions.append(plan["awsAction"])
+        timings["planMs"] = _elapsed_ms(phase)
+
+        verification = None
+        outcome = LIMIT_REACHED
+        if changes:
+            phase = time.monotonic()
+            sent_at = remediation_verifier.update_configuration(
+                lambda_client, function_name, deadline=deadline, **changes
+            )
+            timings["applyMs"] = _elapsed_ms(phase)
+
+            phase = time.monotonic()
+            verification = remediation_verifier.verify(lambda_client, function_name, sent_at, deadline=deadline)
+            timings["verifyMs"] = _elapsed_ms(phase)
+
+            if verification["status"] in ("Failed", "ProbeFailed"):
+                outcome = FAILED
+            elif verification["status"] == "TimedOut":
+                outcome = PENDING_VERIFICATION
+            else:
+                outcome = REMEDIATED
+        details = "; ".join(details)
+        if verification:
+            details += f" ({remediation_verifier.describe(verification)})"
+        result = {
+            "outcome": outcome,
+            "success": outcome in (REMEDIATED, LIMIT_REACHED),
+            "details": details,
+            "awsActions": aws_actions,
+            "verification": verification,
+            "timeToEffectiveMs": verification["timeToEffectiveMs"] if verification else None,
+        }
+    except Exception as e:
+        print(f"[REMEDIATION] {'+'.join(actions)} on {function_name} failed: {str(e)}")
+        result = {
+            "outcome": FAILED,
+            "success": False,
+            "details": "; ".join(f"{ACTIONS[action]['failure']}: {str(e)}" for action in actions),
+            "awsActions": [],
+            "verification": None,
+            "timeToEffectiveMs": None,
+        }
+
+    timings["totalMs"] = _elapsed_ms(started)
+    result["timings"] = timings
+    print(f"[REMEDIATION] {'+'.join(actions)} on {function_name}: {result['outcome']} timings={timings}")
+    return result
@@ -0,0 +1,165 @@
+"""
+RCRA Remediation Jobs
+Job records for approved remediations that run outside the API request
+
+Approved remediations (POST /remediate with approve_and_remediate, and
+POST /remediate/batch) are submitted as jobs. The dashboard API writes a
+QUEUED record to RCRARemediationJobTable, invokes the remediation worker
+Lambda asynchronously and returns the job id straight away. The worker
+claims the job (QUEUED -> RUNNING, so Lambda's async retries never run it
+twice), counts finished functions into the record's progress and stores
+the final result. GET /remediation-jobs/{id} reads the record.
+
+Without REMEDIATION_WORKER_FUNCTION_NAME (local runs and tests) start()
+declines and the caller runs the job inline.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import boto3
+
+dynamodb = boto3.resource("dynamodb")
+
+JOB_TABLE_NAME = os.environ.get("JOB_TABLE_NAME", "RCRARemediationJobTable")
+job_table = dynamodb.Table(JOB_TABLE_NAME)
+
+WORKER_FUNCTION_NAME = os.environ.get("REMEDIATION_WORKER_FUNCTION_NAME")
+lambda_client = boto3.client("lambda") if WORKER_FUNCTION_NAME else None
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+# Job records are dropped this long after submission
+JOB_TTL_SECONDS = 7 * 24 * 3600
+
+# A job not updated for this long has outlived its worker (Lambda timeout)
+STALE_JOB_SECONDS = 15 * 60
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def create_job(kind, request, total):
+    """Record a QUEUED job; `total` is the number of units progress counts toward"""
+    now = datetime.utcnow()
+    job_id = f"job-{uuid.uuid4().hex[:16]}"
+    job_table.put_item(Item={
+        "JobId": job_id,
+        "Kind": kind,
+        "Status": QUEUED,
+        "Request": json.dumps(request),
+        "Total": total,
+        "Done": 0,
+        "CreatedAt": now.isoformat() + "Z",
+        "UpdatedAt": now.isoformat() + "Z",
+        "ExpiresAt": int((now - datetime(1970, 1, 1)).total_seconds()) + JOB_TTL_SECONDS,
+    })
+    return job_id
+
+
+def start(job_id):
+    """
+    Hand a job to the worker Lambda. Returns False when no worker is
+    configured, in which case the caller runs it inline.
+    """
+    if not lambda_client:
+        return False
+    lambda_client.invoke(
+        FunctionName=WORKER_FUNCTION_NAME,
+        InvocationType="Event",
+        Payload=json.dumps({"jobId": job_id}).encode("utf-8"),
+    )
+    print(f"[JOBS] Submitted {job_id} to {WORKER_FUNCTION_NAME}")
+    return True
+
+
+def claim(job_id):
+    """Move a job from QUEUED to RUNNING; returns (kind, request) or None if it was already taken"""
+    try:
+        response = job_table.update_item(
+            Key={"JobId": job_id},
+            UpdateExpression="SET #status = :running, StartedAt = :now, UpdatedAt = :now",
+            ConditionExpression="#status = :queued",
+            ExpressionAttributeNames={"#status": "Status"},
+            ExpressionAttributeValues={":running": RUNNING, ":queued": QUEUED, ":now": _now()},
+            ReturnValues="ALL_NEW",
+        )
+    except job_table.meta.client.exceptions.ConditionalCheckFailedException:
+        print(f"[JOBS] {job_id} is not queued; skipping")
+        return None
+    job = response["Attributes"]
+    return job["Kind"], json.loads(job["Request"])
+
+
+def set_total(job_id, total):
+    """Correct a job's progress total once the worker knows the real unit count"""
+    job_table.update_item(
+        Key={"JobId": job_id},
+        UpdateExpression="SET #total = :total, UpdatedAt = :now",
+        ExpressionAttributeNames={"#total": "Total"},
+        ExpressionAttributeValues={":total": total, ":now": _now()},
+    )
+
+
+def record_progress(job_id, done=1):
+    """Count finished units toward the job's progress (safe from worker threads)"""
+    job_table.update_item(
+        Key={"JobId": job_id},
+        UpdateExpression="ADD Done :n SET UpdatedAt = :now",
+        ExpressionAttributeValues={":n": done, ":now": _now()},
+    )
+
+
+def complete(job_id, result=None, error=None):
+    """Store a job's outcome: SUCCEEDED when the result reports success, else FAILED"""
+    status = SUCCEEDED if error is None and (result or {}).get("success") else FAILED
+    error = error or (result or {}).get("error")
+    updates = {"Status": status, "CompletedAt": _now(), "UpdatedAt": _now()}
+    if result is not None:
+        updates["Result"] = json.dumps(result, default=str)
+    if error:
+        updates["Error"] = error
+
+    names = {f"#a{i}": attr for i, attr in enumerate(updates)}
+    job_table.update_item(
+        Key={"JobId": job_id},
+        UpdateExpression="SET " + ", ".join(f"#a{i} = :v{i}" for i in range(len(updates))),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues={f":v{i}": value for i, value in enumerate(updates.values())},
+    )
+    return status
+
+
+def get_job(job_id):
+    """API view of a job record, or None if unknown/expired"""
+    item = job_table.get_item(Key={"JobId": job_id}).get("Item")
+    if not item:
+        return None
+
+    status = item["Status"]
+    error = item.get("Error")
+    if status in (QUEUED, RUNNING):
+        updated = datetime.fromisoformat(item["UpdatedAt"].replace("Z", ""))
+        if datetime.utcnow() - updated > timedelta(seconds=STALE_JOB_SECONDS):
+            status = FAILED
+            error = error or "Job stopped reporting progress"
+
+    return {
+        "jobId": item["JobId"],
+        "kind": item["Kind"],
+        "status": status,
+        "finished": status in (SUCCEEDED, FAILED),
+        "progress": {"done": int(item.get("Done", 0)), "total": int(item.get("Total", 0))},
+        "request": json.loads(item["Request"]),
+        "result": json.loads(item["Result"]) if item.get("Result") else None,
+        "error": error,
+        "createdAt": item.get("CreatedAt"),
+        "startedAt": item.get("StartedAt"),
+        "completedAt": item.get("CompletedAt"),
+    }
@@ -0,0 +1,166 @@
+"""
+RCRA Remediation Verifier
+Waits for Lambda configuration changes to take effect and checks the result
+
+update_function_configuration returns as soon as the change is accepted;
+Lambda then applies it asynchronously, reporting LastUpdateStatus
+InProgress -> Successful | Failed. A second update issued meanwhile is
+rejected with ResourceConflictException. Remediations therefore:
+
+- update_configuration(): wait until no update is in progress, apply the
+  change and retry on ResourceConflictException with backoff
+- verify(): poll the function with exponential backoff until the update
+  settles (or VERIFY_TIMEOUT_SECONDS passes), optionally invoke a health
+  probe, and report timeToEffectiveMs from the moment the change was sent
+
+Both take an optional `deadline` (time.monotonic() value) shared by the
+whole remediation run; waits never outlast it, and update_configuration
+raises DeadlineExceeded rather than send a change while an earlier update
+is still in progress.
+
+With REMEDIATION_PROBE_PAYLOAD set (a JSON event), verify() invokes the
+remediated function with it once the update is live (the caller's role
+then needs lambda:InvokeFunction); functions that are unsafe to invoke
+should leave it unset.
+"""
+
+import os
+import time
+
+VERIFY_TIMEOUT_SECONDS = float(os.environ.get("VERIFY_TIMEOUT_SECONDS", "60"))
+
+# Poll backoff: first wait, growth factor and ceiling (seconds)
+POLL_INITIAL_SECONDS = 0.5
+POLL_BACKOFF = 2.0
+POLL_MAX_SECONDS = 5.0
+
+# update_function_configuration attempts when another update is in flight
+MAX_UPDATE_ATTEMPTS = 4
+
+PROBE_PAYLOAD = os.environ.get("REMEDIATION_PROBE_PAYLOAD")
+
+
+class DeadlineExceeded(Exception):
+    """The remediation run's deadline passed before the change could be sent"""
+
+
+def _remaining(deadline):
+    return float("inf") if deadline is None else deadline - time.monotonic()
+
+
+def _delays():
+    delay = POLL_INITIAL_SECONDS
+    while True:
+        yield delay
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
+
+
+def wait_for_update(lambda_client, function_name, timeout=None, deadline=None):
+    """
+    Poll until the function's LastUpdateStatus leaves InProgress, for at
+    most `timeout` seconds (VERIFY_TIMEOUT_SECONDS) and never past
+    `deadline`. Returns (configuration, status, polls); status is
+    Successful, Failed or TimedOut.
+    """
+    timeout = VERIFY_TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + min(timeout, _remaining(deadline))
+    polls = 0
+    for delay in _delays():
+        configuration = lambda_client.get_function_configuration(FunctionName=function_name)
+        polls += 1
+        status = configuration.get("LastUpdateStatus", "Successful")
+        if status != "InProgress":
+            return configuration, status, polls
+        if time.monotonic() + delay > deadline:
+            return configuration, "TimedOut", polls
+        time.sleep(delay)
+
+
+def update_configuration(lambda_client, function_name, deadline=None, **changes):
+    """
+    update_function_configuration that waits out in-flight updates and
+    retries ResourceConflictException, all within `deadline`. Returns the
+    epoch time (seconds) the accepted update was sent at; raises
+    DeadlineExceeded (nothing sent) if an earlier update is still in
+    progress when time runs out.
+    """
+    delays = _delays()
+    for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+        _, status, _ = wait_for_update(lambda_client, function_name, deadline=deadline)
+        if status == "TimedOut":
+            raise DeadlineExceeded(f"{function_name} is still applying an earlier update; change not sent")
+        if _remaining(deadline) <= 0:
+            raise DeadlineExceeded(f"Remediation deadline passed before the change to {function_name} was sent")
+        sent_at = time.time()
+        try:
+            lambda_client.update_function_configuration(FunctionName=function_name, **changes)
+            return sent_at
+        except lambda_client.exceptions.ResourceConflictException:
+            delay = next(delays)
+            if attempt == MAX_UPDATE_ATTEMPTS or delay >= _remaining(deadline):
+                raise
+            print(f"[VERIFY] Update of {function_name} conflicted; retrying ({attempt}/{MAX_UPDATE_ATTEMPTS})")
+            time.sleep(delay)
+
+
+def probe(lambda_client, function_name, payload=None):
+    """Invoke the function with a health-check payload; returns {ok, statusCode, durationMs, error}"""
+    started = time.time()
+    try:
+        response = lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType="RequestResponse",
+            Payload=(payload or PROBE_PAYLOAD).encode("utf-8"),
+        )
+        error = response.get("FunctionError")
+        return {
+            "ok": response.get("StatusCode") == 200 and not error,
+            "statusCode": response.get("StatusCode"),
+            "durationMs": int((time.time() - started) * 1000),
+            "error": error,
+        }
+    except Exception as e:
+        return {"ok": False, "statusCode": None, "durationMs": int((time.time() - started) * 1000), "error": str(e)}
+
+
+def verify(lambda_client, function_name, sent_at, probe_payload=None, deadline=None):
+    """
+    Wait for an update sent at `sent_at` to settle (within `deadline`) and
+    optionally probe the function. Returns {status, reason, polls,
+    waitedSeconds, timeToEffectiveMs, probe}: status is Successful, Failed,
+    TimedOut or ProbeFailed, and timeToEffectiveMs is set once the change
+    is live.
+    """
+    started = time.monotonic()
+    configuration, status, polls = wait_for_update(lambda_client, function_name, deadline=deadline)
+    verification = {
+        "status": status,
+        "reason": configuration.get("LastUpdateStatusReason"),
+        "polls": polls,
+        "waitedSeconds": round(time.monotonic() - started, 1),
+        "timeToEffectiveMs": int((time.time() - sent_at) * 1000) if status == "Successful" else None,
+        "probe": None,
+    }
+    payload = probe_payload or PROBE_PAYLOAD
+    if status == "Successful" and payload and _remaining(deadline) > 0:
+        verification["probe"] = probe(lambda_client, function_name, payload)
+        if not verification["probe"]["ok"]:
+            verification["status"] = "ProbeFailed"
+    print(f"[VERIFY] {function_name}: {verification['status']} after {polls} poll(s), "
+          f"time to effective {verification['timeToEffectiveMs'] or '-'}ms")
+    return verification
+
+
+def describe(verification):
+    """Short suffix for remediation details"""
+    status = verification["status"]
+    if status == "Successful":
+        text = f"effective after {verification['timeToEffectiveMs'] / 1000:.1f}s"
+        if verification.get("probe"):
+            text += f", health probe ok ({verification['probe']['durationMs']}ms)"
+        return text
+    if status == "TimedOut":
+        return f"update still in progress after {verification.get('waitedSeconds', VERIFY_TIMEOUT_SECONDS):.0f}s; pending verification"
+    if status == "ProbeFailed":
+        return f"update applied but health probe failed ({verification['probe']['error']})"
+    return f"update failed: {verification.get('reason') or 'unknown reason'}"
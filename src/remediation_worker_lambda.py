@@ -0,0 +1,18 @@
+"""
+RCRA Remediation Worker Lambda
+Runs approved remediation jobs submitted by the dashboard API
+
+Invoked asynchronously with {"jobId": ...}; see remediation_jobs for the
+job lifecycle and dashboard_api_lambda.run_remediation_job for the work.
+"""
+
+from dashboard_api_lambda import run_remediation_job
+
+
+def handler(event, context):
+    job_id = (event or {}).get("jobId")
+    if not job_id:
+        return {"success": False, "error": "jobId is required"}
+    status = run_remediation_job(job_id)
+    print(f"[JOBS] {job_id} finished with status {status}")
+    return {"success": status is not None, "jobId": job_id, "status": status}
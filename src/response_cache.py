@@ -0,0 +1,110 @@
+"""
+Dashboard Response Cache
+Short-lived cache of GET responses with generation-based ETags
+
+Cached bodies are keyed by route plus sorted query parameters. Every
+incident write bumps a shared generation counter (CACHE/GENERATION in
+RCRAAggregateTable), either from the stream processor or directly from
+the dashboard's own write endpoints. ETags are built from that generation
+and the cache key only, so any Lambda container can answer If-None-Match
+with a 304 after a single small get_item for as long as nothing changed,
+and a new incident invalidates every container's cache at once.
+
+Responses whose content also moves with the clock (rolling 24h counts,
+time windows) get no ETag: they are served from the container cache for
+at most CACHE_TTL_SECONDS and carry a matching Cache-Control max-age.
+When the generation cannot be read, callers skip the cache and the ETag
+for that request.
+"""
+
+import hashlib
+import os
+import time
+
+import aggregate_store
+
+CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "15"))
+
+# How long a container trusts its last read of the generation counter
+GENERATION_CHECK_SECONDS = 1
+
+CACHE_KEY = "CACHE"
+GENERATION_BUCKET = "GENERATION"
+
+# Bound on cached bodies per container
+MAX_ENTRIES = 256
+
+_entries = {}
+_generation = {"value": None, "checked_at": 0.0}
+
+
+def cache_key(path, query_params):
+    """Route plus query parameters in a stable order"""
+    query = "&".join(f"{k}={v}" for k, v in sorted((query_params or {}).items()))
+    return f"{path}?{query}"
+
+
+def current_generation():
+    """
+    Shared data generation, re-read at most once per
+    GENERATION_CHECK_SECONDS; None when it cannot be read (not cached)
+    """
+    now = time.time()
+    if _generation["value"] is not None and now - _generation["checked_at"] < GENERATION_CHECK_SECONDS:
+        return _generation["value"]
+    try:
+        item = aggregate_store.aggregate_table.get_item(
+            Key={"AggregateKey": CACHE_KEY, "Bucket": GENERATION_BUCKET}
+        ).get("Item", {})
+    except Exception as e:
+        print(f"[CACHE] Failed to read generation: {str(e)}")
+        _generation["value"] = None
+        return None
+    _generation["value"] = int(item.get("Generation", 0))
+    _generation["checked_at"] = now
+    return _generation["value"]
+
+
+def etag_for(key, generation):
+    """Weak ETag for a cache key at a data generation"""
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f'W/"{generation}-{digest}"'
+
+
+def get(key, generation):
+    """Cached body for key if it was stored at this generation within CACHE_TTL_SECONDS"""
+    entry = _entries.get(key)
+    if entry and entry[0] == generation and time.time() - entry[1] < CACHE_TTL_SECONDS:
+        return entry[2]
+    return None
+
+
+def put(key, generation, body):
+    if len(_entries) >= MAX_ENTRIES:
+        _entries.clear()
+    _entries[key] = (generation, time.time(), body)
+
+
+def invalidate():
+    """Bump the shared generation so every container drops its cached responses"""
+    _entries.clear()
+    try:
+        response = aggregate_store.aggregate_table.update_item(
+            Key={"AggregateKey": CACHE_KEY, "Bucket": GENERATION_BUCKET},
+            UpdateExpression="ADD Generation :one",
+            ExpressionAttributeValues={":one": 1},
+            ReturnValues="UPDATED_NEW",
+        )
+        _generation["value"] = int(response["Attributes"]["Generation"])
+        _generation["checked_at"] = time.time()
+    except Exception as e:
+        print(f"[CACHE] Failed to bump generation: {str(e)}")
+        _generation["value"] = None
+
+
+def cache_headers(etag=None):
+    """Cache-Control (plus the ETag when the response has one)"""
+    headers = {"Cache-Control": f"private, max-age={CACHE_TTL_SECONDS}, must-revalidate"}
+    if etag:
+        headers["ETag"] = etag
+    return headers
@@ -0,0 +1,327 @@
+"""
+RCRA Right-Sizing
+Timeout and memory targets derived from a function's recent usage
+
+Timeout and memory remediations used to double the setting whatever the
+function actually needed, overshooting (and billing for) headroom nobody
+used, once per incident. They now size from usage over the last
+LOOKBACK_HOURS:
+
+- REPORT log lines (Duration, Billed Duration, Max Memory Used), read from
+  the function's log group, at most MAX_SAMPLES of them. filter_log_events
+  only reads forward, so the lookback is walked newest-first in windows
+  that start small (WINDOW_FRACTION of it) and double; a window holding
+  more lines than are still wanted is narrowed toward its end, so a busy
+  function is sized from the invocations closest to the incident
+- CloudWatch AWS/Lambda metrics: the Invocations count, and Duration
+  percentiles when no REPORT lines are available (memory has no standard
+  metric, so memory sizing needs the log lines)
+
+The target is the PERCENTILE of the samples plus HEADROOM, and always at
+least MIN_GROWTH times the current setting: the incident itself shows the
+limit was hit, and invocations killed at the limit (timeouts, OOM) report
+the limit rather than what they needed. Without usage data the minimum
+step applies. Each plan carries monthly cost estimates at the current
+setting, the target and the old doubling, computed from the samples at
+LAMBDA_PRICE_PER_GB_SECOND.
+
+With RIGHT_SIZING_LOCAL_DIR set (local runs and tests) the REPORT lines
+come from <dir>/<function name>.log (the last segment of the log group)
+instead of CloudWatch Logs, through
+the same windowed reader, and no metrics are read, so sizing can be
+exercised offline; a function with no file sizes as "no usage data".
+Lines are oldest first; one starting with an ISO-8601 timestamp (as
+`aws logs tail` prints) is placed at that time, others one second after
+the line before, with the last line at the current time.
+
+Reading usage is bounded so it cannot eat the remediation's own time:
+each call has short connect/read timeouts and the reads stop once
+BUDGET_SECONDS (or the caller's deadline) has passed, sizing from
+whatever was read by then.
+"""
+
+import math
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.config import Config
+
+# Usage reads fail fast rather than stall a remediation
+CLIENT_CONFIG = Config(connect_timeout=2, read_timeout=5, retries={"max_attempts": 2})
+
+LOCAL_DIR = os.environ.get("RIGHT_SIZING_LOCAL_DIR")
+
+cloudwatch = boto3.client("cloudwatch", config=CLIENT_CONFIG) if not LOCAL_DIR else None
+logs_client = boto3.client("logs", config=CLIENT_CONFIG) if not LOCAL_DIR else None
+
+LOOKBACK_HOURS = int(os.environ.get("RIGHT_SIZING_LOOKBACK_HOURS", "24"))
+PERCENTILE = float(os.environ.get("RIGHT_SIZING_PERCENTILE", "99"))
+HEADROOM = float(os.environ.get("RIGHT_SIZING_HEADROOM", "0.3"))
+MIN_GROWTH = float(os.environ.get("RIGHT_SIZING_MIN_GROWTH", "1.25"))
+LAMBDA_PRICE_PER_GB_SECOND = float(os.environ.get("LAMBDA_PRICE_PER_GB_SECOND", "0.0000166667"))
+BUDGET_SECONDS = float(os.environ.get("RIGHT_SIZING_BUDGET_SECONDS", "10"))
+
+# REPORT lines read per sizing (filter_log_events pages of up to 10,000)
+MAX_SAMPLES = 2000
+MAX_LOG_CALLS = 8
+
+# First (newest) log window as a fraction of the lookback, and the
+# narrowest a window is cut down to when it holds too many lines
+WINDOW_FRACTION = 1 / 64
+MIN_WINDOW_MS = 60 * 1000
+
+# Lambda memory is set in 1MB steps; targets are rounded up to this
+MEMORY_STEP_MB = 64
+MIN_MEMORY_MB = 128
+
+REPORT_PATTERN = re.compile(
+    r"Duration: ([\d.]+) ms\s+Billed Duration: (\d+) ms\s+Memory Size: (\d+) MB\s+Max Memory Used: (\d+) MB"
+)
+
+# Samples within this fraction of the limit count as killed at the limit
+AT_LIMIT_RATIO = 0.98
+
+
+def _epoch_ms(value):
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def log_group_for(function_name, configuration):
+    """Log group the function writes to (custom LoggingConfig or the default)"""
+    return configuration.get("LoggingConfig", {}).get("LogGroup") or f"/aws/lambda/{function_name}"
+
+
+def parse_report(message):
+    """Usage sample from a Lambda REPORT log line, or None"""
+    match = REPORT_PATTERN.search(message or "")
+    if not match:
+        return None
+    return {
+        "durationMs": float(match.group(1)),
+        "billedMs": int(match.group(2)),
+        "memorySizeMb": int(match.group(3)),
+        "maxMemoryUsedMb": int(match.group(4)),
+    }
+
+
+class LocalLogs:
+    """filter_log_events over <directory>/<last log group segment>.log files"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Undated lines end at the time the reader was created
+        self.now = _epoch_ms(datetime.utcnow())
+
+    def _events(self, log_group):
+        path = os.path.join(self.directory, f"{log_group.rsplit('/', 1)[-1]}.log")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            lines = [line.rstrip("\n") for line in f if line.strip()]
+        events = []
+        for i, line in enumerate(lines):
+            timestamp = self.now - (len(lines) - 1 - i) * 1000
+            prefix = line.split(None, 1)[0]
+            try:
+                stamp = datetime.fromisoformat(prefix.replace("Z", "+00:00"))
+                timestamp = _epoch_ms(stamp.replace(tzinfo=None) - (stamp.utcoffset() or timedelta()))
+            except ValueError:
+                pass
+            events.append({"timestamp": timestamp, "message": line})
+        return events
+
+    def filter_log_events(self, logGroupName, startTime, endTime, filterPattern=None, nextToken=None):
+        page_size = 1000
+        events = [e for e in self._events(logGroupName) if startTime <= e["timestamp"] <= endTime]
+        events.sort(key=lambda e: e["timestamp"])
+        offset = int(nextToken or 0)
+        response = {"events": events[offset:offset + page_size]}
+        if offset + page_size < len(events):
+            response["nextToken"] = str(offset + page_size)
+        return response
+
+
+def _read_window(client, log_group, start_ms, end_ms, wanted, calls_left, until):
+    """
+    REPORT samples in [start_ms, end_ms), oldest first. Returns (samples,
+    complete, calls) where complete means the whole window was read.
+    """
+    samples = []
+    request = {
+        "logGroupName": log_group,
+        "startTime": start_ms,
+        "endTime": end_ms - 1,
+        "filterPattern": '"REPORT RequestId"',
+    }
+    calls = 0
+    while calls < calls_left and time.monotonic() < until:
+        response = client.filter_log_events(**request)
+        calls += 1
+        for event in response.get("events", []):
+            sample = parse_report(event.get("message"))
+            if sample:
+                samples.append(sample)
+        if not response.get("nextToken"):
+            return samples, True, calls
+        if len(samples) > wanted:
+            break
+        request["nextToken"] = response["nextToken"]
+    return samples, False, calls
+
+
+def _report_samples(log_group, start, until):
+    """The newest REPORT samples (up to MAX_SAMPLES) since `start`, oldest first"""
+    client = LocalLogs(LOCAL_DIR) if LOCAL_DIR else logs_client
+    start_ms = _epoch_ms(start)
+    window_end = _epoch_ms(datetime.utcnow()) + 1
+    width = max(MIN_WINDOW_MS, int((window_end - start_ms) * WINDOW_FRACTION))
+    chunks = []
+    count = 0
+    calls = 0
+    while window_end > start_ms and count < MAX_SAMPLES and calls < MAX_LOG_CALLS and time.monotonic() < until:
+        window_start = max(start_ms, window_end - width)
+        wanted = MAX_SAMPLES - count
+        samples, complete, used = _read_window(
+            client, log_group, window_start, window_end, wanted, MAX_LOG_CALLS - calls, until
+        )
+        calls += used
+        if not complete and window_end - window_start > MIN_WINDOW_MS and calls < MAX_LOG_CALLS:
+            # More lines than still wanted: what was read is the oldest part
+            # of the window, so retry on a narrower window nearer its end
+            width = max(MIN_WINDOW_MS, (window_end - window_start) // 4)
+            continue
+        chunks.append(samples[-wanted:])
+        count += len(chunks[-1])
+        window_end = window_start
+        width *= 2
+    return [sample for chunk in reversed(chunks) for sample in chunk]
+
+
+def _metric(function_name, metric_name, start, end, until, **statistics):
+    if LOCAL_DIR:
+        return []
+    if time.monotonic() >= until:
+        print(f"[RIGHT-SIZING] Skipping {metric_name} metrics for {function_name}: time budget spent")
+        return []
+    response = cloudwatch.get_metric_statistics(
+        Namespace="AWS/Lambda",
+        MetricName=metric_name,
+        Dimensions=[{"Name": "FunctionName", "Value": function_name}],
+        StartTime=start,
+        EndTime=end,
+        Period=LOOKBACK_HOURS * 3600,
+        **statistics,
+    )
+    return response.get("Datapoints", [])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def usage(function_name, configuration, deadline=None):
+    """
+    Recent usage of a function: {source ("logs", "metrics" or None),
+    samples, invocations, durationMs, billedMs, atTimeoutRate, memoryUsedMb}
+    where durationMs / memoryUsedMb are the PERCENTILE values and billedMs
+    the mean billed duration of invocations that finished in time. Reads
+    stop after BUDGET_SECONDS or at `deadline` (a time.monotonic() value).
+    """
+    until = time.monotonic() + BUDGET_SECONDS
+    if deadline is not None:
+        until = min(until, deadline)
+    end = datetime.utcnow()
+    start = end - timedelta(hours=LOOKBACK_HOURS)
+    result = {"source": None, "samples": 0, "invocations": None, "durationMs": None,
+              "billedMs": None, "atTimeoutRate": 0.0, "memoryUsedMb": None}
+    try:
+        samples = _report_samples(log_group_for(function_name, configuration), start, until)
+        invocations = _metric(function_name, "Invocations", start, end, until, Statistics=["Sum"])
+        if invocations:
+            result["invocations"] = int(sum(point["Sum"] for point in invocations))
+
+        if samples:
+            timeout_ms = configuration["Timeout"] * 1000
+            finished = [s for s in samples if s["durationMs"] < timeout_ms * AT_LIMIT_RATIO]
+            result.update({
+                "source": "logs",
+                "samples": len(samples),
+                "durationMs": math.ceil(percentile([s["durationMs"] for s in samples], PERCENTILE)),
+                "billedMs": round(sum(s["billedMs"] for s in finished) / len(finished)) if finished else None,
+                "atTimeoutRate": round(1 - len(finished) / len(samples), 4),
+                "memoryUsedMb": percentile([s["maxMemoryUsedMb"] for s in samples], PERCENTILE),
+            })
+            if result["invocations"] is None:
+                result["invocations"] = len(samples)
+        else:
+            pct = f"p{PERCENTILE:g}"
+            durations = _metric(function_name, "Duration", start, end, until, ExtendedStatistics=[pct])
+            averages = _metric(function_name, "Duration", start, end, until, Statistics=["Average"])
+            if durations:
+                result.update({
+                    "source": "metrics",
+                    "durationMs": math.ceil(max(point["ExtendedStatistics"][pct] for point in durations)),
+                    "billedMs": round(max(point["Average"] for point in averages)) if averages else None,
+                })
+    except Exception as e:
+        print(f"[RIGHT-SIZING] Could not read usage of {function_name}: {str(e)}")
+    print(f"[RIGHT-SIZING] {function_name}: {result}")
+    return result
+
+
+def monthly_cost(usage_data, timeout_s, memory_mb):
+    """
+    Estimated compute cost over 30 days at the lookback's invocation rate,
+    with invocations that hit the timeout billed for the full timeout.
+    None when the usage data cannot support an estimate.
+    """
+    if not usage_data.get("invocations") or usage_data.get("billedMs") is None:
+        return None
+    rate = usage_data["atTimeoutRate"]
+    billed_ms = (1 - rate) * usage_data["billedMs"] + rate * timeout_s * 1000
+    invocations = usage_data["invocations"] * (30 * 24 / LOOKBACK_HOURS)
+    return round(invocations * billed_ms / 1000 * memory_mb / 1024 * LAMBDA_PRICE_PER_GB_SECOND, 2)
+
+
+def _target(current, used, to_setting):
+    floor = current * MIN_GROWTH
+    if used is None:
+        return math.ceil(floor), f"no usage data; raised by {MIN_GROWTH:g}x"
+    sized = to_setting(used * (1 + HEADROOM))
+    if sized <= floor:
+        return math.ceil(floor), f"p{PERCENTILE:g} within limit; raised by {MIN_GROWTH:g}x"
+    return sized, f"p{PERCENTILE:g} + {HEADROOM:.0%} headroom"
+
+
+def timeout_target(configuration, usage_data, ceiling):
+    """(seconds, basis) for a timeout remediation"""
+    current = configuration["Timeout"]
+    used = usage_data["durationMs"]
+    target, basis = _target(current, used, lambda ms: math.ceil(ms / 1000))
+    return min(target, ceiling), basis
+
+
+def memory_target(configuration, usage_data, ceiling):
+    """(MB, basis) for a memory remediation, rounded up to MEMORY_STEP_MB"""
+    current = configuration["MemorySize"]
+    target, basis = _target(current, usage_data["memoryUsedMb"], math.ceil)
+    target = max(MIN_MEMORY_MB, math.ceil(target / MEMORY_STEP_MB) * MEMORY_STEP_MB)
+    return min(target, ceiling), basis
+
+
+def cost_estimate(usage_data, before, after, doubled):
+    """awsActions cost block: monthly estimates for (timeout_s, memory_mb) settings"""
+    return {
+        "currency": "USD",
+        "period": "30d",
+        "before": monthly_cost(usage_data, *before),
+        "after": monthly_cost(usage_data, *after),
+        "doubling": monthly_cost(usage_data, *doubled),
+        "invocationsInLookback": usage_data.get("invocations"),
+        "lookbackHours": LOOKBACK_HOURS,
+    }
@@ -0,0 +1,259 @@
+"""
+RCRA Incident Search Index
+Inverted token index over incident text for filtered listings and GET /search
+
+When an incident is persisted, its summary, probable root cause, tags,
+log group and normalized raw message are tokenized. One posting row per
+distinct token goes to RCRASearchIndexTable. Each row is keyed by Token
+with a "<CreatedAt>#<IncidentId>" sort key, so a posting list comes back
+newest-first and can be bounded to a time range with a key condition.
+Rows carry a Weight (field importance times capped term frequency) that
+search() combines with each token's inverse document frequency to rank
+hits. Tags are also indexed as exact "tag:<tag>" tokens. Postings share
+the incident's TTL.
+
+Set SEARCH_BACKEND=memory (or call use_backend) to keep postings in
+process for local runs and tests.
+"""
+
+import math
+import os
+import re
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+SEARCH_TABLE_NAME = os.environ.get("SEARCH_TABLE_NAME", "RCRASearchIndexTable")
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "dynamodb")
+
+# Most recent postings read per token when intersecting lists
+MAX_POSTINGS_PER_TOKEN = 2000
+
+# Distinct tokens indexed per incident
+MAX_TOKENS_PER_INCIDENT = 128
+
+# Raw log text beyond this is not indexed
+MAX_MESSAGE_CHARS = 4000
+
+# Longer tokens (encoded blobs, hashes run together) are not indexed; they
+# never match a query and can exceed DynamoDB's 2048-byte partition key
+MAX_TOKEN_CHARS = 64
+
+# Occurrences of a token within one field that still add weight
+MAX_TERM_FREQUENCY = 3
+
+FIELD_WEIGHTS = {
+    "summary": 3,
+    "tags": 3,
+    "root_cause": 2,
+    "log_group": 1,
+    "message": 1,
+}
+
+TAG_PREFIX = "tag:"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "na", "of", "on", "or", "that", "the", "this", "to", "was", "with",
+}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.\-]*[A-Za-z0-9]|[A-Za-z0-9]")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Volatile fragments of log lines that would only bloat the index
+_NOISE_PATTERNS = [
+    re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I),  # UUIDs
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?\b"),                 # timestamps
+    re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b"),                                   # IPs
+    re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b", re.I),                                 # hex ids
+    re.compile(r"\b\d+(?:\.\d+)?(?:ms|s|mb|kb|gb|%)?\b", re.I),                             # numbers
+]
+
+
+class DynamoPostingStore:
+    """Posting lists in RCRASearchIndexTable"""
+
+    def __init__(self, table_name=SEARCH_TABLE_NAME):
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def put(self, rows):
+        with self.table.batch_writer(overwrite_by_pkeys=["Token", "Posting"]) as batch:
+            for row in rows:
+                batch.put_item(Item=row)
+
+    def query(self, token, lower, upper, limit):
+        query_kwargs = {
+            "KeyConditionExpression": Key("Token").eq(token) & Key("Posting").between(lower, upper),
+            "ScanIndexForward": False,
+            "ProjectionExpression": "Posting, Weight",
+        }
+        rows = []
+        while len(rows) < limit:
+            query_kwargs["Limit"] = limit - len(rows)
+            response = self.table.query(**query_kwargs)
+            rows.extend((row["Posting"], int(row.get("Weight", 1))) for row in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return rows
+
+
+class MemoryPostingStore:
+    """In-process posting lists with the same ordering as DynamoPostingStore"""
+
+    def __init__(self):
+        self.tokens = {}
+
+    def put(self, rows):
+        for row in rows:
+            self.tokens.setdefault(row["Token"], {})[row["Posting"]] = int(row.get("Weight", 1))
+
+    def query(self, token, lower, upper, limit):
+        postings = self.tokens.get(token, {})
+        keys = sorted((key for key in postings if lower <= key <= upper), reverse=True)[:limit]
+        return [(key, postings[key]) for key in keys]
+
+
+backend = MemoryPostingStore() if SEARCH_BACKEND == "memory" else DynamoPostingStore()
+
+
+def use_backend(store):
+    """Swap the posting store (e.g. MemoryPostingStore() in tests); returns the previous one"""
+    global backend
+    previous, backend = backend, store
+    return previous
+
+
+def normalize_message(text):
+    """Raw log text with ids, timestamps, addresses and numbers removed"""
+    text = (text or "")[:MAX_MESSAGE_CHARS]
+    for pattern in _NOISE_PATTERNS:
+        text = pattern.sub(" ", text)
+    return text
+
+
+def tokenize(text):
+    """
+    Lower-cased word tokens of text; CamelCase identifiers also yield their
+    parts so "ConnectionPoolExhausted" matches "pool". Stopwords,
+    1-character tokens and tokens over MAX_TOKEN_CHARS are dropped.
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text or ""):
+        candidates = [word]
+        parts = _CAMEL_RE.findall(word)
+        if len(parts) > 1:
+            candidates.extend(parts)
+        for token in candidates:
+            token = token.lower()
+            if 1 < len(token) <= MAX_TOKEN_CHARS and token not in STOPWORDS:
+                tokens.append(token)
+    return tokens
+
+
+def tag_token(tag):
+    return TAG_PREFIX + str(tag).strip().lower()
+
+
+def incident_fields(incident):
+    """Searchable text of an incident, by field; full items and headers both work"""
+    analysis = incident.get("AnalysisResult") or {}
+    return {
+        "summary": analysis.get("summary") or incident.get("Summary"),
+        "root_cause": analysis.get("probable_root_cause") or incident.get("RootCause"),
+        "log_group": incident.get("LogGroup"),
+        "message": normalize_message(incident.get("RawLogMessage") or incident.get("RawPreview")),
+    }
+
+
+def incident_tokens(incident):
+    """{token: weight} for an incident"""
+    weights = {}
+    for field, text in incident_fields(incident).items():
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field] * min(count, MAX_TERM_FREQUENCY)
+
+    analysis = incident.get("AnalysisResult") or {}
+    for tag in analysis.get("tags") or incident.get("Tags") or []:
+        for token in [tag_token(tag)] + tokenize(str(tag)):
+            if len(token) <= MAX_TOKEN_CHARS + len(TAG_PREFIX):
+                weights[token] = weights.get(token, 0) + FIELD_WEIGHTS["tags"]
+
+    # Keep the heaviest tokens when an incident has more than the cap
+    ranked = sorted(weights.items(), key=lambda pair: -pair[1])[:MAX_TOKENS_PER_INCIDENT]
+    return dict(ranked)
+
+
+def posting_key(incident):
+    return f"{incident.get('CreatedAt', '')}#{incident['IncidentId']}"
+
+
+def index_incident(incident):
+    """Write the posting rows for one incident; returns the token count"""
+    posting = posting_key(incident)
+    rows = []
+    for token, weight in incident_tokens(incident).items():
+        row = {"Token": token, "Posting": posting, "IncidentId": incident["IncidentId"], "Weight": weight}
+        if incident.get("ExpiresAt"):
+            row["ExpiresAt"] = incident["ExpiresAt"]
+        rows.append(row)
+    backend.put(rows)
+    return len(rows)
+
+
+def postings(token, since=None, until=None, limit=MAX_POSTINGS_PER_TOKEN):
+    """Newest-first (posting key, weight) pairs for one token within [since, until]"""
+    # "~" sorts after every "#<IncidentId>" suffix, making `until` inclusive
+    return backend.query(token, since or "0", (until or "9999") + "~", limit)
+
+
+def _intersect(tokens, since, until):
+    """{posting key: {token: weight}} for postings carrying every token, plus df per token"""
+    common = None
+    frequencies = {}
+    for token in dict.fromkeys(tokens):
+        found = dict(postings(token, since, until))
+        frequencies[token] = len(found)
+        if common is None:
+            common = {key: {token: weight} for key, weight in found.items()}
+        else:
+            common = {key: dict(weights, **{token: found[key]}) for key, weights in common.items() if key in found}
+        if not common:
+            return {}, frequencies
+    return common or {}, frequencies
+
+
+def match(tokens, since=None, until=None):
+    """
+    Incidents carrying every token, as newest-first (CreatedAt, IncidentId)
+    pairs. Each posting list is capped at MAX_POSTINGS_PER_TOKEN.
+    """
+    if not tokens:
+        return []
+    common, _ = _intersect(tokens, since, until)
+    return [tuple(key.rsplit("#", 1)) for key in sorted(common, reverse=True)]
+
+
+def search(query, since=None, until=None):
+    """
+    Rank incidents matching every token of `query`. Returns
+    [(incident_id, score, created_at)] best first; the score sums each
+    token's posting weight times its inverse document frequency, and ties
+    go to the newer incident.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    common, frequencies = _intersect(tokens, since, until)
+    idf = {token: math.log(1 + MAX_POSTINGS_PER_TOKEN / max(df, 1)) for token, df in frequencies.items()}
+
+    hits = []
+    for key, weights in common.items():
+        created_at, incident_id = key.rsplit("#", 1)
+        score = sum(weight * idf[token] for token, weight in weights.items())
+        hits.append((incident_id, round(score, 3), created_at))
+    hits.sort(key=lambda hit: (hit[1], hit[2]), reverse=True)
+    return hits
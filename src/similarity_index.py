@@ -0,0 +1,318 @@
+"""
+RCRA Incident Similarity Index
+Related-incident lookup over hashed n-gram embeddings
+
+Each incident's summary, normalized log message and log group are turned
+into a fixed-size vector by feature hashing (word unigrams and bigrams
+plus character trigrams, signed, sublinear and L2-normalized), so no
+model has to be shipped or called. Vectors live in an index directory
+that is opened with numpy memory mapping:
+
+- vectors.npy   (N x DIMENSIONS) float16 unit vectors
+- codes.npy     (TABLES x N) random-hyperplane LSH codes, sorted per table
+- order.npy     (TABLES x N) row of each sorted code
+- ids.npy / created.npy   incident id and CreatedAt per row
+- manifest.json version, build time and parameters
+
+A query hashes its vector into each table, pulls the rows sharing a code
+(binary search over the sorted codes) and re-ranks those candidates by
+exact cosine similarity. Small indexes are searched exhaustively.
+
+The maintenance Lambda rebuilds the index on a schedule. With
+SIMILARITY_INDEX_BUCKET set it is published to S3 under a versioned
+prefix and each container downloads the newest version to /tmp;
+incidents newer than the build are embedded on the fly at query time.
+"""
+
+import json
+import os
+import shutil
+import time
+import zlib
+from datetime import datetime
+
+import boto3
+import numpy as np
+
+import incident_store
+import search_index
+
+SIMILARITY_INDEX_BUCKET = os.environ.get("SIMILARITY_INDEX_BUCKET")
+SIMILARITY_INDEX_PREFIX = os.environ.get("SIMILARITY_INDEX_PREFIX", "similarity-index")
+SIMILARITY_INDEX_DIR = os.environ.get("SIMILARITY_INDEX_DIR", "/tmp/rcra-similarity")
+
+s3 = boto3.client("s3") if SIMILARITY_INDEX_BUCKET else None
+
+DIMENSIONS = 256
+
+# LSH layout: TABLES independent tables of BITS hyperplanes each
+TABLES = 8
+BITS = 10
+LSH_SEED = 20240611
+
+# Below this many rows every query is answered exhaustively
+EXACT_SEARCH_ROWS = 5000
+
+# Field weights inside one embedding
+FIELD_WEIGHTS = {"summary": 1.0, "message": 0.7, "log_group": 0.4}
+
+# How often a container checks S3 for a newer index
+INDEX_CHECK_SECONDS = 300
+
+# Incidents newer than the index that are embedded per query
+MAX_DELTA_INCIDENTS = 500
+
+EMBED_ATTRIBUTES = ["IncidentId", "CreatedAt", "Summary", "RawPreview", "LogGroup"]
+
+INDEX_FILES = ("vectors.npy", "codes.npy", "order.npy", "ids.npy", "created.npy", "manifest.json")
+
+_loaded = {"index": None, "checked_at": 0.0}
+
+
+def _hash(feature):
+    """Stable (bucket, sign) for a feature string"""
+    value = zlib.crc32(feature.encode("utf-8"))
+    return value % DIMENSIONS, 1.0 if value & 0x80000000 else -1.0
+
+
+def _features(text):
+    words = search_index.tokenize(text)
+    features = {}
+    for i, word in enumerate(words):
+        for feature in ["w:" + word] + ([f"b:{words[i - 1]}_{word}"] if i else []):
+            features[feature] = features.get(feature, 0) + 1
+        padded = f"^{word}$"
+        for j in range(len(padded) - 2):
+            feature = "c:" + padded[j:j + 3]
+            features[feature] = features.get(feature, 0) + 1
+    return features
+
+
+def embedding_text(incident):
+    """Text fields an incident is embedded from; headers and full items both work"""
+    header = incident_store.as_header(incident)
+    return {
+        "summary": header.get("Summary"),
+        "message": search_index.normalize_message(header.get("RawPreview")),
+        "log_group": header.get("LogGroup"),
+    }
+
+
+def embed(fields):
+    """Unit-length float32 vector for {field: text}"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for field, text in fields.items():
+        for feature, count in _features(text or "").items():
+            bucket, sign = _hash(feature)
+            vector[bucket] += sign * FIELD_WEIGHTS[field] * (1.0 + np.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_incident(incident):
+    return embed(embedding_text(incident))
+
+
+def _planes():
+    """Random hyperplanes of every LSH table, (TABLES, BITS, DIMENSIONS)"""
+    rng = np.random.default_rng(LSH_SEED)
+    return rng.standard_normal((TABLES, BITS, DIMENSIONS)).astype(np.float32)
+
+
+_PLANES = _planes()
+_BIT_WEIGHTS = (1 << np.arange(BITS)).astype(np.uint32)
+
+
+def lsh_codes(vectors):
+    """(TABLES x N) uint32 bucket codes for (N x DIMENSIONS) vectors"""
+    projections = np.einsum("tbd,nd->tnb", _PLANES, np.asarray(vectors, dtype=np.float32))
+    return ((projections > 0).astype(np.uint32) * _BIT_WEIGHTS).sum(axis=2, dtype=np.uint32)
+
+
+class SimilarityIndex:
+    """Read-only view of an index directory (arrays are memory-mapped)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.codes = np.load(os.path.join(directory, "codes.npy"), mmap_mode="r")
+        self.order = np.load(os.path.join(directory, "order.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+        self.created = np.load(os.path.join(directory, "created.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def candidates(self, vector):
+        """Rows sharing an LSH bucket with vector in any table"""
+        codes = lsh_codes(vector[None, :])[:, 0]
+        rows = []
+        for table, code in enumerate(codes):
+            start = np.searchsorted(self.codes[table], code, side="left")
+            end = np.searchsorted(self.codes[table], code, side="right")
+            rows.append(self.order[table, start:end])
+        return np.unique(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+
+    def query(self, vector, k=10):
+        """Top-k [(incident_id, created_at, similarity)] for a unit vector"""
+        if not len(self):
+            return []
+        if len(self) <= EXACT_SEARCH_ROWS:
+            rows = np.arange(len(self))
+        else:
+            rows = self.candidates(vector)
+            if len(rows) < k:
+                rows = np.arange(len(self))
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ vector
+        top = np.argsort(-scores)[:k]
+        return [(str(self.ids[rows[i]]), str(self.created[rows[i]]), float(scores[i])) for i in top]
+
+
+def write_index(directory, ids, created, vectors, built_at, version):
+    """Write an index directory for already-embedded rows"""
+    os.makedirs(directory, exist_ok=True)
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, DIMENSIONS)
+    codes = lsh_codes(vectors) if len(vectors) else np.zeros((TABLES, 0), dtype=np.uint32)
+    order = np.argsort(codes, axis=1, kind="stable").astype(np.int64)
+
+    np.save(os.path.join(directory, "vectors.npy"), vectors.astype(np.float16))
+    np.save(os.path.join(directory, "codes.npy"), np.take_along_axis(codes, order, axis=1))
+    np.save(os.path.join(directory, "order.npy"), order)
+    np.save(os.path.join(directory, "ids.npy"), np.array(ids, dtype="U64"))
+    np.save(os.path.join(directory, "created.npy"), np.array(created, dtype="U32"))
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump({
+            "version": version,
+            "builtAt": built_at,
+            "rows": len(ids),
+            "dimensions": DIMENSIONS,
+            "tables": TABLES,
+            "bits": BITS,
+        }, f)
+
+
+def build_index(headers):
+    """
+    Embed every incident header and publish a new index version (to S3 if
+    configured, otherwise SIMILARITY_INDEX_DIR). Returns the manifest.
+    """
+    built_at = datetime.utcnow().isoformat() + "Z"
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    ids, created, vectors = [], [], []
+    for header in headers:
+        ids.append(header["IncidentId"])
+        created.append(header.get("CreatedAt", ""))
+        vectors.append(embed_incident(header))
+
+    directory = os.path.join(SIMILARITY_INDEX_DIR, version)
+    write_index(directory, ids, created, vectors, built_at, version)
+
+    if s3:
+        prefix = f"{SIMILARITY_INDEX_PREFIX}/{version}/"
+        for name in INDEX_FILES:
+            s3.upload_file(os.path.join(directory, name), SIMILARITY_INDEX_BUCKET, prefix + name)
+        previous = _remote_manifest()
+        s3.put_object(
+            Bucket=SIMILARITY_INDEX_BUCKET,
+            Key=f"{SIMILARITY_INDEX_PREFIX}/manifest.json",
+            Body=json.dumps({"version": version, "builtAt": built_at, "rows": len(ids)}).encode("utf-8"),
+        )
+        if previous and previous.get("version") != version:
+            for name in INDEX_FILES:
+                s3.delete_object(Bucket=SIMILARITY_INDEX_BUCKET, Key=f"{SIMILARITY_INDEX_PREFIX}/{previous['version']}/{name}")
+    else:
+        _write_current(version)
+
+    _loaded["index"] = SimilarityIndex(directory)
+    _loaded["checked_at"] = time.time()
+    _prune_local(version)
+    print(f"[SIMILARITY] Built index {version} with {len(ids)} incident(s)")
+    return _loaded["index"].manifest
+
+
+def _remote_manifest():
+    try:
+        body = s3.get_object(Bucket=SIMILARITY_INDEX_BUCKET, Key=f"{SIMILARITY_INDEX_PREFIX}/manifest.json")["Body"].read()
+        return json.loads(body)
+    except s3.exceptions.NoSuchKey:
+        return None
+
+
+def _write_current(version):
+    with open(os.path.join(SIMILARITY_INDEX_DIR, "CURRENT"), "w") as f:
+        f.write(version)
+
+
+def _prune_local(keep_version):
+    """Drop superseded local index versions (frees /tmp)"""
+    for name in os.listdir(SIMILARITY_INDEX_DIR):
+        path = os.path.join(SIMILARITY_INDEX_DIR, name)
+        if name != keep_version and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def current_index():
+    """The newest available index (downloading it if needed), or None"""
+    now = time.time()
+    if _loaded["index"] is not None and now - _loaded["checked_at"] < INDEX_CHECK_SECONDS:
+        return _loaded["index"]
+    _loaded["checked_at"] = now
+
+    if s3:
+        manifest = _remote_manifest()
+        version = manifest and manifest["version"]
+    else:
+        try:
+            with open(os.path.join(SIMILARITY_INDEX_DIR, "CURRENT")) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            version = None
+    if not version:
+        return _loaded["index"]
+    if _loaded["index"] is not None and _loaded["index"].manifest["version"] == version:
+        return _loaded["index"]
+
+    directory = os.path.join(SIMILARITY_INDEX_DIR, version)
+    if s3 and not os.path.exists(os.path.join(directory, "manifest.json")):
+        os.makedirs(directory, exist_ok=True)
+        # manifest.json goes last so a half-finished download is never opened
+        for name in INDEX_FILES:
+            s3.download_file(SIMILARITY_INDEX_BUCKET, f"{SIMILARITY_INDEX_PREFIX}/{version}/{name}", os.path.join(directory, name))
+    _loaded["index"] = SimilarityIndex(directory)
+    _prune_local(version)
+    return _loaded["index"]
+
+
+def _recent_candidates(since, vector, exclude):
+    """Incidents created after the index build, scored against vector"""
+    filters = {"since": since} if since else {}
+    items, _ = incident_store.query_incidents(filters, limit=MAX_DELTA_INCIDENTS, attributes=EMBED_ATTRIBUTES)
+    return [
+        (item["IncidentId"], item.get("CreatedAt", ""), float(embed_incident(item) @ vector))
+        for item in items
+        if item["IncidentId"] not in exclude
+    ]
+
+
+def similar_incidents(incident, k=10, min_similarity=0.3):
+    """
+    Top-k [(incident_id, created_at, similarity)] most similar to an
+    incident (header or full item), excluding itself.
+    """
+    vector = embed_incident(incident)
+    index = current_index()
+    exclude = {incident.get("IncidentId")}
+
+    hits = []
+    since = None
+    if index is not None:
+        hits = [hit for hit in index.query(vector, k + 1) if hit[0] not in exclude]
+        since = index.manifest.get("builtAt")
+        exclude.update(hit[0] for hit in hits)
+    hits.extend(_recent_candidates(since, vector, exclude))
+
+    hits = [hit for hit in hits if hit[2] >= min_similarity]
+    hits.sort(key=lambda hit: (hit[2], hit[1]), reverse=True)
+    return hits[:k]
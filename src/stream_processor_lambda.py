@@ -0,0 +1,100 @@
+"""
+RCRA Incident Stream Processor
+Consumes the RCRARootCauseTable DynamoDB stream
+
+- INSERT/MODIFY/REMOVE events update the statistics counters and daily
+  rollups and invalidate cached dashboard responses
+- INSERT events count toward the predictive-analysis volume trigger and
+  feed the per-signature / per-log-group burst detector
+- REMOVE events issued by the TTL service are archived to cold storage
+  together with their (still present) detail items; expiry does not
+  decrement the lifetime statistics
+
+Counter deltas are applied at most once per stream record (see
+aggregate_store), so a failed batch can be retried safely; after
+MaximumRetryAttempts the event source bisects the batch and sends the
+records that keep failing to RCRAStreamFailureQueue.
+"""
+
+import aggregate_store
+import archive_store
+import burst_detector
+import incident_store
+import predictive_analysis
+import response_cache
+from stream_records import deserialize_image, is_ttl_expiry
+
+
+def archive_expired(records):
+    """Merge expired headers with their details and write them to the archive"""
+    headers = []
+    for record in records:
+        header = deserialize_image(record["dynamodb"].get("OldImage"))
+        if header.get("IncidentId", "").startswith("inc-"):
+            headers.append(header)
+    if not headers:
+        return 0
+
+    details = incident_store.load_details(
+        [h["IncidentId"] for h in headers if h.get("DetailStored")]
+    )
+    incidents = []
+    for header in headers:
+        incident = dict(header)
+        incident.update(details.get(header["IncidentId"], {}))
+        incidents.append(incident)
+
+    archive_store.archive_incidents(incidents)
+    return len(incidents)
+
+
+def update_statistics(records):
+    """
+    Apply counter and rollup deltas for every incident change that isn't a
+    TTL expiry. Returns (changes applied, headers of new incidents).
+    """
+    applied = 0
+    inserted = []
+    for record in records:
+        if is_ttl_expiry(record):
+            continue
+        images = record.get("dynamodb", {})
+        old = deserialize_image(images.get("OldImage")) or None
+        new = deserialize_image(images.get("NewImage")) or None
+        incident_id = (new or old or {}).get("IncidentId", "")
+        if not incident_id.startswith("inc-"):
+            continue
+        new_header = incident_store.as_header(new) if new else None
+        # Redelivered records (batch retries) are skipped, not counted twice
+        if not aggregate_store.apply_incident_change(
+            incident_store.as_header(old) if old else None,
+            new_header,
+            event_id=record.get("eventID"),
+        ):
+            continue
+        applied += 1
+        if record.get("eventName") == "INSERT":
+            inserted.append(new_header)
+    return applied, inserted
+
+
+def handler(event, context):
+    records = event.get("Records", [])
+    expired = [record for record in records if is_ttl_expiry(record)]
+
+    stats_updates, inserted = update_statistics(records)
+    if stats_updates:
+        response_cache.invalidate()
+    if inserted:
+        try:
+            predictive_analysis.note_new_incidents(len(inserted))
+        except Exception as e:
+            print(f"[STREAM] Failed to update predictive trigger: {str(e)}")
+        try:
+            burst_detector.record_incidents(inserted)
+        except Exception as e:
+            print(f"[STREAM] Failed to update burst detector: {str(e)}")
+    archived = archive_expired(expired)
+
+    print(f"[STREAM] Processed {len(records)} record(s), stats updates {stats_updates}, archived {archived}")
+    return {"records": len(records), "statsUpdates": stats_updates, "archived": archived}
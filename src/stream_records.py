@@ -0,0 +1,26 @@
+"""
+RCRA Stream Records
+Helpers shared by the RCRARootCauseTable stream consumers
+
+Kept free of other RCRA imports so each consumer (statistics/archive
+processor, live-updates fan-out) only loads what it uses.
+"""
+
+from boto3.dynamodb.types import TypeDeserializer
+
+deserializer = TypeDeserializer()
+
+
+def deserialize_image(image):
+    """Convert a stream image in DynamoDB JSON into a plain item dict"""
+    return {key: deserializer.deserialize(value) for key, value in (image or {}).items()}
+
+
+def is_ttl_expiry(record):
+    """TTL deletes are REMOVE events performed by the DynamoDB service principal"""
+    identity = record.get("userIdentity") or {}
+    return (
+        record.get("eventName") == "REMOVE"
+        and identity.get("type") == "Service"
+        and identity.get("principalId") == "dynamodb.amazonaws.com"
+    )
@@ -0,0 +1,34 @@
+"""
+RCRA WebSocket Connection Lambda
+Handles the $connect, $disconnect and $default routes of the live-updates API
+
+Connections are recorded in RCRAConnectionsTable so the live-updates
+stream consumer knows whom to push incident changes to. $default only
+answers keepalive pings; clients never need to send anything else.
+"""
+
+import json
+
+import live_updates
+
+
+def handler(event, context):
+    request_context = event.get("requestContext", {})
+    route = request_context.get("routeKey")
+    connection_id = request_context.get("connectionId")
+
+    try:
+        if route == "$connect":
+            live_updates.register_connection(connection_id)
+            print(f"[WEBSOCKET] Connected {connection_id}")
+        elif route == "$disconnect":
+            live_updates.remove_connection(connection_id)
+            print(f"[WEBSOCKET] Disconnected {connection_id}")
+        else:
+            body = json.loads(event.get("body") or "{}")
+            if body.get("action") == "ping":
+                live_updates.post(connection_id, json.dumps({"type": "pong"}))
+        return {"statusCode": 200}
+    except Exception as e:
+        print(f"[WEBSOCKET] Error on {route} for {connection_id}: {str(e)}")
+        return {"statusCode": 500}
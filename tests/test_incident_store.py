@@ -0,0 +1,88 @@
+"""
+Header writes against index key rules
+
+Runs incident_store.put_incident against stubbed tables that reject items
+the way DynamoDB does when a GSI key attribute is null or empty, so an
+incident missing one of those attributes must still be stored.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import incident_store  # noqa: E402
+
+
+class ValidationException(Exception):
+    pass
+
+
+class StubTable:
+    """put_item stand-in enforcing DynamoDB's rule for GSI key attributes"""
+
+    def __init__(self, key_attributes=()):
+        self.key_attributes = key_attributes
+        self.items = {}
+
+    def put_item(self, Item):
+        for attr in self.key_attributes:
+            if attr in Item and Item[attr] in (None, ""):
+                raise ValidationException(f"One or more parameter values are not valid: index key {attr} is empty")
+        self.items[Item["IncidentId"]] = Item
+
+
+class PutIncidentTest(unittest.TestCase):
+    def setUp(self):
+        self.table = StubTable(incident_store.INDEX_KEY_ATTRIBUTES)
+        self.detail_table = StubTable()
+        for attribute, value in (("table", self.table), ("detail_table", self.detail_table)):
+            patcher = mock.patch.object(incident_store, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(incident_store.search_index, "index_incident")
+        self.index_incident = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def incident(self, **overrides):
+        item = {
+            "IncidentId": "inc-0001",
+            "Status": "OPEN",
+            "CreatedAt": "2026-10-19T10:00:00Z",
+            "LogGroup": "/aws/lambda/checkout",
+            "ErrorSignature": "Task timed out",
+            "AnalysisResult": {"summary": "Checkout timed out", "severity": "HIGH"},
+            "RemediationResult": {},
+            "RawLogMessage": "Task timed out after 30.00 seconds",
+        }
+        item.update(overrides)
+        return item
+
+    def test_incident_without_log_group_is_stored(self):
+        for log_group in (None, ""):
+            header = incident_store.put_incident(self.incident(LogGroup=log_group))
+            self.assertNotIn("LogGroup", header)
+            self.assertIn("inc-0001", self.table.items)
+            self.assertEqual(self.table.items["inc-0001"]["DayBucket"], "2026-10-19")
+            self.assertEqual(self.table.items["inc-0001"]["StatusDay"], "OPEN#2026-10-19")
+
+    def test_incident_without_created_at_leaves_day_keys_off(self):
+        header = incident_store.put_incident(self.incident(CreatedAt=None))
+        for attr in ("CreatedAt", "DayBucket"):
+            self.assertNotIn(attr, header)
+        self.assertIn("UpdatedAt", header)
+        self.assertIn("inc-0001", self.detail_table.items)
+
+    def test_key_attributes_are_kept_when_set(self):
+        header = incident_store.put_incident(self.incident())
+        self.assertEqual(header["LogGroup"], "/aws/lambda/checkout")
+        self.assertEqual(header["SignatureKey"], "/aws/lambda/checkout#Task timed out")
+
+
+if __name__ == "__main__":
+    unittest.main()
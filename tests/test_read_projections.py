@@ -0,0 +1,193 @@
+"""
+Read-volume harness for the dashboard API
+
+Runs dashboard read endpoints against a stubbed incident table that
+applies ProjectionExpressions the way DynamoDB does and counts the bytes
+each call returns. Stored items carry the full raw log message and
+analysis blobs, so any read path that drops its projection (or scans)
+shows up as a jump in bytes read.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import dashboard_api_lambda  # noqa: E402
+import incident_store  # noqa: E402
+
+DETAIL_FIELDS = set(incident_store.DETAIL_FIELDS)
+
+
+def item_size(item):
+    """Approximate DynamoDB item size: attribute names plus serialized values"""
+    return sum(len(name) + len(json.dumps(value, default=str)) for name, value in item.items())
+
+
+def make_item(i):
+    created = f"2026-10-{18 - i % 7:02d}T{i % 24:02d}:00:00Z"
+    return {
+        "IncidentId": f"inc-{i:04d}",
+        "TicketNumber": f"TKT-{i:04d}",
+        "Status": "OPEN",
+        "CreatedAt": created,
+        "UpdatedAt": created,
+        "DayBucket": created[:10],
+        "LogGroup": "/aws/lambda/checkout",
+        "LogStream": "2026/10/18/[$LATEST]abc",
+        "ErrorSignature": "Task timed out after 30.00 seconds",
+        "SignatureKey": "/aws/lambda/checkout#Task timed out after 30.00 seconds",
+        "Summary": "Checkout timed out calling payments",
+        "Severity": "HIGH",
+        "RootCause": "Downstream payments API latency",
+        "Tags": ["timeout", "payments"],
+        "RawPreview": "Task timed out after 30.00 seconds",
+        "RemediationEligible": True,
+        "RemediationAction": "MANUAL_APPROVAL_REQUIRED",
+        "RawLogMessage": "Task timed out after 30.00 seconds\n" + "stack frame\n" * 400,
+        "AnalysisResult": {
+            "summary": "Checkout timed out calling payments",
+            "severity": "HIGH",
+            "probable_root_cause": "Downstream payments API latency " * 20,
+            "suggested_remediation_steps": ["Increase timeout", "Add retries"] * 10,
+            "tags": ["timeout", "payments"],
+        },
+        "RemediationResult": {"autoRemediationEligible": True, "details": "x" * 500, "awsActions": []},
+    }
+
+
+class StubTable:
+    """Incident table stand-in that records every read and the bytes it returned"""
+
+    def __init__(self, items):
+        self.items = items
+        self.reads = []
+
+    def _project(self, items, kwargs):
+        projection = kwargs.get("ProjectionExpression")
+        attributes = None
+        if projection:
+            names = kwargs.get("ExpressionAttributeNames", {})
+            attributes = [names.get(token.strip(), token.strip()) for token in projection.split(",")]
+            items = [{k: v for k, v in item.items() if k in attributes} for item in items]
+        return items, attributes
+
+    def _record(self, operation, kwargs, items):
+        items, attributes = self._project(items, kwargs)
+        self.reads.append({
+            "operation": operation,
+            "index": kwargs.get("IndexName"),
+            "attributes": attributes,
+            "items": len(items),
+            "bytes": sum(item_size(item) for item in items),
+        })
+        return items
+
+    def query(self, **kwargs):
+        if kwargs.get("Select") == "COUNT":
+            self.reads.append({"operation": "query", "index": kwargs.get("IndexName"), "attributes": [],
+                               "items": 0, "bytes": 0})
+            return {"Count": len(self.items)}
+        items = self.items[:kwargs.get("Limit", len(self.items))]
+        return {"Items": self._record("query", kwargs, items)}
+
+    def scan(self, **kwargs):
+        return {"Items": self._record("scan", kwargs, self.items)}
+
+    def get_item(self, Key, **kwargs):
+        matches = [item for item in self.items if item["IncidentId"] == Key["IncidentId"]]
+        items = self._record("get_item", kwargs, matches)
+        return {"Item": items[0]} if items else {}
+
+    def batch_get_item(self, RequestItems):
+        responses = {}
+        for table_name, request in RequestItems.items():
+            wanted = {key["IncidentId"] for key in request["Keys"]}
+            matches = [item for item in self.items if item["IncidentId"] in wanted]
+            responses[table_name] = self._record("batch_get_item", request, matches)
+        return {"Responses": responses}
+
+
+class ReadProjectionTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubTable([make_item(i) for i in range(60)])
+        self.full_item_bytes = item_size(self.stub.items[0])
+        for target, attribute in ((incident_store, "table"), (incident_store, "dynamodb")):
+            patcher = mock.patch.object(target, attribute, self.stub)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assert_projected_reads(self, allowed_attributes, max_item_fraction=0.1):
+        self.assertTrue(self.stub.reads, "endpoint made no incident reads")
+        for read in self.stub.reads:
+            self.assertNotEqual(read["operation"], "scan", f"unexpected table scan: {read}")
+            self.assertIsNotNone(read["attributes"], f"read without ProjectionExpression: {read}")
+            self.assertFalse(DETAIL_FIELDS & set(read["attributes"]), f"read pulled detail blobs: {read}")
+            self.assertLessEqual(set(read["attributes"]), set(allowed_attributes), f"unlisted attributes: {read}")
+            if read["items"]:
+                self.assertLess(read["bytes"] / read["items"], self.full_item_bytes * max_item_fraction, read)
+
+    def bytes_read(self):
+        return sum(read["bytes"] for read in self.stub.reads)
+
+    def test_incident_list(self):
+        result = dashboard_api_lambda.get_incidents({"limit": "20"})
+        self.assertEqual(result["count"], 20)
+        self.assert_projected_reads(dashboard_api_lambda.LIST_ATTRIBUTES, max_item_fraction=0.2)
+
+    def test_incident_list_by_log_group(self):
+        dashboard_api_lambda.get_incidents({"limit": "20", "logGroup": "/aws/lambda/checkout"})
+        self.assertEqual({read["index"] for read in self.stub.reads if read["items"]}, {"LogGroupIndex"})
+        self.assert_projected_reads(dashboard_api_lambda.LIST_ATTRIBUTES, max_item_fraction=0.2)
+
+    def test_incident_list_by_status_before_status_index_is_active(self):
+        with mock.patch.object(incident_store, "_index_status", {incident_store.STATUS_DAY_INDEX: (False, 0)}), \
+                mock.patch.object(incident_store.time, "monotonic", return_value=1):
+            dashboard_api_lambda.get_incidents({"limit": "20", "status": "OPEN"})
+        self.assertEqual({read["index"] for read in self.stub.reads if read["items"]}, {"DayBucketIndex"})
+        self.assert_projected_reads(dashboard_api_lambda.LIST_ATTRIBUTES, max_item_fraction=0.2)
+
+    def test_statistics_recent_incidents(self):
+        counters = {
+            "totalIncidents": 60, "remediationEligible": 60, "incidents24h": 10,
+            "severityCounts": {"HIGH": 60}, "statusCounts": {"OPEN": 60}, "tagCounts": {}, "updatedAt": None,
+        }
+        with mock.patch.object(dashboard_api_lambda.aggregate_store, "get_statistics_counters", return_value=counters), \
+                mock.patch.object(dashboard_api_lambda.burst_detector, "active_bursts", return_value=[]):
+            dashboard_api_lambda.get_statistics()
+        self.assert_projected_reads(dashboard_api_lambda.RECENT_ATTRIBUTES)
+        self.assertLess(self.bytes_read(), 5 * self.full_item_bytes * 0.1)
+
+    def test_error_occurrences_use_signature_index(self):
+        occurrences = dashboard_api_lambda.get_error_occurrences(
+            "Task timed out after 30.00 seconds", "/aws/lambda/checkout"
+        )
+        self.assertEqual(len(occurrences), dashboard_api_lambda.RELATED_LIMIT + 1)
+        self.assertEqual({read["index"] for read in self.stub.reads}, {"SignatureIndex"})
+        self.assert_projected_reads(dashboard_api_lambda.OCCURRENCE_ATTRIBUTES)
+
+    def test_error_occurrences_fall_back_to_log_group_index(self):
+        with mock.patch.object(incident_store, "find_recent_occurrences", return_value=[]):
+            dashboard_api_lambda.get_error_occurrences(None, "/aws/lambda/checkout")
+        self.assertEqual({read["index"] for read in self.stub.reads}, {"LogGroupIndex"})
+        self.assert_projected_reads(dashboard_api_lambda.OCCURRENCE_ATTRIBUTES)
+
+    def test_predictive_analysis_reads_no_incidents(self):
+        snapshot = {
+            "analysis": {"summary": "ok"}, "version": 1, "generatedAt": "2026-10-18T00:00:00Z",
+            "ageSeconds": 60, "refreshRequested": False,
+        }
+        with mock.patch.object(dashboard_api_lambda.predictive_analysis, "latest_snapshot", return_value=snapshot):
+            result = dashboard_api_lambda.get_predictive_analysis({})
+        self.assertTrue(result["success"])
+        self.assertEqual(self.stub.reads, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
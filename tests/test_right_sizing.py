@@ -0,0 +1,133 @@
+"""
+Offline right-sizing checks
+
+Sizes timeout and memory remediations from REPORT lines read out of
+RIGHT_SIZING_LOCAL_DIR (one <function name>.log file per function) instead
+of CloudWatch Logs, so the sizing and cost estimates can be exercised
+without AWS access.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import remediation_actions  # noqa: E402
+import right_sizing  # noqa: E402
+
+CONFIGURATION = {"Timeout": 10, "MemorySize": 512, "LastUpdateStatus": "Successful"}
+
+
+def report_line(duration_ms, memory_used_mb, memory_size_mb=512):
+    billed = int(-(-duration_ms // 1))
+    return (f"REPORT RequestId: 0f4c6a1e-1111-2222-3333-444455556666\tDuration: {duration_ms:.2f} ms\t"
+            f"Billed Duration: {billed} ms\tMemory Size: {memory_size_mb} MB\tMax Memory Used: {memory_used_mb} MB\t\n")
+
+
+class FakeLambda:
+    """Lambda client stand-in whose updates apply immediately"""
+
+    class exceptions:
+        ResourceConflictException = type("ResourceConflictException", (Exception,), {})
+
+    def __init__(self):
+        self.updates = []
+
+    def get_function_configuration(self, FunctionName):
+        return dict(CONFIGURATION)
+
+    def update_function_configuration(self, **kwargs):
+        self.updates.append(kwargs)
+
+
+class LocalUsageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        patcher = mock.patch.object(right_sizing, "LOCAL_DIR", self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_reports(self, function_name, lines):
+        with open(os.path.join(self.directory, f"{function_name}.log"), "w") as f:
+            f.write("START RequestId: 0f4c6a1e Version: $LATEST\n")
+            f.writelines(lines)
+
+    def test_usage_from_local_reports(self):
+        # 95 invocations finish in 2-4s, 5 are killed at the 10s timeout
+        lines = [report_line(2000 + i * 20, 200 + i) for i in range(95)]
+        lines += [report_line(10000, 300) for _ in range(5)]
+        self.write_reports("checkout", lines)
+
+        usage = right_sizing.usage("checkout", CONFIGURATION)
+        self.assertEqual(usage["source"], "logs")
+        self.assertEqual(usage["samples"], 100)
+        self.assertEqual(usage["invocations"], 100)
+        self.assertEqual(usage["atTimeoutRate"], 0.05)
+        self.assertEqual(usage["durationMs"], 10000)
+        self.assertEqual(usage["memoryUsedMb"], 300)
+
+        timeout, _ = right_sizing.timeout_target(CONFIGURATION, usage, 900)
+        self.assertEqual(timeout, 13)
+        memory, _ = right_sizing.memory_target(CONFIGURATION, usage, 10240)
+        self.assertEqual(memory, 640)
+
+        estimate = right_sizing.cost_estimate(usage, (10, 512), (timeout, 512), (20, 512))
+        self.assertLessEqual(estimate["before"], estimate["after"])
+        self.assertLessEqual(estimate["after"], estimate["doubling"])
+
+    def test_busy_function_is_sized_from_newest_reports(self):
+        # More lines than MAX_SAMPLES, one second apart and ending now: the
+        # oldest 1000 must be the ones left out
+        total = right_sizing.MAX_SAMPLES + 1000
+        self.write_reports("busy", [report_line(1000 + i, 128) for i in range(total)])
+
+        start = datetime.utcnow() - timedelta(hours=right_sizing.LOOKBACK_HOURS)
+        samples = right_sizing._report_samples("/aws/lambda/busy", start, time.monotonic() + 60)
+        self.assertEqual([s["durationMs"] for s in samples], [float(1000 + i) for i in range(1000, total)])
+
+        usage = right_sizing.usage("busy", CONFIGURATION)
+        self.assertEqual(usage["samples"], right_sizing.MAX_SAMPLES)
+
+    def test_reports_outside_the_lookback_are_ignored(self):
+        now = datetime.utcnow()
+        old = (now - timedelta(hours=right_sizing.LOOKBACK_HOURS + 1)).isoformat() + "Z"
+        recent = (now - timedelta(minutes=5)).isoformat() + "Z"
+        self.write_reports("timestamped", [
+            f"{old} 2026/10/19/[$LATEST]abc {report_line(9000, 500)}",
+            f"{recent} 2026/10/19/[$LATEST]abc {report_line(3000, 200)}",
+        ])
+        usage = right_sizing.usage("timestamped", CONFIGURATION)
+        self.assertEqual(usage["samples"], 1)
+        self.assertEqual(usage["durationMs"], 3000)
+
+    def test_missing_file_means_no_usage_data(self):
+        usage = right_sizing.usage("unknown-fn", CONFIGURATION)
+        self.assertIsNone(usage["source"])
+        timeout, basis = right_sizing.timeout_target(CONFIGURATION, usage, 900)
+        self.assertEqual(timeout, 13)
+        self.assertIn("no usage data", basis)
+
+    def test_remediation_run_sizes_from_local_reports(self):
+        self.write_reports("checkout", [report_line(9000 + i, 900 + i, 1024) for i in range(50)])
+        client = FakeLambda()
+
+        result = remediation_actions.run(client, "checkout", ["timeout", "memory"])
+        self.assertEqual(result["outcome"], remediation_actions.REMEDIATED)
+        self.assertEqual(client.updates, [{"FunctionName": "checkout", "Timeout": 13, "MemorySize": 1280}])
+        sizing = result["awsActions"][0]["rightSizing"]
+        self.assertEqual(sizing["usage"]["source"], "logs")
+        self.assertIsNotNone(sizing["costEstimate"]["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()